@@ -2,9 +2,20 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from backend.collaboration.activity import activity_tracker
+from backend.collaboration.manager import manager
 from backend.routes import router as api_router, websocket_router
-from backend.tasks.scheduler import scheduled_cleanup_task
+from backend.tasks.registry import job_scheduler
+from backend.collaboration.persistence import document_persister
+from backend.tasks.scheduler import (
+    scheduled_activity_flush_task,
+    scheduled_document_eviction_task,
+    scheduled_document_persist_task,
+)
 from backend.logging_setup import setup_logging
+from backend.security.service import password_executor
+from backend.snapshot.jobs import snapshot_executor, snapshot_job_manager
+from backend.storage.client import get_storage
 from backend.handlers import exception_handlers
 
 
@@ -13,9 +24,23 @@ async def lifespan(app: FastAPI):
     """
     Manages application startup and shutdown events.
     """
-    cleanup_task = asyncio.create_task(scheduled_cleanup_task())
+    await manager.start()
+    # Периодические задачи выполняются только на одном экземпляре (лидере)
+    await job_scheduler.start()
+    activity_task = asyncio.create_task(scheduled_activity_flush_task())
+    eviction_task = asyncio.create_task(scheduled_document_eviction_task())
+    persist_task = asyncio.create_task(scheduled_document_persist_task())
     yield
-    cleanup_task.cancel()
+    await job_scheduler.stop()
+    await snapshot_job_manager.stop()
+    activity_task.cancel()
+    eviction_task.cancel()
+    persist_task.cancel()
+    # Не теряем последние отметки активности и несохраненные документы при остановке
+    await activity_tracker.flush()
+    await document_persister.flush()
+    await manager.stop()
+    await get_storage().close()
 
 def get_app() -> FastAPI:
     """
@@ -44,6 +69,10 @@ def get_app() -> FastAPI:
 
     @app.get("/health", tags=["Health Check"])
     def health():
-        return {"status": "healthy"}
+        return {
+            "status": "healthy",
+            "password_hashing": password_executor.metrics.snapshot(),
+            "snapshots": snapshot_executor.metrics.snapshot(),
+        }
 
     return app
\ No newline at end of file
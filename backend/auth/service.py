@@ -1,6 +1,7 @@
 from fastapi.security import OAuth2PasswordRequestForm
 
 from backend.user.dependencies.repository import IUserRepository
+from backend.user.dto import FindUserDTO
 from backend.user.exceptions import UserNotFound
 from backend.security.service import PasswordService, TokenService
 from backend.security.dto import TokenDTO
@@ -25,11 +26,11 @@ class AuthService:
         Raises:
             UserNotFound: If the user does not exist or password is incorrect.
         """
-        user = await self.user_repo.find({"login": form_data.username})
+        user = await self.user_repo.find(FindUserDTO(login=form_data.username))
         if not user:
             raise UserNotFound
 
-        if not PasswordService.verify_password(form_data.password, user.password):
+        if not await PasswordService.verify_password(form_data.password, user.password):
             raise UserNotFound
 
         access_token = TokenService.create_access_token(data={"sub": str(user.id)})
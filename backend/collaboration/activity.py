@@ -0,0 +1,56 @@
+import time
+
+from redis.asyncio import Redis
+
+from backend.redis_client.client import get_redis_client
+
+# Sorted set активности комнат: member - human_readable_id комнаты, score - unix-время последней активности
+ROOM_ACTIVITY_KEY = "room_activity"
+
+
+class ActivityTracker:
+    """
+    Keeps the last-activity time of rooms in memory and flushes it to Redis in batches.
+
+    Recording activity is a dictionary write, so it can be called for every
+    message. `flush` writes all rooms touched since the previous flush with a
+    single ZADD into the ROOM_ACTIVITY_KEY sorted set.
+    """
+    def __init__(self):
+        """Initializes the tracker with no pending activity."""
+        self.redis: Redis = get_redis_client()
+        self._pending: dict[str, float] = {}
+
+    def touch(self, room_id: str):
+        """
+        Records activity in a room.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+        """
+        self._pending[room_id] = time.time()
+
+    async def flush(self) -> int:
+        """
+        Writes the pending activity of all rooms to Redis in one command.
+
+        GT keeps a newer timestamp written by another worker from being
+        overwritten by an older one.
+
+        Returns:
+            int: The number of rooms flushed.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        try:
+            await self.redis.zadd(ROOM_ACTIVITY_KEY, pending, gt=True)
+        except Exception:
+            # Возвращаем несохраненные отметки, не затирая более свежие
+            for room_id, timestamp in pending.items():
+                self._pending.setdefault(room_id, timestamp)
+            raise
+        return len(pending)
+
+# Один экземпляр на процесс: сбрасывается в Redis фоновой задачей
+activity_tracker = ActivityTracker()
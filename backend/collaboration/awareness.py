@@ -0,0 +1,163 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from backend.collaboration.documents import DocumentKey
+from backend.collaboration.manager import Connection, manager
+from backend.collaboration.protocol import (
+    AwarenessEntry,
+    create_awareness_update_message,
+    read_awareness_update,
+)
+from backend.config.collaboration import collaboration_settings
+
+# Состояние клиента, который покинул документ
+REMOVED_STATE = "null"
+
+
+@dataclass
+class _ConnectionAwareness:
+    """Awareness of the clients behind one connection in one document."""
+    # client_id -> (clock, state): последние известные состояния клиента
+    states: dict[int, tuple[int, str]] = field(default_factory=dict)
+    # Состояния, еще не разосланные из-за ограничения частоты
+    pending: dict[int, tuple[int, str]] = field(default_factory=dict)
+    last_sent: float = 0.0
+    flush_task: asyncio.Task | None = None
+
+
+class AwarenessManager:
+    """
+    Keeps presence (cursors, selections, names) in memory and relays it with coalescing.
+
+    Awareness is never persisted. Updates from a connection are merged per
+    client and broadcast at most AWARENESS_MAX_BROADCASTS_PER_SECOND times per
+    second; intermediate cursor positions are dropped. When a connection
+    leaves a document its clients are announced as removed.
+    """
+    def __init__(self):
+        """Initializes the manager with no presence."""
+        self._local: dict[DocumentKey, dict[Connection, _ConnectionAwareness]] = {}
+        # Состояния клиентов других процессов: client_id -> (clock, state, время получения)
+        self._remote: dict[DocumentKey, dict[int, tuple[int, str, float]]] = {}
+
+    def get_states_message(self, key: DocumentKey) -> bytes | None:
+        """
+        Encodes the current presence of a document for a newly joined client.
+
+        Args:
+            key (DocumentKey): The (room_id, file_id) of the document.
+
+        Returns:
+            bytes | None: An AWARENESS message, or None if nobody is present.
+        """
+        entries: list[AwarenessEntry] = [
+            (client_id, clock, state)
+            for awareness in self._local.get(key, {}).values()
+            for client_id, (clock, state) in awareness.states.items()
+        ]
+        expires_before = time.monotonic() - collaboration_settings.AWARENESS_TIMEOUT_SECONDS
+        entries += [
+            (client_id, clock, state)
+            for client_id, (clock, state, received_at) in self._remote.get(key, {}).items()
+            if received_at >= expires_before
+        ]
+        return create_awareness_update_message(entries) if entries else None
+
+    async def handle(self, connection: Connection, key: DocumentKey, message: bytes):
+        """
+        Records an awareness update from a client and broadcasts it, rate-limited.
+
+        Args:
+            connection (Connection): The connection that sent the update.
+            key (DocumentKey): The (room_id, file_id) of the document.
+            message (bytes): The AWARENESS message.
+        """
+        entries = read_awareness_update(message)
+        if not entries:
+            return
+
+        awareness = self._local.setdefault(key, {}).setdefault(connection, _ConnectionAwareness())
+        for client_id, clock, state in entries:
+            known = awareness.pending.get(client_id) or awareness.states.get(client_id)
+            if known is not None and known[0] > clock:
+                continue
+            awareness.pending[client_id] = (clock, state)
+            if state == REMOVED_STATE:
+                awareness.states.pop(client_id, None)
+            else:
+                awareness.states[client_id] = (clock, state)
+
+        if awareness.flush_task is not None:
+            # Рассылка уже запланирована - новое состояние уйдет вместе с ней
+            return
+        delay = awareness.last_sent + 1 / collaboration_settings.AWARENESS_MAX_BROADCASTS_PER_SECOND - time.monotonic()
+        if delay <= 0:
+            await self._flush(connection, key, awareness)
+        else:
+            awareness.flush_task = asyncio.create_task(self._flush_later(connection, key, awareness, delay))
+
+    async def leave(self, connection: Connection, key: DocumentKey):
+        """
+        Drops a connection's presence in a document and announces its clients as removed.
+
+        Args:
+            connection (Connection): The connection leaving the document.
+            key (DocumentKey): The (room_id, file_id) of the document.
+        """
+        connections = self._local.get(key)
+        if not connections or connection not in connections:
+            return
+        awareness = connections.pop(connection)
+        if not connections:
+            del self._local[key]
+            # Без локальных подключений процесс отписывается от документа, и чужие состояния устареют
+            self._remote.pop(key, None)
+        if awareness.flush_task is not None:
+            awareness.flush_task.cancel()
+
+        removed = [(client_id, clock + 1, REMOVED_STATE) for client_id, (clock, _) in awareness.states.items()]
+        if removed:
+            await manager.broadcast(create_awareness_update_message(removed), key, connection)
+
+    def apply_remote(self, key: DocumentKey, message: bytes):
+        """
+        Records presence relayed from another process, for snapshots sent to joining clients.
+
+        Args:
+            key (DocumentKey): The (room_id, file_id) of the document.
+            message (bytes): The relayed AWARENESS message.
+        """
+        entries = read_awareness_update(message)
+        if not entries:
+            return
+        if key not in self._local:
+            return
+        remote = self._remote.setdefault(key, {})
+        now = time.monotonic()
+        expires_before = now - collaboration_settings.AWARENESS_TIMEOUT_SECONDS
+        for client_id in [client_id for client_id, entry in remote.items() if entry[2] < expires_before]:
+            del remote[client_id]
+        for client_id, clock, state in entries:
+            if state == REMOVED_STATE:
+                remote.pop(client_id, None)
+            else:
+                remote[client_id] = (clock, state, now)
+        if not remote:
+            del self._remote[key]
+
+    async def _flush_later(self, connection: Connection, key: DocumentKey, awareness: _ConnectionAwareness, delay: float):
+        await asyncio.sleep(delay)
+        awareness.flush_task = None
+        await self._flush(connection, key, awareness)
+
+    async def _flush(self, connection: Connection, key: DocumentKey, awareness: _ConnectionAwareness):
+        if not awareness.pending:
+            return
+        entries = [(client_id, clock, state) for client_id, (clock, state) in awareness.pending.items()]
+        awareness.pending.clear()
+        awareness.last_sent = time.monotonic()
+        await manager.broadcast(create_awareness_update_message(entries), key, connection)
+
+# Один экземпляр на процесс: присутствие хранится только в памяти
+awareness_manager = AwarenessManager()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+
+from backend.config.collaboration import collaboration_settings
+from backend.redis_client.client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Колбэк, которым бэкенд доставляет сообщения от других процессов: (канал, сообщение)
+MessageHandler = Callable[[str, bytes], Awaitable[None]]
+
+
+class BroadcastBackend:
+    """
+    Delivers collaboration messages between application processes.
+
+    The ConnectionManager always fans messages out to local connections
+    itself; a backend only carries them to the other processes and hands
+    the messages it receives back through the handler passed to `start`.
+    """
+    async def start(self, handler: MessageHandler):
+        """
+        Starts the backend.
+
+        Args:
+            handler (MessageHandler): Called for every message published by another process.
+        """
+
+    async def stop(self):
+        """Stops the backend and releases its resources."""
+
+    async def subscribe(self, channel: str):
+        """
+        Starts receiving messages for a channel that has local connections.
+
+        Args:
+            channel (str): The channel (room) identifier.
+        """
+
+    async def unsubscribe(self, channel: str):
+        """
+        Stops receiving messages for a channel without local connections.
+
+        Args:
+            channel (str): The channel (room) identifier.
+        """
+
+    async def publish(self, channel: str, message: bytes):
+        """
+        Sends a message to the other processes subscribed to a channel.
+
+        Args:
+            channel (str): The channel (room) identifier.
+            message (bytes): The binary message.
+        """
+
+
+class InProcessBackend(BroadcastBackend):
+    """
+    Backend for a single worker: local fan-out is all that is needed.
+    """
+
+
+class RedisPubSubBackend(BroadcastBackend):
+    """
+    Backend relaying messages between processes and nodes through Redis pub/sub.
+
+    Each process subscribes only to channels it has local connections for.
+    Published messages are prefixed with the process's node id so a process
+    ignores its own messages when they come back from Redis.
+    """
+    CHANNEL_PREFIX = "collab:"
+
+    def __init__(self, redis: Redis):
+        """
+        Initializes the backend.
+
+        Args:
+            redis (Redis): The Redis client used both to publish and to subscribe.
+        """
+        self.redis = redis
+        self.node_id = uuid.uuid4().bytes
+        self.pubsub: PubSub | None = None
+        self._handler: MessageHandler | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._has_channels = asyncio.Event()
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+
+    async def subscribe(self, channel: str):
+        await self.pubsub.subscribe(self.CHANNEL_PREFIX + channel)
+        self._has_channels.set()
+
+    async def unsubscribe(self, channel: str):
+        await self.pubsub.unsubscribe(self.CHANNEL_PREFIX + channel)
+
+    async def publish(self, channel: str, message: bytes):
+        await self.redis.publish(self.CHANNEL_PREFIX + channel, self.node_id + message)
+
+    async def _listen(self):
+        node_id_length = len(self.node_id)
+        while True:
+            try:
+                if not self.pubsub.subscribed:
+                    self._has_channels.clear()
+                    await self._has_channels.wait()
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                data: bytes = message["data"]
+                if data[:node_id_length] == self.node_id:
+                    continue
+                channel = message["channel"].decode()[len(self.CHANNEL_PREFIX):]
+                await self._handler(channel, data[node_id_length:])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error while receiving collaboration messages from Redis: {e}")
+                await asyncio.sleep(1)
+
+
+def get_broadcast_backend() -> BroadcastBackend:
+    """
+    Creates the broadcast backend selected by the BROADCAST_BACKEND setting.
+
+    Returns:
+        BroadcastBackend: "memory" gives an InProcessBackend, "redis" a RedisPubSubBackend.
+    """
+    if collaboration_settings.BROADCAST_BACKEND == "redis":
+        return RedisPubSubBackend(get_redis_client())
+    return InProcessBackend()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+from pycrdt import merge_updates
+
+from backend.collaboration.documents import DocumentKey
+from backend.collaboration.manager import Connection, manager
+from backend.collaboration.protocol import create_sync_update_message
+from backend.config.collaboration import collaboration_settings
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateBatcher:
+    """
+    Coalesces document updates relayed to peers within a short flush window.
+
+    Updates received for a document during BROADCAST_FLUSH_WINDOW_MS are
+    merged into one Yjs update and sent as a single frame. Every client gets
+    the merge of the updates it did not send itself. A window of 0 disables
+    batching and relays each update immediately.
+    """
+    def __init__(self):
+        """Initializes the batcher with no pending updates."""
+        self._pending: dict[DocumentKey, list[tuple[Connection, bytes]]] = {}
+        self._flush_tasks: dict[DocumentKey, asyncio.Task] = {}
+
+    async def add(self, key: DocumentKey, update: bytes, sender: Connection):
+        """
+        Queues an update for relaying to the other clients of a document.
+
+        Args:
+            key (DocumentKey): The (room_id, file_id) of the document.
+            update (bytes): The encoded Yjs update.
+            sender (Connection): The connection the update came from.
+        """
+        window = collaboration_settings.BROADCAST_FLUSH_WINDOW_MS / 1000
+        if window <= 0:
+            await manager.broadcast(create_sync_update_message(update), key, sender)
+            return
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append((sender, update))
+            return
+        self._pending[key] = [(sender, update)]
+        self._flush_tasks[key] = asyncio.create_task(self._flush_later(key, window))
+
+    async def _flush_later(self, key: DocumentKey, window: float):
+        try:
+            await asyncio.sleep(window)
+        finally:
+            self._flush_tasks.pop(key, None)
+            pending = self._pending.pop(key, [])
+        try:
+            await self._flush(key, pending)
+        except Exception as e:
+            logger.error(f"Failed to relay batched updates for {key}: {e}")
+
+    @staticmethod
+    async def _flush(key: DocumentKey, pending: list[tuple[Connection, bytes]]):
+        senders = {sender for sender, _ in pending}
+        message = create_sync_update_message(merge_updates(*(update for _, update in pending)))
+
+        # Клиенты, которые ничего не отправляли, получают все обновления одним кадром
+        manager.send_local(message, key, senders)
+        # Каждый отправитель получает только чужие обновления
+        if len(senders) > 1:
+            for sender in senders:
+                others = [update for origin, update in pending if origin is not sender]
+                if key in sender.channels:
+                    sender.send(create_sync_update_message(merge_updates(*others)), key)
+        await manager.publish(message, key)
+
+# Один экземпляр на процесс
+update_batcher = UpdateBatcher()
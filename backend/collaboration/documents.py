@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pycrdt import Doc
+
+from backend.collaboration.persistence import document_persister
+from backend.collaboration.service import CollaborationService
+from backend.config.collaboration import collaboration_settings
+
+logger = logging.getLogger(__name__)
+
+# Ключ документа: (room_id, file_id)
+DocumentKey = tuple[str, str]
+
+
+def _apply_update(doc: Doc, update: bytes):
+    """
+    Applies an encoded update to a document.
+
+    Raises:
+        ValueError: If the update cannot be decoded.
+    """
+    try:
+        doc.apply_update(update)
+    except BaseException as e:
+        # pycrdt сообщает о поврежденном обновлении паникой Rust (PanicException наследует BaseException)
+        if type(e).__name__ != "PanicException":
+            raise
+        raise ValueError("The update is not a valid Yjs update.") from None
+
+
+@dataclass
+class ResidentDocument:
+    """
+    A document held in memory together with its bookkeeping.
+
+    Attributes:
+        doc (Doc): The merged Y.Doc.
+        size (int): Estimated memory footprint: the encoded state at load time
+            plus every update applied since.
+        last_used (float): Monotonic time of the last access.
+        stale (bool): Whether the document may have missed updates of other
+            processes since its last connection left.
+    """
+    doc: Doc
+    size: int
+    last_used: float = field(default_factory=time.monotonic)
+    stale: bool = False
+
+
+class DocumentManager:
+    """
+    Keeps one in-memory Y.Doc per collaborative file and manages its lifecycle.
+
+    Documents are loaded lazily from Redis on first access; every applied
+    update is appended to the document's update log, which is compacted once
+    it grows past YDOC_COMPACT_MAX_UPDATES entries.
+
+    Documents without connections hibernate: they are evicted after
+    YDOC_IDLE_TIMEOUT_SECONDS, or earlier, least recently used first, when the
+    resident documents exceed YDOC_MEMORY_BUDGET_MB. Every update is already
+    logged in Redis, so eviction only compacts the log and a later join
+    reloads the document transparently. Without connections this process
+    is unsubscribed from the document's broadcast channel, so a hibernating
+    document is brought up to date from Redis before it is used again.
+
+    Edited documents are written back to their files by the
+    `document_persister`; a document missing from Redis is restored from there.
+    """
+    def __init__(self):
+        """Initializes the manager with no loaded documents."""
+        self.documents: OrderedDict[DocumentKey, ResidentDocument] = OrderedDict()
+        self.memory_usage = 0
+        self._connections: dict[DocumentKey, int] = {}
+        self._load_locks: dict[DocumentKey, asyncio.Lock] = {}
+        self._compactions: dict[DocumentKey, asyncio.Task] = {}
+        self.service = CollaborationService()
+
+    async def acquire(self, room_id: str, file_id: str) -> Doc:
+        """
+        Registers a connection to a document and returns the document.
+
+        A document with connections is never evicted.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+
+        Returns:
+            Doc: The merged Y.Doc of the file.
+        """
+        key = (room_id, file_id)
+        self._connections[key] = self._connections.get(key, 0) + 1
+        try:
+            return await self.get_document(room_id, file_id)
+        except Exception:
+            self._release(key)
+            raise
+
+    def release(self, room_id: str, file_id: str):
+        """
+        Unregisters a connection from a document.
+
+        Once the last connection is gone the idle timeout starts counting.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+        """
+        self._release((room_id, file_id))
+
+    def _release(self, key: DocumentKey):
+        count = self._connections.get(key, 0) - 1
+        if count > 0:
+            self._connections[key] = count
+            return
+        self._connections.pop(key, None)
+        resident = self.documents.get(key)
+        if resident is not None:
+            resident.last_used = time.monotonic()
+            # Процесс отписывается от канала документа: обновления других процессов больше не приходят
+            resident.stale = True
+        # Последний клиент ушел: сохраняем документ, не дожидаясь периодической записи
+        document_persister.flush_soon()
+
+    async def get_document(self, room_id: str, file_id: str) -> Doc:
+        """
+        Returns the in-memory document for a file, loading it from Redis if needed.
+
+        A resident document that may have missed updates of other processes
+        is merged with the state stored in Redis first.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+
+        Returns:
+            Doc: The merged Y.Doc of the file.
+        """
+        key = (room_id, file_id)
+        resident = self._touch(key)
+        if resident is not None and not resident.stale:
+            return resident.doc
+
+        lock = self._load_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Документ мог быть загружен, пока мы ждали блокировку
+            resident = self._touch(key)
+            if resident is not None and resident.stale:
+                await self._refresh(room_id, file_id, resident)
+            elif resident is None:
+                doc = Doc()
+                state = await self.service.load_document_state(room_id, file_id)
+                if state is None:
+                    state = await self._restore(room_id, file_id)
+                if state:
+                    doc.apply_update(state)
+                resident = ResidentDocument(doc=doc, size=len(state or b""))
+                self.documents[key] = resident
+                self.memory_usage += resident.size
+                self._enforce_memory_budget()
+        self._load_locks.pop(key, None)
+        return resident.doc
+
+    async def get_missing_update(self, room_id: str, file_id: str, state_vector: bytes) -> bytes:
+        """
+        Returns the part of a file's document that a client with the given state vector lacks.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+            state_vector (bytes): The encoded state vector sent by the client.
+
+        Returns:
+            bytes: The encoded update with every missing edit and deletion.
+        """
+        doc = await self.get_document(room_id, file_id)
+        return doc.get_update(state_vector)
+
+    async def apply_update(self, room_id: str, file_id: str, update: bytes):
+        """
+        Applies an incremental update to the in-memory document and logs it in Redis.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+            update (bytes): The encoded Yjs update received from a client.
+
+        Raises:
+            ValueError: If the update is malformed; it is neither applied nor logged.
+        """
+        doc = await self.get_document(room_id, file_id)
+        _apply_update(doc, update)
+        self._grow((room_id, file_id), len(update))
+        document_persister.mark_dirty(room_id, file_id)
+        log_length = await self.service.append_update(room_id, file_id, update)
+        if log_length >= collaboration_settings.YDOC_COMPACT_MAX_UPDATES:
+            self._schedule_compaction(room_id, file_id)
+
+    def merge_remote_update(self, room_id: str, file_id: str, update: bytes):
+        """
+        Applies an update that another process has already logged in Redis.
+
+        Only documents resident in this process are touched; a document that
+        is not loaded will pick the update up from Redis when it is.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+            update (bytes): The encoded Yjs update.
+        """
+        key = (room_id, file_id)
+        resident = self.documents.get(key)
+        if resident is not None:
+            try:
+                _apply_update(resident.doc, update)
+            except ValueError as e:
+                logger.warning(f"Dropping remote update for {room_id}/{file_id}: {e}")
+                return
+            self._grow(key, len(update))
+
+    async def _refresh(self, room_id: str, file_id: str, resident: ResidentDocument):
+        """
+        Merges the state stored in Redis into a resident document.
+        """
+        state = await self.service.load_document_state(room_id, file_id)
+        if state:
+            _apply_update(resident.doc, state)
+            # Состояние в Redis включает все правки документа: оценка размера не меньше него
+            growth = max(len(state) - resident.size, 0)
+            resident.size += growth
+            self.memory_usage += growth
+        resident.stale = False
+        self._enforce_memory_budget()
+
+    async def _restore(self, room_id: str, file_id: str) -> bytes | None:
+        """
+        Seeds Redis with a document's state from durable storage.
+        """
+        seed = await document_persister.load_seed(room_id, file_id)
+        if seed is None:
+            return None
+        return await self.service.seed_document_state(room_id, file_id, seed)
+
+    def evict_idle(self) -> int:
+        """
+        Evicts documents that have had no connections for YDOC_IDLE_TIMEOUT_SECONDS.
+
+        Returns:
+            int: The number of evicted documents.
+        """
+        expires_before = time.monotonic() - collaboration_settings.YDOC_IDLE_TIMEOUT_SECONDS
+        idle = [
+            key for key, resident in self.documents.items()
+            if key not in self._connections and resident.last_used < expires_before
+        ]
+        for key in idle:
+            self._evict(key)
+        return len(idle)
+
+    def _touch(self, key: DocumentKey) -> ResidentDocument | None:
+        resident = self.documents.get(key)
+        if resident is not None:
+            resident.last_used = time.monotonic()
+            self.documents.move_to_end(key)
+        return resident
+
+    def _grow(self, key: DocumentKey, size: int):
+        resident = self.documents.get(key)
+        if resident is not None:
+            resident.size += size
+            self.memory_usage += size
+            self._enforce_memory_budget()
+
+    def _enforce_memory_budget(self):
+        """
+        Evicts least recently used documents without connections while over the memory budget.
+        """
+        budget = collaboration_settings.YDOC_MEMORY_BUDGET_MB * 1024 * 1024
+        if self.memory_usage <= budget:
+            return
+        for key in list(self.documents):
+            if self.memory_usage <= budget:
+                break
+            if key not in self._connections:
+                self._evict(key)
+
+    def _evict(self, key: DocumentKey):
+        """
+        Drops a document from memory and compacts its Redis log for a fast reload.
+        """
+        resident = self.documents.pop(key)
+        self.memory_usage -= resident.size
+        self._schedule_compaction(*key)
+
+    def _schedule_compaction(self, room_id: str, file_id: str):
+        """
+        Starts a background compaction of a document's log unless one is already running.
+        """
+        key = (room_id, file_id)
+        if key in self._compactions:
+            return
+        task = asyncio.create_task(self._compact(room_id, file_id))
+        self._compactions[key] = task
+        task.add_done_callback(lambda _: self._compactions.pop(key, None))
+
+    async def _compact(self, room_id: str, file_id: str):
+        try:
+            await self.service.compact_document(room_id, file_id)
+        except Exception as e:
+            logger.error(f"Failed to compact document {room_id}/{file_id}: {e}")
+
+# Один экземпляр на процесс: документы разделяются всеми подключениями воркера
+document_manager = DocumentManager()
@@ -1,50 +1,264 @@
-from fastapi import WebSocket
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import WebSocket, status
+
+from backend.collaboration.backends import BroadcastBackend, get_broadcast_backend
+from backend.collaboration.documents import DocumentKey
+from backend.config.collaboration import collaboration_settings
+
+logger = logging.getLogger(__name__)
+
+# Колбэк для сообщений, пришедших от других процессов
+RemoteMessageHandler = Callable[[DocumentKey, bytes], Awaitable[None]]
+
+
+class Connection:
+    """
+    A WebSocket connection with a bounded outbound queue drained by its own writer task.
+
+    Sending only enqueues, so a slow peer never blocks the task that produced
+    the message. A peer whose queue overflows is disconnected; on reconnect
+    its client resynchronizes through the state-vector handshake.
+
+    One connection may be joined to several documents; `channels` maps each
+    document to the prefix that tags its frames on this connection.
+    """
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        """
+        Initializes the connection.
+
+        Args:
+            websocket (WebSocket): The accepted WebSocket connection.
+            queue_size (int): The maximum number of pending outbound messages.
+        """
+        self.websocket = websocket
+        self.channels: dict[DocumentKey, bytes] = {}
+        self.queue: asyncio.Queue[bytes | str] = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self._writer_task: asyncio.Task | None = None
+        self._close_task: asyncio.Task | None = None
+
+    def start(self):
+        """Starts the writer task that drains the outbound queue."""
+        self._writer_task = asyncio.create_task(self._writer())
+
+    def send(self, message: bytes | str, key: DocumentKey | None = None) -> bool:
+        """
+        Enqueues a message for delivery without waiting for the socket.
+
+        Args:
+            message (bytes | str): The binary document message, or a text control message.
+            key (DocumentKey | None): The document a binary message belongs to; its
+                channel prefix is prepended to the frame.
+
+        Returns:
+            bool: False if the connection is closed or was dropped for overflowing.
+        """
+        if self.closed:
+            return False
+        if key is not None:
+            message = self.channels.get(key, b"") + message
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Dropping slow WebSocket consumer: outbound queue is full.")
+            self._stop()
+            self._close_task = asyncio.create_task(self._close_socket(status.WS_1013_TRY_AGAIN_LATER))
+            return False
+        return True
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        """
+        Stops the writer task and closes the underlying WebSocket.
+
+        Args:
+            code (int): The WebSocket close code sent to the client.
+        """
+        if self.closed:
+            return
+        self._stop()
+        await self._close_socket(code)
+
+    def _stop(self):
+        self.closed = True
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except RuntimeError:
+            # Сокет уже закрыт клиентом
+            pass
+
+    async def _writer(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                if isinstance(message, str):
+                    await self.websocket.send_text(message)
+                else:
+                    await self.websocket.send_bytes(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Клиент отвалился: цикл чтения в роутере получит disconnect и уберет соединение
+            self.closed = True
+
 
 class ConnectionManager:
     """
-    Manages active WebSocket connections for collaboration rooms.
+    Manages active WebSocket connections and routes messages by (room, file).
+
+    Messages are fanned out to local connections directly and handed to a
+    pluggable BroadcastBackend, which carries them to other worker processes
+    and nodes serving the same document.
     """
-    def __init__(self):
-        """Initializes the manager with an empty dictionary of active connections."""
-        self.active_connections: dict[str, list[WebSocket]] = {}
+    def __init__(self, backend: BroadcastBackend | None = None):
+        """
+        Initializes the manager with an empty dictionary of active connections.
+
+        Args:
+            backend (BroadcastBackend | None): The cross-process backend; defaults to
+                the one selected by the BROADCAST_BACKEND setting.
+        """
+        self.active_connections: dict[DocumentKey, list[Connection]] = {}
+        self.backend = backend or get_broadcast_backend()
+        self._remote_handlers: list[RemoteMessageHandler] = []
+
+    @staticmethod
+    def _channel(key: DocumentKey) -> str:
+        return "/".join(key)
+
+    def add_remote_handler(self, handler: RemoteMessageHandler):
+        """
+        Registers a callback for messages that arrive from other processes.
+
+        Args:
+            handler (RemoteMessageHandler): Called with the document key and the message.
+        """
+        self._remote_handlers.append(handler)
+
+    async def start(self):
+        """Starts the broadcast backend. Called once on application startup."""
+        await self.backend.start(self._on_remote_message)
+
+    async def stop(self):
+        """Stops the broadcast backend. Called once on application shutdown."""
+        await self.backend.stop()
 
-    async def connect(self, websocket: WebSocket, room_id: str):
+    async def connect(self, websocket: WebSocket) -> Connection:
         """
-        Accepts a new WebSocket connection and adds it to the room's pool.
+        Accepts a new WebSocket connection and starts its writer.
 
         Args:
             websocket (WebSocket): The WebSocket connection instance.
-            room_id (str): The ID of the room the user is joining.
+
+        Returns:
+            Connection: The queued connection wrapping the WebSocket.
         """
         await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(websocket)
+        connection = Connection(websocket, collaboration_settings.WS_SEND_QUEUE_SIZE)
+        connection.start()
+        return connection
+
+    async def join(self, connection: Connection, key: DocumentKey, prefix: bytes = b""):
+        """
+        Adds a connection to a document's pool.
+
+        The first local connection of a document subscribes this process to
+        the document's channel in the broadcast backend.
+
+        Args:
+            connection (Connection): The connection joining the document.
+            key (DocumentKey): The (room_id, file_id) of the document.
+            prefix (bytes): The channel prefix for this document's frames on the connection.
+        """
+        connection.channels[key] = prefix
+        if key not in self.active_connections:
+            self.active_connections[key] = []
+            await self.backend.subscribe(self._channel(key))
+        self.active_connections[key].append(connection)
+
+    async def leave(self, connection: Connection, key: DocumentKey):
+        """
+        Removes a connection from a document's pool.
+
+        The last local connection of a document unsubscribes this process
+        from the document's channel.
+
+        Args:
+            connection (Connection): The connection leaving the document.
+            key (DocumentKey): The (room_id, file_id) of the document.
+        """
+        connection.channels.pop(key, None)
+        connections = self.active_connections.get(key)
+        if connections is not None and connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[key]
+                await self.backend.unsubscribe(self._channel(key))
 
-    def disconnect(self, websocket: WebSocket, room_id: str):
+    async def disconnect(self, connection: Connection):
         """
-        Removes a WebSocket connection from the room's pool.
+        Removes a connection from every document it joined and stops its writer.
 
         Args:
-            websocket (WebSocket): The WebSocket connection instance to remove.
-            room_id (str): The ID of the room the user is leaving.
+            connection (Connection): The connection to remove.
         """
-        if room_id in self.active_connections:
-            self.active_connections[room_id].remove(websocket)
+        for key in list(connection.channels):
+            await self.leave(connection, key)
+        await connection.close()
 
-    async def broadcast(self, message: bytes, room_id: str, sender: WebSocket):
+    async def broadcast(self, message: bytes, key: DocumentKey, sender: Connection):
         """
-        Broadcasts a message to all clients in a room except the sender.
+        Enqueues a message for all clients of a document except the sender.
+
+        Never waits on a peer's socket: delivery happens in each connection's
+        writer task. The message is also published to other processes.
 
         Args:
             message (bytes): The message to broadcast (expects binary data).
-            room_id (str): The ID of the room to broadcast to.
-            sender (WebSocket): The WebSocket connection of the message sender.
+            key (DocumentKey): The (room_id, file_id) of the document.
+            sender (Connection): The connection of the message sender.
+        """
+        self.send_local(message, key, (sender,))
+        await self.publish(message, key)
+
+    def send_local(self, message: bytes, key: DocumentKey, exclude: tuple[Connection, ...] | set[Connection] = ()):
         """
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                if connection is not sender:
-                    await connection.send_bytes(message)
+        Enqueues a message for the local clients of a document only.
+
+        Args:
+            message (bytes): The binary message.
+            key (DocumentKey): The (room_id, file_id) of the document.
+            exclude (tuple[Connection, ...] | set[Connection]): Connections that must not receive it.
+        """
+        for connection in self.active_connections.get(key, ()):
+            if connection not in exclude:
+                connection.send(message, key)
+
+    async def publish(self, message: bytes, key: DocumentKey):
+        """
+        Hands a message to the broadcast backend for the other processes only.
+
+        Args:
+            message (bytes): The binary message.
+            key (DocumentKey): The (room_id, file_id) of the document.
+        """
+        await self.backend.publish(self._channel(key), message)
+
+    async def _on_remote_message(self, channel: str, message: bytes):
+        room_id, file_id = channel.split("/", 1)
+        key = (room_id, file_id)
+        for handler in self._remote_handlers:
+            try:
+                await handler(key, message)
+            except Exception as e:
+                logger.error(f"Failed to handle a remote message for {channel}: {e}")
+        self.send_local(message, key)
 
 # Создаем один экземпляр менеджера, который будет использоваться всем приложением (Singleton)
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
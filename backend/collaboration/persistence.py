@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+from pycrdt import Doc, Text
+from sqlalchemy import select, update
+
+from backend.collaboration.service import CollaborationService
+from backend.config.collaboration import collaboration_settings
+from backend.config.database.engine import db_helper
+from backend.file.models.file_metadata import FileMetadataModel
+from backend.room.models.room import RoomModel
+from backend.storage.client import get_storage
+from backend.storage.exceptions import StorageObjectNotFound
+
+# Рядом с файлом хранится полное состояние Y-документа, чтобы восстановить его без потери истории
+YDOC_STATE_SUFFIX = ".ydoc"
+# client_id начального состояния: одинаковый во всех процессах, поэтому повторная загрузка идемпотентна
+SEED_CLIENT_ID = 0
+
+logger = logging.getLogger(__name__)
+
+
+def get_document_text(state: bytes) -> str:
+    """
+    Extracts the text content of an encoded document state.
+
+    Args:
+        state (bytes): The encoded Y.Doc state.
+
+    Returns:
+        str: The content of the document's shared text field.
+    """
+    doc = Doc()
+    doc.apply_update(state)
+    return str(doc.get(collaboration_settings.YDOC_TEXT_FIELD, type=Text))
+
+
+def create_seed_state(content: str) -> bytes:
+    """
+    Encodes the initial state of a document holding the given text.
+
+    The state is deterministic, so two processes seeding the same file
+    produce identical updates and never duplicate the content.
+
+    Args:
+        content (str): The initial text of the document.
+
+    Returns:
+        bytes: The encoded Y.Doc state.
+    """
+    doc = Doc(client_id=SEED_CLIENT_ID)
+    text = doc.get(collaboration_settings.YDOC_TEXT_FIELD, type=Text)
+    text += content
+    return doc.get_update()
+
+
+class DocumentPersister:
+    """
+    Writes collaborative documents back to their stored files (write-behind).
+
+    Redis holds the live state of every document; this class makes the
+    stored file of each FileMetadataModel the durable copy. Edited documents are
+    only marked dirty; they are written in batches every
+    YDOC_PERSIST_INTERVAL_SECONDS and shortly after their last client
+    disconnects, never per update. Each write stores the document's text in
+    the file itself and its full Y state in a `.ydoc` object next to it.
+
+    When Redis has lost a document, it is restored from the `.ydoc` object, or
+    seeded from the uploaded file's text the first time it is edited.
+    """
+    def __init__(self):
+        """Initializes the persister with no dirty documents."""
+        self.service = CollaborationService()
+        self.storage = get_storage()
+        self._dirty: dict[tuple[str, str], float] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    def mark_dirty(self, room_id: str, file_id: str):
+        """
+        Records that a document has changes that are not on disk yet.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+        """
+        self._dirty.setdefault((room_id, file_id), time.time())
+
+    def flush_soon(self):
+        """
+        Schedules a flush after YDOC_PERSIST_DEBOUNCE_SECONDS unless one is already scheduled.
+
+        Disconnects that happen within the delay are written in the same batch.
+        """
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(collaboration_settings.YDOC_PERSIST_DEBOUNCE_SECONDS)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to persist documents: {e}")
+
+    async def flush(self) -> int:
+        """
+        Writes every dirty document to storage in one batch.
+
+        The states are read from Redis with a single pipeline and the file
+        metadata is read and updated with one query each.
+
+        Returns:
+            int: The number of documents written.
+        """
+        if not self._dirty:
+            return 0
+        pending, self._dirty = self._dirty, {}
+        try:
+            return await self._persist(list(pending))
+        except Exception:
+            # Возвращаем несохраненные документы в очередь
+            for key, marked_at in pending.items():
+                self._dirty.setdefault(key, marked_at)
+            raise
+
+    async def _persist(self, keys: list[tuple[str, str]]) -> int:
+        keys = [(room_id, file_id) for room_id, file_id in keys if file_id.isdigit()]
+        states = await self.service.load_document_states(keys)
+        states_by_file = {
+            int(file_id): (room_id, state) for (room_id, file_id), state in zip(keys, states) if state
+        }
+        if not states_by_file:
+            return 0
+
+        async with db_helper.session_factory() as session:
+            stmt = (
+                select(
+                    FileMetadataModel.id,
+                    FileMetadataModel.storage_key,
+                    FileMetadataModel.content_hash,
+                    RoomModel.human_readable_id,
+                )
+                .join(RoomModel, FileMetadataModel.room_id == RoomModel.id)
+                .where(FileMetadataModel.id.in_(states_by_file))
+            )
+            files = [
+                (file_id, storage_key, content_hash, states_by_file[file_id][1])
+                for file_id, storage_key, content_hash, room_id in (await session.execute(stmt)).all()
+                # Документ, открытый под чужой комнатой, не должен перезаписать файл
+                if states_by_file[file_id][0] == room_id
+            ]
+            written = await asyncio.gather(*(
+                self._write(storage_key, content_hash, state) for _, storage_key, content_hash, state in files
+            ))
+
+            rows = [
+                {"id": file_id, "size_bytes": result[0], "content_hash": result[1]}
+                for (file_id, _, _, _), result in zip(files, written) if result is not None
+            ]
+            if rows:
+                await session.execute(update(FileMetadataModel), rows)
+                await session.commit()
+        return len(rows)
+
+    async def _write(self, storage_key: str, content_hash: str | None, state: bytes) -> tuple[int, str] | None:
+        """
+        Writes a document's text and Y state next to each other.
+
+        Returns:
+            tuple[int, str] | None: The size and hash of the written text, or
+                None if the file was skipped or its content has not changed.
+        """
+        state_key = storage_key + YDOC_STATE_SUFFIX
+        if await self.storage.size(state_key) is None and await self._read_text(storage_key) is None:
+            # Бинарный файл не редактируется как текст: не затираем его
+            logger.warning(f"Skipping persistence of non-text file {storage_key}")
+            return None
+        content = get_document_text(state).encode("utf-8")
+        new_hash = hashlib.sha256(content).hexdigest()
+        await self.storage.put(state_key, state)
+        if new_hash == content_hash:
+            return None
+        await self.storage.put(storage_key, content)
+        return len(content), new_hash
+
+    async def _read_text(self, storage_key: str) -> str | None:
+        try:
+            return (await self.storage.read(storage_key)).decode("utf-8")
+        except (StorageObjectNotFound, UnicodeDecodeError):
+            return None
+
+    async def load_seed(self, room_id: str, file_id: str) -> bytes | None:
+        """
+        Restores the initial state of a document from durable storage.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (str): The ID of the file.
+
+        Returns:
+            bytes | None: The saved Y state, a state seeded from the file's
+                text, or None if the file is unknown or not text.
+        """
+        if not file_id.isdigit():
+            return None
+        async with db_helper.session_factory() as session:
+            stmt = (
+                select(FileMetadataModel.storage_key)
+                .join(RoomModel, FileMetadataModel.room_id == RoomModel.id)
+                .where(FileMetadataModel.id == int(file_id), RoomModel.human_readable_id == room_id)
+            )
+            storage_key = (await session.execute(stmt)).scalar_one_or_none()
+        if storage_key is None:
+            return None
+
+        try:
+            return await self.storage.read(storage_key + YDOC_STATE_SUFFIX)
+        except StorageObjectNotFound:
+            pass
+        content = await self._read_text(storage_key)
+        if not content:
+            return None
+        return create_seed_state(content)
+
+# Один экземпляр на процесс: изменения накапливаются в памяти и сохраняются пакетами
+document_persister = DocumentPersister()
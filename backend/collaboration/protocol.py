@@ -0,0 +1,179 @@
+from pycrdt import (
+    Decoder,
+    Doc,
+    YMessageType,
+    YSyncMessageType,
+    create_awareness_message,
+    create_sync_message,
+    create_update_message,
+    read_message,
+    write_message,
+    write_var_uint,
+)
+
+# Пустое обновление Yjs (нет ни вставок, ни удалений)
+EMPTY_UPDATE = b"\x00\x00"
+
+
+def _read_sync_payload(message: bytes, *sync_types: int) -> bytes | None:
+    """
+    Reads the payload of a sync message if it has one of the given sync types.
+    """
+    if len(message) < 2 or message[0] != YMessageType.SYNC or message[1] not in sync_types:
+        return None
+    try:
+        return read_message(message[2:])
+    except (AssertionError, IndexError, RuntimeError):
+        return None
+
+
+def read_state_vector(message: bytes) -> bytes | None:
+    """
+    Extracts the client's state vector from a SYNC_STEP1 message.
+
+    Args:
+        message (bytes): The raw binary WebSocket frame.
+
+    Returns:
+        bytes | None: The encoded state vector, or None if the frame is not SYNC_STEP1.
+    """
+    return _read_sync_payload(message, YSyncMessageType.SYNC_STEP1)
+
+
+def extract_update(message: bytes) -> bytes | None:
+    """
+    Extracts the document update carried by a Yjs sync message.
+
+    Only SYNC_STEP2 and SYNC_UPDATE messages carry updates; every other
+    message (awareness, SYNC_STEP1, malformed frames) yields None.
+
+    Args:
+        message (bytes): The raw binary WebSocket frame.
+
+    Returns:
+        bytes | None: The encoded Yjs update, or None if the frame has none.
+    """
+    update = _read_sync_payload(message, YSyncMessageType.SYNC_STEP2, YSyncMessageType.SYNC_UPDATE)
+    return update if update != EMPTY_UPDATE else None
+
+
+def create_sync_step1_message(doc: Doc) -> bytes:
+    """
+    Creates the SYNC_STEP1 message announcing the server's state vector.
+
+    The client answers it with a SYNC_STEP2 containing only the edits the
+    server has not seen yet.
+
+    Args:
+        doc (Doc): The server-side document.
+
+    Returns:
+        bytes: The binary message ready to be sent over the WebSocket.
+    """
+    return create_sync_message(doc)
+
+
+def create_sync_step2_message(update: bytes) -> bytes:
+    """
+    Wraps the diff requested by a client's SYNC_STEP1 into a SYNC_STEP2 message.
+
+    Args:
+        update (bytes): The encoded update missing on the client.
+
+    Returns:
+        bytes: The binary message ready to be sent over the WebSocket.
+    """
+    return bytes([YMessageType.SYNC, YSyncMessageType.SYNC_STEP2]) + write_message(update)
+
+
+def create_sync_update_message(update: bytes) -> bytes:
+    """
+    Wraps a document update into a SYNC_UPDATE message for relaying to peers.
+
+    Args:
+        update (bytes): The encoded Yjs update.
+
+    Returns:
+        bytes: The binary message ready to be sent over the WebSocket.
+    """
+    return create_update_message(update)
+
+
+def read_channel(frame: bytes) -> tuple[int, bytes] | None:
+    """
+    Splits a multiplexed frame into its channel ID and the Yjs message.
+
+    Multiplexed frames are prefixed with the channel ID encoded as a varuint.
+
+    Args:
+        frame (bytes): The raw binary WebSocket frame.
+
+    Returns:
+        tuple[int, bytes] | None: The channel ID and the message, or None if the frame is malformed.
+    """
+    decoder = Decoder(frame)
+    try:
+        channel = decoder.read_var_uint()
+    except (IndexError, RuntimeError):
+        return None
+    return channel, frame[decoder.i0:]
+
+
+def create_channel_prefix(channel: int) -> bytes:
+    """
+    Encodes the prefix that tags frames of a multiplexed channel.
+
+    Args:
+        channel (int): The channel ID chosen by the client.
+
+    Returns:
+        bytes: The varuint-encoded channel ID.
+    """
+    return write_var_uint(channel)
+
+
+# Запись awareness: (client_id, clock, состояние в JSON; "null" - клиент ушел)
+AwarenessEntry = tuple[int, int, str]
+
+
+def read_awareness_update(message: bytes) -> list[AwarenessEntry] | None:
+    """
+    Decodes the client states carried by an AWARENESS message.
+
+    Args:
+        message (bytes): The raw binary WebSocket frame.
+
+    Returns:
+        list[AwarenessEntry] | None: The (client_id, clock, state) entries, or None
+            if the frame is not a well-formed awareness message.
+    """
+    if not message or message[0] != YMessageType.AWARENESS:
+        return None
+    try:
+        decoder = Decoder(read_message(message[1:]))
+        entries = []
+        for _ in range(decoder.read_var_uint()):
+            client_id = decoder.read_var_uint()
+            clock = decoder.read_var_uint()
+            entries.append((client_id, clock, decoder.read_var_string()))
+    except (AssertionError, IndexError, RuntimeError, UnicodeDecodeError):
+        return None
+    return entries
+
+
+def create_awareness_update_message(entries: list[AwarenessEntry]) -> bytes:
+    """
+    Encodes client states into a single AWARENESS message.
+
+    Args:
+        entries (list[AwarenessEntry]): The (client_id, clock, state) entries.
+
+    Returns:
+        bytes: The binary message ready to be sent over the WebSocket.
+    """
+    # Encoder.write_var_string из pycrdt пишет длину в символах, а не в байтах,
+    # поэтому строки кодируются вручную
+    parts = [write_var_uint(len(entries))]
+    for client_id, clock, state in entries:
+        parts += [write_var_uint(client_id), write_var_uint(clock), write_message(state.encode())]
+    return create_awareness_message(b"".join(parts))
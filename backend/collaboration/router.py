@@ -1,78 +1,220 @@
-from datetime import datetime, timezone
+import json
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 
-from backend.collaboration.manager import manager
-from backend.collaboration.service import CollaborationService
+from backend.collaboration.manager import Connection, manager
+from backend.collaboration.protocol import create_channel_prefix, read_channel
+from backend.collaboration.session import (
+    close_connection,
+    handle_document_message,
+    join_document,
+    leave_document,
+)
+from backend.config.database.engine import db_helper
+from backend.room.repositories.room import RoomRepository
+from backend.room.service import MAX_FILES_PER_ROOM
+from backend.security.dependencies import get_user_by_id
 from backend.security.service import TokenService
-from backend.user.dependencies.repository import IUserRepository
-from backend.redis_client.client import get_redis_client
+from backend.user.repositories.user import UserRepository
 
 router = APIRouter(tags=["Collaboration"])
 
 
+async def authenticate(websocket: WebSocket, token: str) -> bool:
+    """
+    Verifies the token of a WebSocket client, closing the socket if it is invalid.
+
+    A WebSocket lives far longer than a request, so the user is looked up
+    in a short-lived session instead of one held for the whole connection.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection instance.
+        token (str): The user's JWT access token.
+
+    Returns:
+        bool: True if the user is authenticated.
+    """
+    payload = TokenService.verify_token(token)
+    if not payload or not payload.sub:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+
+    try:
+        user_id = int(payload.sub)
+        # Проверяем, что пользователь существует (через кэш)
+        async with db_helper.session_factory() as session:
+            await get_user_by_id(user_id, UserRepository(session))
+    except (ValueError, Exception):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return False
+    return True
+
+
+async def _get_file_ids(room_id: str) -> set[int] | None:
+    """
+    Retrieves the file IDs of a room in a short-lived session.
+
+    Args:
+        room_id (str): The human-readable ID of the room.
+
+    Returns:
+        set[int] | None: The file IDs, or None if the room does not exist.
+    """
+    async with db_helper.session_factory() as session:
+        return await RoomRepository(session).get_file_ids(room_id)
+
+
 @router.websocket("/ws/{room_id}/{file_id}")
 async def websocket_endpoint(
         websocket: WebSocket,
         room_id: str,
         file_id: str,
         token: str,
-        user_repo: IUserRepository
 ):
     """
     Handles WebSocket connections for real-time collaboration on a specific file.
 
     Authenticates the user via a token in the query params, connects them to the
-    room, sends the initial document state, and then relays all CRDT updates
-    between clients in the same room.
+    room and runs the Yjs sync handshake: the server announces its state vector
+    (sync step 1) and answers the client's state vector with only the missing
+    diff (sync step 2). Afterwards every CRDT update is merged into the
+    server-side document before being relayed to the other clients.
 
     Args:
         websocket (WebSocket): The WebSocket connection instance.
         room_id (str): The human-readable ID of the room.
         file_id (str): The ID of the file being edited.
         token (str): The user's JWT access token for authentication.
-        user_repo (UserRepository): Dependency to fetch user data.
     """
     # 1. Аутентификация пользователя
-    payload = TokenService.verify_token(token)
-    if not payload or not payload.sub:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    if not await authenticate(websocket, token):
         return
 
+    # 2. Подключение и синхронизация документа
+    connection = await manager.connect(websocket)
     try:
-        user_id = int(payload.sub)
-        await user_repo.get(user_id)  # Проверяем, что пользователь существует
-    except (ValueError, Exception):
+        await join_document(connection, room_id, file_id)
+        while True:
+            data = await websocket.receive_bytes()
+            await handle_document_message(connection, room_id, file_id, data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Клиенты соединения удаляются из awareness остальных участников
+        await close_connection(connection)
+
+
+@router.websocket("/ws/{room_id}")
+async def room_websocket_endpoint(
+        websocket: WebSocket,
+        room_id: str,
+        token: str,
+):
+    """
+    Handles a multiplexed WebSocket connection for editing many files of a room.
+
+    Text frames carry JSON control messages:
+    `{"type": "subscribe", "channel": <int>, "file_id": "<id>"}` opens a file on
+    a client-chosen channel and `{"type": "unsubscribe", "channel": <int>}`
+    closes it; the server acknowledges with "subscribed"/"unsubscribed" or
+    replies with "error". Binary frames in both directions are the usual Yjs
+    messages prefixed with the channel ID encoded as a varuint.
+
+    Authentication and the room lookup happen once per connection instead
+    of once per open file. Each lookup uses its own short-lived database
+    session, so an open connection never holds a pooled connection.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection instance.
+        room_id (str): The human-readable ID of the room.
+        token (str): The user's JWT access token for authentication.
+    """
+    if not await authenticate(websocket, token):
+        return
+
+    file_ids = await _get_file_ids(room_id)
+    if file_ids is None:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    # 2. Подключение
-    # Мы используем составной ID для комнаты в менеджере, чтобы различать файлы
-    connection_room_id = f"{room_id}/{file_id}"
-    await manager.connect(websocket, connection_room_id)
+    connection = await manager.connect(websocket)
+    # Открытые каналы этого соединения: channel -> file_id
+    channels: dict[int, str] = {}
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
 
-    collab_service = CollaborationService()
+            if message.get("bytes") is not None:
+                frame = read_channel(message["bytes"])
+                if frame is None or frame[0] not in channels:
+                    continue
+                channel, data = frame
+                await handle_document_message(connection, room_id, channels[channel], data)
+            elif message.get("text") is not None:
+                file_ids = await _handle_control_message(
+                    connection, room_id, message["text"], channels, file_ids
+                )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await close_connection(connection)
 
-    # 3. Отправка начального состояния документа
-    initial_state = await collab_service.get_document_state(room_id, file_id)
-    if initial_state:
-        # Y-Py протокол: сообщение с типом 0 означает синхронизацию/загрузку документа
-        sync_message = b'\x00\x00' + initial_state
-        await websocket.send_bytes(sync_message)
 
-    redis_client = get_redis_client()
-    activity_key = f"activity:{room_id}"
+async def _handle_control_message(
+        connection: Connection,
+        room_id: str,
+        text: str,
+        channels: dict[int, str],
+        file_ids: set[int],
+) -> set[int]:
+    """
+    Processes a subscribe/unsubscribe control message of a multiplexed connection.
+
+    Returns:
+        set[int]: The known file IDs of the room, refreshed if a new file was requested.
+    """
+    def reply(message_type: str, channel, **extra):
+        connection.send(json.dumps({"type": message_type, "channel": channel, **extra}))
 
     try:
-        while True:
-            data = await websocket.receive_bytes()
+        control = json.loads(text)
+        message_type = control["type"]
+        channel = control["channel"]
+    except (ValueError, KeyError, TypeError):
+        reply("error", None, detail="Malformed control message.")
+        return file_ids
 
-            # Обновляем метку активности при каждом сообщении
-            await redis_client.set(activity_key, datetime.now(timezone.utc).isoformat())
+    if not isinstance(channel, int) or channel < 0:
+        reply("error", channel, detail="Channel must be a non-negative integer.")
+        return file_ids
 
-            await collab_service.save_document_state(room_id, file_id, data)
-            await manager.broadcast(data, connection_room_id, websocket)
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, connection_room_id)
-        # Здесь можно добавить логику для обновления состояния "awareness"
-        # Например, broadcast(awareness_update_message, ...)
\ No newline at end of file
+    if message_type == "subscribe":
+        file_id = str(control.get("file_id", ""))
+        if channel in channels:
+            reply("error", channel, detail="Channel is already in use.")
+            return file_ids
+        if file_id in channels.values():
+            reply("error", channel, detail="The file is already open on another channel.")
+            return file_ids
+        if len(channels) >= MAX_FILES_PER_ROOM:
+            reply("error", channel, detail=f"At most {MAX_FILES_PER_ROOM} files can be open at once.")
+            return file_ids
+        if not file_id.isdigit() or int(file_id) not in file_ids:
+            # Файл мог быть загружен после подключения - перечитываем список
+            file_ids = await _get_file_ids(room_id) or set()
+            if not file_id.isdigit() or int(file_id) not in file_ids:
+                reply("error", channel, detail="The file does not exist in this room.")
+                return file_ids
+        channels[channel] = file_id
+        reply("subscribed", channel, file_id=file_id)
+        await join_document(connection, room_id, file_id, create_channel_prefix(channel))
+    elif message_type == "unsubscribe":
+        file_id = channels.pop(channel, None)
+        if file_id is not None:
+            await leave_document(connection, room_id, file_id)
+        reply("unsubscribed", channel)
+    else:
+        reply("error", channel, detail=f"Unknown control message type '{message_type}'.")
+    return file_ids
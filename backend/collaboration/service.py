@@ -1,23 +1,57 @@
+import logging
+import time
+import uuid
+
+from pycrdt import merge_updates
 from redis.asyncio import Redis
+
+from backend.config.collaboration import collaboration_settings
 from backend.redis_client.client import get_redis_client
 
 # Ключи для хранения данных в Redis
-# Y-Py документы для каждого файла
+# Сжатое (merged) состояние Y-документа для каждого файла
 YDOC_KEY = "ydoc:{room_id}:{file_id}"
-# Состояние присутствия (курсоры, имена) для комнаты
-AWARENESS_KEY = "awareness:{room_id}"
+# Лог инкрементальных обновлений, еще не слитых в состояние
+YDOC_UPDATES_KEY = "ydoc:{room_id}:{file_id}:updates"
+# Блокировка, чтобы один документ сжимал только один процесс
+YDOC_COMPACT_LOCK_KEY = "ydoc:{room_id}:{file_id}:compact"
+# Sorted set документов с несжатым логом: member "room_id:file_id", score - время первой записи
+YDOC_PENDING_KEY = "ydoc:pending"
+
+# Снимает блокировку сжатия, только если она все еще принадлежит нам
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+logger = logging.getLogger(__name__)
+
 
 class CollaborationService:
     """
     Service to manage the persistence of CRDT data in Redis.
+
+    Every document is stored as a compacted state plus an append-only log of
+    incremental updates. Appending is a constant-size write per update; the
+    log is periodically merged into the state by `compact_document`.
     """
     def __init__(self):
         """Initializes the service with a Redis client."""
         self.redis: Redis = get_redis_client()
+        self._release_lock = self.redis.register_script(_RELEASE_LOCK_SCRIPT)
+
+    @staticmethod
+    def _pending_member(room_id: str, file_id: str) -> str:
+        return f"{room_id}:{file_id}"
 
     async def get_document_state(self, room_id: str, file_id: str) -> bytes | None:
         """
-        Retrieves the latest state of a CRDT document from Redis.
+        Retrieves the compacted state of a CRDT document from Redis.
+
+        The result does not include updates that are still in the log; use
+        `load_document_state` to get the complete document.
 
         Args:
             room_id (str): The ID of the room.
@@ -29,17 +63,162 @@ class CollaborationService:
         key = YDOC_KEY.format(room_id=room_id, file_id=file_id)
         return await self.redis.get(key)
 
-    async def save_document_state(self, room_id: str, file_id: str, data: bytes):
+    async def load_document_state(self, room_id: str, file_id: str) -> bytes | None:
         """
-        Saves the state of a CRDT document to Redis.
+        Loads the compacted document state merged with all logged updates.
+
+        Applying an update twice is a no-op for a CRDT, so merging the log on
+        top of the stored state is always safe.
 
         Args:
             room_id (str): The ID of the room.
             file_id (str): The ID of the file.
-            data (bytes): The binary document state to save.
+
+        Returns:
+            bytes | None: The merged document state, or None if nothing is stored.
         """
-        key = YDOC_KEY.format(room_id=room_id, file_id=file_id)
-        await self.redis.set(key, data)
+        states = await self.load_document_states([(room_id, file_id)])
+        return states[0]
+
+    async def load_document_states(self, keys: list[tuple[str, str]]) -> list[bytes | None]:
+        """
+        Loads the merged states of several documents in a single round trip.
+
+        Each state and its log are read in one MULTI/EXEC transaction: a
+        compaction committing in between would otherwise pair the old state
+        with an already trimmed log and lose the trimmed updates.
+
+        Args:
+            keys (list[tuple[str, str]]): (room_id, file_id) pairs of the documents.
+
+        Returns:
+            list[bytes | None]: The merged state of each document in the order
+                of `keys`, or None for documents with nothing stored.
+        """
+        if not keys:
+            return []
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for room_id, file_id in keys:
+                pipe.get(YDOC_KEY.format(room_id=room_id, file_id=file_id))
+                pipe.lrange(YDOC_UPDATES_KEY.format(room_id=room_id, file_id=file_id), 0, -1)
+            results = await pipe.execute()
+
+        states = []
+        for state, updates in zip(results[::2], results[1::2]):
+            parts = ([state] if state else []) + list(updates)
+            states.append(merge_updates(*parts) if parts else None)
+        return states
+
+    async def seed_document_state(self, room_id: str, file_id: str, state: bytes) -> bytes | None:
+        """
+        Stores an initial state for a document that has nothing in Redis.
+
+        The state is only written if no other process has seeded the document
+        first; either way the resulting merged state is returned.
+
+        Args:
+            room_id (str): The ID of the room.
+            file_id (str): The ID of the file.
+            state (bytes): The encoded document state restored from durable storage.
+
+        Returns:
+            bytes | None: The merged document state after seeding.
+        """
+        await self.redis.set(YDOC_KEY.format(room_id=room_id, file_id=file_id), state, nx=True)
+        return await self.load_document_state(room_id, file_id)
+
+    async def append_update(self, room_id: str, file_id: str, update: bytes) -> int:
+        """
+        Appends an incremental update to the document's log.
+
+        The document is also registered in the pending set (keeping the time
+        of its oldest uncompacted update) so the compactor can find it.
+
+        Args:
+            room_id (str): The ID of the room.
+            file_id (str): The ID of the file.
+            update (bytes): The encoded Yjs update.
+
+        Returns:
+            int: The length of the log after the append.
+        """
+        log_key = YDOC_UPDATES_KEY.format(room_id=room_id, file_id=file_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(log_key, update)
+            pipe.zadd(YDOC_PENDING_KEY, {self._pending_member(room_id, file_id): time.time()}, nx=True)
+            length, _ = await pipe.execute()
+        return length
+
+    async def compact_document(self, room_id: str, file_id: str) -> bool:
+        """
+        Merges the document's update log into its compacted state.
+
+        Only the entries read at the start are merged and trimmed, so updates
+        appended concurrently are kept for the next compaction. A short-lived
+        Redis lock prevents two processes from trimming the same log at once;
+        it holds a random token, so a compaction that outlives the lock never
+        releases the lock of the process that took it over.
+
+        Args:
+            room_id (str): The ID of the room.
+            file_id (str): The ID of the file.
+
+        Returns:
+            bool: True if the log was compacted, False if another process holds the lock.
+        """
+        lock_key = YDOC_COMPACT_LOCK_KEY.format(room_id=room_id, file_id=file_id)
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(
+            lock_key, token, nx=True, ex=collaboration_settings.YDOC_COMPACT_LOCK_SECONDS
+        )
+        if not acquired:
+            return False
+
+        state_key = YDOC_KEY.format(room_id=room_id, file_id=file_id)
+        log_key = YDOC_UPDATES_KEY.format(room_id=room_id, file_id=file_id)
+        member = self._pending_member(room_id, file_id)
+        try:
+            # Состояние и лог читаются атомарно, как и записываются ниже
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.get(state_key)
+                pipe.lrange(log_key, 0, -1)
+                state, updates = await pipe.execute()
+
+            if updates:
+                merged = merge_updates(*(([state] if state else []) + list(updates)))
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.set(state_key, merged)
+                    pipe.ltrim(log_key, len(updates), -1)
+                    pipe.llen(log_key)
+                    _, _, remaining = await pipe.execute()
+            else:
+                remaining = 0
+
+            if remaining:
+                # Остались записи, добавленные во время сжатия: отсчитываем их возраст заново
+                await self.redis.zadd(YDOC_PENDING_KEY, {member: time.time()})
+            else:
+                await self.redis.zrem(YDOC_PENDING_KEY, member)
+            return True
+        finally:
+            await self._release_lock(keys=[lock_key], args=[token])
+
+    async def compact_stale_documents(self) -> int:
+        """
+        Compacts every document whose oldest uncompacted update exceeds the age threshold.
+
+        Returns:
+            int: The number of documents that were compacted.
+        """
+        threshold = time.time() - collaboration_settings.YDOC_COMPACT_MAX_AGE_SECONDS
+        members = await self.redis.zrangebyscore(YDOC_PENDING_KEY, "-inf", threshold)
 
-    # Методы для awareness можно добавить здесь по аналогии, если потребуется
-    # более сложная логика, чем просто ретрансляция.
\ No newline at end of file
+        compacted = 0
+        for member in members:
+            room_id, file_id = member.decode().rsplit(":", 1)
+            try:
+                if await self.compact_document(room_id, file_id):
+                    compacted += 1
+            except Exception as e:
+                logger.error(f"Failed to compact document {room_id}/{file_id}: {e}")
+        return compacted
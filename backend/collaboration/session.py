@@ -0,0 +1,148 @@
+import logging
+
+from pycrdt import YMessageType
+
+from backend.collaboration.activity import activity_tracker
+from backend.collaboration.awareness import awareness_manager
+from backend.collaboration.batching import update_batcher
+from backend.collaboration.documents import DocumentKey, document_manager
+from backend.collaboration.manager import Connection, manager
+from backend.collaboration.protocol import (
+    create_sync_step1_message,
+    create_sync_step2_message,
+    extract_update,
+    read_state_vector,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def join_document(connection: Connection, room_id: str, file_id: str, prefix: bytes = b""):
+    """
+    Joins a connection to a document and starts the Yjs sync handshake.
+
+    The server announces its state vector (sync step 1); the client answers
+    with only the edits the server has not seen yet. The presence of the
+    other clients is sent right after.
+
+    The connection joins the document's broadcast channel before the
+    document is loaded, so no update of another process falls between the
+    two: it is either already stored in Redis or relayed afterwards.
+
+    Args:
+        connection (Connection): The client connection.
+        room_id (str): The human-readable ID of the room.
+        file_id (str): The ID of the file.
+        prefix (bytes): The channel prefix for this document's frames on the connection.
+    """
+    key: DocumentKey = (room_id, file_id)
+    await manager.join(connection, key, prefix)
+    try:
+        doc = await document_manager.acquire(room_id, file_id)
+    except Exception:
+        await manager.leave(connection, key)
+        raise
+    connection.send(create_sync_step1_message(doc), key)
+    awareness = awareness_manager.get_states_message(key)
+    if awareness is not None:
+        connection.send(awareness, key)
+
+
+async def leave_document(connection: Connection, room_id: str, file_id: str):
+    """
+    Removes a connection from a document and announces that its clients left.
+
+    Args:
+        connection (Connection): The client connection.
+        room_id (str): The human-readable ID of the room.
+        file_id (str): The ID of the file.
+    """
+    key: DocumentKey = (room_id, file_id)
+    if key not in connection.channels:
+        return
+    await awareness_manager.leave(connection, key)
+    await manager.leave(connection, key)
+    document_manager.release(room_id, file_id)
+
+
+async def close_connection(connection: Connection):
+    """
+    Leaves every document a connection has joined and closes it.
+
+    Args:
+        connection (Connection): The client connection.
+    """
+    for room_id, file_id in list(connection.channels):
+        await leave_document(connection, room_id, file_id)
+    await manager.disconnect(connection)
+
+
+async def handle_document_message(connection: Connection, room_id: str, file_id: str, data: bytes):
+    """
+    Processes one Yjs message received from a client for a document.
+
+    A SYNC_STEP1 is answered with only the diff missing from the client's
+    state vector. Updates are merged into the server-side document and
+    relayed to the other clients, batched per document when a flush window
+    is configured; a malformed update is dropped without being relayed. Awareness goes through the in-memory,
+    rate-limited awareness manager and is never stored; any other message
+    is relayed as is.
+
+    Args:
+        connection (Connection): The client connection that sent the message.
+        room_id (str): The human-readable ID of the room.
+        file_id (str): The ID of the file.
+        data (bytes): The Yjs message without any channel prefix.
+    """
+    key: DocumentKey = (room_id, file_id)
+
+    # Sync step 1 от клиента: отвечаем только недостающим diff, а не всем документом
+    state_vector = read_state_vector(data)
+    if state_vector is not None:
+        try:
+            missing = await document_manager.get_missing_update(room_id, file_id, state_vector)
+        except ValueError:
+            return
+        connection.send(create_sync_step2_message(missing), key)
+        return
+
+    # Отметка активности пишется в память и сбрасывается в Redis пачками
+    activity_tracker.touch(room_id)
+
+    if data[:1] == bytes([YMessageType.AWARENESS]):
+        await awareness_manager.handle(connection, key, data)
+        return
+
+    update = extract_update(data)
+    if update is not None:
+        try:
+            await document_manager.apply_update(room_id, file_id, update)
+        except ValueError as e:
+            logger.warning(f"Dropping update from a client for {room_id}/{file_id}: {e}")
+            return
+        # Sync step 2 от клиента ретранслируется остальным как обычное обновление,
+        # при включенном окне - склеенным с соседними обновлениями
+        await update_batcher.add(key, update, connection)
+        return
+    await manager.broadcast(data, key, connection)
+
+
+async def apply_remote_update(key: DocumentKey, message: bytes):
+    """
+    Merges an update relayed from another worker into this worker's copy of the document.
+
+    Relayed awareness is recorded so that clients joining here see remote presence.
+
+    Args:
+        key (DocumentKey): The (room_id, file_id) of the document.
+        message (bytes): The relayed binary message.
+    """
+    if message[:1] == bytes([YMessageType.AWARENESS]):
+        awareness_manager.apply_remote(key, message)
+        return
+    update = extract_update(message)
+    if update is not None:
+        room_id, file_id = key
+        document_manager.merge_remote_update(room_id, file_id, update)
+
+manager.add_remote_handler(apply_remote_update)
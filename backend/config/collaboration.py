@@ -0,0 +1,41 @@
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class CollaborationSettings(BaseSettings):
+    """
+    Configuration for real-time collaboration, read from environment variables.
+    """
+    # Лог обновлений сжимается, когда в нем накопилось столько записей...
+    YDOC_COMPACT_MAX_UPDATES: int = Field(200, alias="YDOC_COMPACT_MAX_UPDATES")
+    # ...или когда самая старая несжатая запись старше этого возраста
+    YDOC_COMPACT_MAX_AGE_SECONDS: int = Field(60, alias="YDOC_COMPACT_MAX_AGE_SECONDS")
+    YDOC_COMPACT_INTERVAL_SECONDS: int = Field(15, alias="YDOC_COMPACT_INTERVAL_SECONDS")
+    YDOC_COMPACT_LOCK_SECONDS: int = Field(30, alias="YDOC_COMPACT_LOCK_SECONDS")
+    # Максимум исходящих сообщений в очереди одного WebSocket; при переполнении клиент отключается
+    WS_SEND_QUEUE_SIZE: int = Field(256, alias="WS_SEND_QUEUE_SIZE")
+    # "memory" - один воркер; "redis" - рассылка между воркерами и узлами через Redis pub/sub
+    BROADCAST_BACKEND: Literal["memory", "redis"] = Field("memory", alias="BROADCAST_BACKEND")
+    # Как часто активность комнат сбрасывается из памяти в Redis
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: int = Field(10, alias="ACTIVITY_FLUSH_INTERVAL_SECONDS")
+    # Не больше K рассылок awareness (курсоры, выделения) в секунду от одного клиента
+    AWARENESS_MAX_BROADCASTS_PER_SECOND: float = Field(10, alias="AWARENESS_MAX_BROADCASTS_PER_SECOND")
+    # Состояния клиентов других воркеров без обновлений дольше этого считаются устаревшими
+    AWARENESS_TIMEOUT_SECONDS: int = Field(30, alias="AWARENESS_TIMEOUT_SECONDS")
+    # Окно склейки исходящих обновлений документа в один кадр (мс); 0 - отправлять сразу
+    BROADCAST_FLUSH_WINDOW_MS: int = Field(0, alias="BROADCAST_FLUSH_WINDOW_MS")
+    # Документ без подключений выгружается из памяти после этого времени простоя
+    YDOC_IDLE_TIMEOUT_SECONDS: int = Field(300, alias="YDOC_IDLE_TIMEOUT_SECONDS")
+    # Общий бюджет памяти документов воркера; при превышении выгружаются давно не используемые
+    YDOC_MEMORY_BUDGET_MB: int = Field(256, alias="YDOC_MEMORY_BUDGET_MB")
+    YDOC_EVICTION_INTERVAL_SECONDS: int = Field(30, alias="YDOC_EVICTION_INTERVAL_SECONDS")
+    # Имя общего текстового поля Y-документа, содержимое которого сохраняется в файл
+    YDOC_TEXT_FIELD: str = Field("content", alias="YDOC_TEXT_FIELD")
+    # Как часто измененные документы сохраняются на диск
+    YDOC_PERSIST_INTERVAL_SECONDS: int = Field(30, alias="YDOC_PERSIST_INTERVAL_SECONDS")
+    # Задержка сохранения после отключения последнего клиента, чтобы объединить соседние отключения
+    YDOC_PERSIST_DEBOUNCE_SECONDS: float = Field(2, alias="YDOC_PERSIST_DEBOUNCE_SECONDS")
+
+collaboration_settings = CollaborationSettings()
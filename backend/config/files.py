@@ -0,0 +1,18 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class FileSettings(BaseSettings):
+    """
+    Configuration for file uploads and archive imports.
+    """
+    # Сколько незавершенная загрузка хранится с момента последнего фрагмента
+    UPLOAD_TTL_SECONDS: int = Field(86400, alias="UPLOAD_TTL_SECONDS")  # 1 день
+    # Максимальное время записи одного фрагмента; после него блокировка загрузки снимается
+    UPLOAD_CHUNK_LOCK_SECONDS: int = Field(300, alias="UPLOAD_CHUNK_LOCK_SECONDS")
+    # Потоки, в которых распаковываются импортируемые архивы
+    IMPORT_WORKERS: int = Field(4, alias="IMPORT_WORKERS")
+    # Сколько распаковок может ждать свободного потока; сверх этого - 503
+    IMPORT_MAX_PENDING: int = Field(16, alias="IMPORT_MAX_PENDING")
+
+file_settings = FileSettings()
@@ -10,5 +10,14 @@ class AuthConfig(BaseSettings):
     ALGORITHM: str = Field("HS256", alias="HASH_ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(7, alias="REFRESH_TOKEN_EXPIRE_DAYS")
+    # Пул потоков для bcrypt: число потоков и сколько вызовов может ждать в очереди
+    PASSWORD_HASH_WORKERS: int = Field(4, alias="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(64, alias="PASSWORD_HASH_QUEUE_SIZE")
+    # Кэш аутентифицированных пользователей: локальный уровень и Redis
+    USER_CACHE_SIZE: int = Field(10_000, alias="USER_CACHE_SIZE")
+    USER_CACHE_LOCAL_TTL_SECONDS: int = Field(30, alias="USER_CACHE_LOCAL_TTL_SECONDS")
+    USER_CACHE_REDIS_TTL_SECONDS: int = Field(300, alias="USER_CACHE_REDIS_TTL_SECONDS")
+    # Сколько проверенных JWT держать в памяти (каждый - до истечения его exp)
+    TOKEN_CACHE_SIZE: int = Field(10_000, alias="TOKEN_CACHE_SIZE")
 
 auth_config = AuthConfig()
\ No newline at end of file
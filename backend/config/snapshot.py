@@ -0,0 +1,20 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class SnapshotSettings(BaseSettings):
+    """
+    Configuration for building room snapshots.
+    """
+    # Потоки, в которых собираются архивы снимков
+    SNAPSHOT_WORKERS: int = Field(2, alias="SNAPSHOT_WORKERS")
+    # Сколько задач снимков может выполняться и ждать в одном процессе; сверх этого - 503
+    SNAPSHOT_MAX_PENDING_JOBS: int = Field(16, alias="SNAPSHOT_MAX_PENDING_JOBS")
+    # Уровень сжатия zlib: 0 - без сжатия, 9 - максимальное
+    SNAPSHOT_COMPRESSION_LEVEL: int = Field(6, ge=0, le=9, alias="SNAPSHOT_COMPRESSION_LEVEL")
+    # Сколько хранится статус завершенной задачи
+    SNAPSHOT_JOB_TTL_SECONDS: int = Field(3600, alias="SNAPSHOT_JOB_TTL_SECONDS")
+    # Через сколько после последнего скачивания собранный архив снимка удаляется из хранилища
+    SNAPSHOT_ARCHIVE_TTL_SECONDS: int = Field(86400, alias="SNAPSHOT_ARCHIVE_TTL_SECONDS")
+
+snapshot_settings = SnapshotSettings()
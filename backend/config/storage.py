@@ -0,0 +1,26 @@
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class StorageSettings(BaseSettings):
+    """
+    Configuration for the storage of files, blobs and snapshot archives.
+    """
+    # Где хранятся данные: "local" - локальный диск, "s3" - S3-совместимое хранилище (нужен aiobotocore)
+    STORAGE_BACKEND: Literal["local", "s3"] = Field("local", alias="STORAGE_BACKEND")
+    # Корневой каталог локального хранилища
+    STORAGE_LOCAL_ROOT: str = Field("./storage", alias="STORAGE_LOCAL_ROOT")
+    # Потоки для копирования и массового удаления файлов локального хранилища
+    STORAGE_LOCAL_WORKERS: int = Field(8, alias="STORAGE_LOCAL_WORKERS")
+    S3_BUCKET: str = Field("loom", alias="S3_BUCKET")
+    # Адрес S3-совместимого сервера, например http://minio:9000; пусто - AWS S3
+    S3_ENDPOINT_URL: str | None = Field(None, alias="S3_ENDPOINT_URL")
+    S3_REGION: str = Field("us-east-1", alias="S3_REGION")
+    S3_ACCESS_KEY_ID: str | None = Field(None, alias="S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY: str | None = Field(None, alias="S3_SECRET_ACCESS_KEY")
+    # Размер части multipart-загрузки; S3 требует не меньше 5 МБ для всех частей, кроме последней
+    S3_MULTIPART_PART_SIZE_MB: int = Field(8, ge=5, alias="S3_MULTIPART_PART_SIZE_MB")
+
+storage_settings = StorageSettings()
@@ -10,5 +10,9 @@ class TaskSettings(BaseSettings):
     CLEANUP_INTERVAL_SECONDS: int = Field(3600, alias="CLEANUP_INTERVAL_SECONDS")  # 1 час
     ROOM_LIFETIME_DAYS: int = Field(7, alias="ROOM_LIFETIME_DAYS")
     ROOM_INACTIVITY_HOURS: int = Field(3, alias="ROOM_INACTIVITY_HOURS")
+    # Сколько комнат удаляется в одной транзакции
+    CLEANUP_BATCH_SIZE: int = Field(500, alias="CLEANUP_BATCH_SIZE")
+    # Время жизни блокировки лидера периодической задачи без продления
+    JOB_LEASE_SECONDS: int = Field(30, alias="JOB_LEASE_SECONDS")
 
 task_settings = TaskSettings()
\ No newline at end of file
@@ -0,0 +1,6 @@
+from fastapi import Depends
+from typing import Annotated
+
+from backend.file.service import UploadService
+
+IUploadService = Annotated[UploadService, Depends()]
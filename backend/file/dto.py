@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class FileMetadataDTO(BaseModel):
     """
@@ -9,4 +9,24 @@ class FileMetadataDTO(BaseModel):
     size_bytes: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UploadCreateDTO(BaseModel):
+    """
+    Data Transfer Object for starting a chunked upload.
+    """
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(ge=0)
+
+
+class UploadDTO(BaseModel):
+    """
+    Data Transfer Object for the progress of a chunked upload.
+
+    `offset` is the number of bytes received so far; the next chunk must start there.
+    """
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
@@ -0,0 +1,9 @@
+from backend.libs.exceptions import NotFound
+
+class UploadNotFound(NotFound):
+    """Raised when an upload does not exist or has expired."""
+    pass
+
+class UploadConflict(Exception):
+    """Raised when a chunk does not continue an upload or an upload is finalized before it is complete."""
+    pass
@@ -9,16 +9,18 @@ class FileMetadataModel(Base):
 
     Attributes:
         original_name (Mapped[str]): The original name of the file as uploaded by the user.
-        disk_path (Mapped[str]): The path to the file on the server's local storage.
+        storage_key (Mapped[str]): The key of the file's content in the storage backend.
         size_bytes (Mapped[int]): The size of the file in bytes.
+        content_hash (Mapped[str | None]): The hex SHA-256 digest of the file's current content.
         room_id (Mapped[int]): The ID of the room this file belongs to.
         room (Mapped["RoomModel"]): Relationship to the parent room.
     """
     __tablename__ = "file_metadata"
 
     original_name: Mapped[str] = mapped_column(String(255), nullable=False)
-    disk_path: Mapped[str] = mapped_column(String(512), nullable=False, unique=True)
+    storage_key: Mapped[str] = mapped_column(String(512), nullable=False, unique=True)
     size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
-    room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"))
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"), index=True)
 
     room: Mapped["RoomModel"] = relationship(back_populates="files")
\ No newline at end of file
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Query, Request, status
+
+from backend.file.dependencies.service import IUploadService
+from backend.file.dto import FileMetadataDTO, UploadCreateDTO, UploadDTO
+from backend.security.dependencies import ICurrentUser
+
+router = APIRouter(prefix="/rooms/{room_id}/uploads", tags=["Uploads"])
+
+@router.post("/", response_model=UploadDTO, status_code=status.HTTP_201_CREATED)
+async def create_upload(room_id: str, data: UploadCreateDTO, current_user: ICurrentUser, service: IUploadService):
+    return await service.create_upload(room_id, data, current_user)
+
+@router.get("/{upload_id}", response_model=UploadDTO)
+async def get_upload(room_id: str, upload_id: str, current_user: ICurrentUser, service: IUploadService):
+    return await service.get_upload(room_id, upload_id, current_user)
+
+@router.put("/{upload_id}", response_model=UploadDTO)
+async def upload_chunk(room_id: str, upload_id: str, request: Request, current_user: ICurrentUser,
+                       service: IUploadService, offset: int = Query(ge=0)):
+    # Тело читается потоком: фрагмент не буферизуется в памяти или во временном файле
+    length = request.headers.get("content-length")
+    return await service.write_chunk(
+        room_id, upload_id, offset, request.stream(), current_user, int(length) if length else None
+    )
+
+@router.post("/{upload_id}/complete", response_model=FileMetadataDTO, status_code=status.HTTP_201_CREATED)
+async def complete_upload(room_id: str, upload_id: str, current_user: ICurrentUser, service: IUploadService):
+    return await service.complete_upload(room_id, upload_id, current_user)
@@ -0,0 +1,285 @@
+import hashlib
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from redis.asyncio import Redis
+
+from backend.config.files import file_settings
+from backend.file.dto import FileMetadataDTO, UploadCreateDTO, UploadDTO
+from backend.file.exceptions import UploadConflict, UploadNotFound
+from backend.file.models.file_metadata import FileMetadataModel
+from backend.redis_client.client import get_redis_client
+from backend.room.dependencies.repository import IRoomRepository
+from backend.room.exceptions import FileLimitExceeded, FileSizeExceeded, RoomNotFound
+from backend.room.service import MAX_FILE_SIZE_MB, MAX_FILES_PER_ROOM
+from backend.storage.client import get_storage
+from backend.storage.keys import new_file_key, upload_part_key
+from backend.user.dto import UserDTO
+
+# Состояние незавершенной загрузки (hash): room_id, user_id, filename, size, offset
+UPLOAD_KEY = "upload:{upload_id}"
+# Блокировка, чтобы фрагменты одной загрузки не записывались одновременно
+UPLOAD_LOCK_KEY = "upload:{upload_id}:lock"
+# Смещения принятых фрагментов загрузки (sorted set, score = смещение);
+# каждый фрагмент хранится отдельным объектом upload_part_key(upload_id, offset)
+UPLOAD_PARTS_KEY = "upload:{upload_id}:parts"
+# Незавершенные загрузки (sorted set, score = время последнего фрагмента)
+UPLOADS_ACTIVE_KEY = "uploads:active"
+
+
+class UploadService:
+    """
+    Service layer for resumable chunked uploads.
+
+    An upload is created with its final size, then filled with chunks sent
+    at explicit offsets and finally turned into a room file. Each chunk is
+    streamed straight from the request into its own storage object, with
+    the size limit enforced as bytes arrive. On completion the chunks are
+    concatenated into the room file and the SHA-256 of the content is
+    computed along the way. The upload's progress lives in Redis, so an
+    interrupted upload is resumed from the last received byte on any worker.
+    """
+    def __init__(self, room_repo: IRoomRepository):
+        self.room_repo = room_repo
+        self.redis: Redis = get_redis_client()
+        self.storage = get_storage()
+
+    async def create_upload(self, room_id: str, data: UploadCreateDTO, current_user: UserDTO) -> UploadDTO:
+        """
+        Starts a chunked upload of a file into a room.
+
+        Args:
+            room_id (str): The human-readable ID of the target room.
+            data (UploadCreateDTO): The name and final size of the file.
+            current_user (UserDTO): The authenticated user uploading the file.
+
+        Returns:
+            UploadDTO: The new upload, expecting its first chunk at offset 0.
+
+        Raises:
+            RoomNotFound: If the room with the given ID does not exist.
+            FileLimitExceeded: If the room already contains the maximum number of files.
+            FileSizeExceeded: If the declared size is larger than the allowed limit.
+        """
+        room = await self.room_repo.get_owner_and_file_count(room_id)
+        if not room:
+            raise RoomNotFound("The specified room does not exist.")
+        _, owner_id, file_count = room
+
+        if owner_id != current_user.id:
+            raise PermissionError("You do not have permission to modify this room.")
+
+        if file_count >= MAX_FILES_PER_ROOM:
+            raise FileLimitExceeded(f"Room has reached the limit of {MAX_FILES_PER_ROOM} files.")
+
+        if data.size > MAX_FILE_SIZE_MB * 1024 * 1024:
+            raise FileSizeExceeded(f"File size exceeds the limit of {MAX_FILE_SIZE_MB} MB.")
+
+        upload_id = uuid.uuid4().hex
+        await self._save_state(upload_id, {
+            "room_id": room_id,
+            "user_id": current_user.id,
+            "filename": data.filename,
+            "size": data.size,
+            "offset": 0,
+        })
+        return UploadDTO(upload_id=upload_id, filename=data.filename, size=data.size, offset=0)
+
+    async def get_upload(self, room_id: str, upload_id: str, current_user: UserDTO) -> UploadDTO:
+        """
+        Returns the progress of an upload, e.g. to find where to resume it.
+
+        Raises:
+            UploadNotFound: If the upload does not exist, has expired or is not the user's.
+        """
+        state = await self._get_state(room_id, upload_id, current_user)
+        return self._to_dto(upload_id, state)
+
+    async def write_chunk(self, room_id: str, upload_id: str, offset: int, chunks: AsyncIterator[bytes],
+                          current_user: UserDTO, length: int | None = None) -> UploadDTO:
+        """
+        Appends a chunk to an upload, streaming it to storage as it arrives.
+
+        Bytes received before the connection drops or the size limit is hit
+        are kept, so the client can resume from the returned offset.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            upload_id (str): The ID of the upload.
+            offset (int): Where the chunk starts; must equal the upload's current offset.
+            chunks (AsyncIterator[bytes]): The chunk's body as it is received.
+            current_user (UserDTO): The authenticated user uploading the file.
+            length (int | None): The chunk's Content-Length, if known, to reject it before reading.
+
+        Returns:
+            UploadDTO: The upload with its new offset.
+
+        Raises:
+            UploadNotFound: If the upload does not exist, has expired or is not the user's.
+            UploadConflict: If the offset is not the upload's current offset or
+                another chunk is being written.
+            FileSizeExceeded: If the chunk goes past the declared size of the file.
+        """
+        await self._get_state(room_id, upload_id, current_user)
+        async with self._lock(upload_id):
+            # Состояние перечитывается под блокировкой: смещение могло измениться
+            state = await self._get_state(room_id, upload_id, current_user)
+            size, current_offset = int(state[b"size"]), int(state[b"offset"])
+            if offset != current_offset:
+                raise UploadConflict(f"The upload continues at offset {current_offset}.")
+            if length is not None and offset + length > size:
+                raise FileSizeExceeded(f"The chunk goes past the declared size of {size} bytes.")
+
+            error = None
+
+            async def received() -> AsyncIterator[bytes]:
+                # Обрыв соединения или превышение размера завершают объект фрагмента,
+                # а не отменяют его запись: принятые байты остаются в загрузке
+                nonlocal error
+                written = offset
+                try:
+                    async for chunk in chunks:
+                        if written + len(chunk) > size:
+                            raise FileSizeExceeded(f"The chunk goes past the declared size of {size} bytes.")
+                        written += len(chunk)
+                        yield chunk
+                except Exception as e:
+                    error = e
+
+            part_key = upload_part_key(upload_id, offset)
+            received_size = await self.storage.put(part_key, received())
+            if received_size:
+                await self.redis.zadd(UPLOAD_PARTS_KEY.format(upload_id=upload_id), {part_key: offset})
+                await self._save_state(upload_id, {"offset": offset + received_size})
+            else:
+                await self.storage.delete(part_key)
+                await self._save_state(upload_id, {})
+            if error is not None:
+                raise error
+
+        state[b"offset"] = str(offset + received_size).encode()
+        return self._to_dto(upload_id, state)
+
+    async def complete_upload(self, room_id: str, upload_id: str, current_user: UserDTO) -> FileMetadataDTO:
+        """
+        Turns a fully received upload into a file of the room.
+
+        The chunks are concatenated in order into a new storage object and
+        hashed on the way; they are deleted once the file is recorded.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            upload_id (str): The ID of the upload.
+            current_user (UserDTO): The authenticated user uploading the file.
+
+        Returns:
+            FileMetadataDTO: Metadata of the new file.
+
+        Raises:
+            UploadNotFound: If the upload does not exist, has expired or is not the user's.
+            UploadConflict: If not all bytes have been received yet.
+            FileLimitExceeded: If the room has reached the maximum number of files meanwhile.
+        """
+        async with self._lock(upload_id):
+            state = await self._get_state(room_id, upload_id, current_user)
+            size, offset = int(state[b"size"]), int(state[b"offset"])
+            if offset != size:
+                raise UploadConflict(f"Only {offset} of {size} bytes have been received.")
+
+            room = await self.room_repo.get_owner_and_file_count(room_id)
+            if not room:
+                raise RoomNotFound("The specified room does not exist.")
+            room_pk, _, file_count = room
+            if file_count >= MAX_FILES_PER_ROOM:
+                raise FileLimitExceeded(f"Room has reached the limit of {MAX_FILES_PER_ROOM} files.")
+
+            part_keys = [
+                key.decode() for key in await self.redis.zrange(UPLOAD_PARTS_KEY.format(upload_id=upload_id), 0, -1)
+            ]
+            hasher = hashlib.sha256()
+
+            async def content() -> AsyncIterator[bytes]:
+                for part_key in part_keys:
+                    async for chunk in self.storage.get(part_key):
+                        hasher.update(chunk)
+                        yield chunk
+
+            storage_key = new_file_key()
+            if await self.storage.put(storage_key, content()) != size:
+                await self.storage.delete(storage_key)
+                raise UploadConflict("The received chunks do not add up to the declared size.")
+
+            # Создаем метаданные в БД
+            file_metadata = FileMetadataModel(
+                original_name=state[b"filename"].decode(),
+                storage_key=storage_key,
+                size_bytes=size,
+                content_hash=hasher.hexdigest(),
+                room_id=room_pk,
+            )
+            self.room_repo.session.add(file_metadata)
+            await self.room_repo.session.commit()
+            await self.room_repo.session.refresh(file_metadata)
+
+            await self._discard_upload(upload_id, part_keys)
+
+        return FileMetadataDTO.model_validate(file_metadata)
+
+    async def _discard_upload(self, upload_id: str, part_keys: list[str] | None = None):
+        """
+        Deletes the received chunks of an upload and its state in Redis.
+
+        Args:
+            upload_id (str): The ID of the upload.
+            part_keys (list[str] | None): The storage keys of the chunks, if already known.
+        """
+        parts_key = UPLOAD_PARTS_KEY.format(upload_id=upload_id)
+        if part_keys is None:
+            part_keys = [key.decode() for key in await self.redis.zrange(parts_key, 0, -1)]
+        await self.storage.delete_many(part_keys)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(UPLOAD_KEY.format(upload_id=upload_id), parts_key)
+            pipe.zrem(UPLOADS_ACTIVE_KEY, upload_id)
+            await pipe.execute()
+
+    async def _get_state(self, room_id: str, upload_id: str, current_user: UserDTO) -> dict[bytes, bytes]:
+        state = await self.redis.hgetall(UPLOAD_KEY.format(upload_id=upload_id))
+        if not state or state[b"room_id"].decode() != room_id or int(state[b"user_id"]) != current_user.id:
+            raise UploadNotFound("The specified upload does not exist or has expired.")
+        return state
+
+    async def _save_state(self, upload_id: str, fields: dict):
+        key = UPLOAD_KEY.format(upload_id=upload_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if fields:
+                pipe.hset(key, mapping=fields)
+            pipe.expire(key, file_settings.UPLOAD_TTL_SECONDS)
+            pipe.zadd(UPLOADS_ACTIVE_KEY, {upload_id: time.time()})
+            await pipe.execute()
+
+    @asynccontextmanager
+    async def _lock(self, upload_id: str):
+        """
+        Holds an exclusive lock on an upload; a second writer gets UploadConflict instead of waiting.
+        """
+        key = UPLOAD_LOCK_KEY.format(upload_id=upload_id)
+        token = uuid.uuid4().hex
+        if not await self.redis.set(key, token, nx=True, ex=file_settings.UPLOAD_CHUNK_LOCK_SECONDS):
+            raise UploadConflict("Another request is writing to this upload.")
+        try:
+            yield
+        finally:
+            if await self.redis.get(key) == token.encode():
+                await self.redis.delete(key)
+
+    @staticmethod
+    def _to_dto(upload_id: str, state: dict[bytes, bytes]) -> UploadDTO:
+        return UploadDTO(
+            upload_id=upload_id,
+            filename=state[b"filename"].decode(),
+            size=int(state[b"size"]),
+            offset=int(state[b"offset"]),
+        )
+
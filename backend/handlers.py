@@ -1,8 +1,9 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
-from backend.libs.exceptions import NotFound, AlreadyExists, PaginationError
-from backend.room.exceptions import RoomLimitExceeded, FileLimitExceeded, FileSizeExceeded
+from backend.libs.exceptions import NotFound, AlreadyExists, PaginationError, ExecutorOverloaded
+from backend.file.exceptions import UploadConflict
+from backend.room.exceptions import RoomLimitExceeded, FileLimitExceeded, FileSizeExceeded, InvalidArchive
 
 async def not_found_exception_handler(request: Request, exc: NotFound):
     """
@@ -40,6 +41,24 @@ async def file_limit_exception_handler(request: Request, exc: FileLimitExceeded
         content={"detail": str(exc)},
     )
 
+async def upload_conflict_exception_handler(request: Request, exc: UploadConflict):
+    """
+    Handles UploadConflict exceptions, returning a 409 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exc)},
+    )
+
+async def invalid_archive_exception_handler(request: Request, exc: InvalidArchive):
+    """
+    Handles InvalidArchive exceptions, returning a 400 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
 async def pagination_exception_handler(request: Request, exc: PaginationError):
     """
     Handles PaginationError exceptions, returning a 400 response.
@@ -49,6 +68,16 @@ async def pagination_exception_handler(request: Request, exc: PaginationError):
         content={"detail": str(exc)},
     )
 
+async def executor_overloaded_exception_handler(request: Request, exc: ExecutorOverloaded):
+    """
+    Handles ExecutorOverloaded exceptions, returning a 503 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 # Словарь для удобной регистрации обработчиков в приложении
 exception_handlers = {
     NotFound: not_found_exception_handler,
@@ -56,5 +85,8 @@ exception_handlers = {
     RoomLimitExceeded: room_limit_exception_handler,
     FileLimitExceeded: file_limit_exception_handler,
     FileSizeExceeded: file_limit_exception_handler,
+    UploadConflict: upload_conflict_exception_handler,
+    InvalidArchive: invalid_archive_exception_handler,
     PaginationError: pagination_exception_handler,
+    ExecutorOverloaded: executor_overloaded_exception_handler,
 }
\ No newline at end of file
@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    An in-process LRU cache whose entries expire after a time-to-live.
+
+    Not thread-safe; intended for use from the event loop only.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initializes the cache.
+
+        Args:
+            maxsize (int): The maximum number of entries; the least recently used is evicted first.
+            ttl (float): The default time-to-live of an entry, in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a cached value, or `default` if it is missing or expired.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """
+        Stores a value, optionally with its own time-to-live in seconds.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """
+        Removes an entry if it exists.
+        """
+        self._data.pop(key, None)
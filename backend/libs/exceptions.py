@@ -17,4 +17,10 @@ class PaginationError(Exception):
     """
     Raised for invalid pagination parameters (e.g., negative limit).
     """
-    pass
\ No newline at end of file
+    pass
+
+class ExecutorOverloaded(Exception):
+    """
+    Raised when a bounded worker pool cannot accept more work.
+    """
+    pass
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+
+from backend.libs.exceptions import ExecutorOverloaded
+
+
+@dataclass
+class ExecutorMetrics:
+    """
+    Counters describing the load of a BoundedExecutor.
+
+    Attributes:
+        submitted (int): Calls accepted into the executor.
+        completed (int): Calls that finished (successfully or not).
+        rejected (int): Calls refused because the queue was full.
+        in_flight (int): Calls currently queued or running.
+        max_in_flight (int): The highest `in_flight` value observed.
+        total_wait_seconds (float): Time calls spent queued before a worker picked them up.
+        total_run_seconds (float): Time calls spent running in a worker.
+    """
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    total_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        """Returns the metrics as a plain dictionary."""
+        return asdict(self)
+
+
+class BoundedExecutor:
+    """
+    A size-limited thread pool for CPU-heavy calls made from async code.
+
+    At most `max_workers` calls run at once and at most `max_queue` more
+    wait for a worker; anything beyond that is rejected immediately instead
+    of piling up and delaying every other request on the event loop. A call
+    whose caller is cancelled keeps its slot until its thread finishes.
+    """
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        """
+        Initializes the executor.
+
+        Args:
+            max_workers (int): The number of worker threads.
+            max_queue (int): How many calls may wait for a free worker.
+            name (str): The prefix for worker thread names.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._capacity = max_workers + max_queue
+        self.name = name
+        self.metrics = ExecutorMetrics()
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a blocking function in the pool and awaits its result.
+
+        Args:
+            func (Callable[..., Any]): The blocking function.
+            *args (Any): Positional arguments for the function.
+
+        Returns:
+            Any: The function's return value.
+
+        Raises:
+            ExecutorOverloaded: If the pool and its queue are full.
+        """
+        metrics = self.metrics
+        if metrics.in_flight >= self._capacity:
+            metrics.rejected += 1
+            raise ExecutorOverloaded(f"The {self.name} executor is overloaded, try again later.")
+
+        metrics.submitted += 1
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        submitted_at = time.perf_counter()
+
+        def timed_call():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                metrics.total_wait_seconds += started_at - submitted_at
+                metrics.total_run_seconds += time.perf_counter() - started_at
+
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(timed_call)
+        # Слот освобождается, когда вызов действительно завершился (или был снят из очереди),
+        # а не когда ожидающий его запрос отменен: поток продолжает работать и после отмены
+        future.add_done_callback(lambda _: self._call_soon(loop, self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        self.metrics.in_flight -= 1
+        self.metrics.completed += 1
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # Цикл событий уже закрыт при остановке процесса
+            pass
@@ -0,0 +1,239 @@
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from backend.storage.base import Storage
+from backend.storage.exceptions import StorageObjectNotFound
+
+# Расширения ASGI, позволяющие серверу отдать файл через sendfile без копирования в Python
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+PATHSEND_EXTENSION = "http.response.pathsend"
+
+
+@dataclass
+class FileDownload:
+    """
+    A stored file ready to be sent to a client.
+
+    Attributes:
+        storage_key (str): The key of the file in storage.
+        filename (str): The name offered to the client in Content-Disposition.
+        etag (str): The quoted entity tag of the file's content.
+    """
+    storage_key: str
+    filename: str
+    etag: str
+
+
+@dataclass
+class StreamedDownload:
+    """
+    Content generated while it is sent to a client.
+
+    Attributes:
+        chunks (AsyncIterator[bytes]): The content, produced lazily.
+        filename (str): The name offered to the client in Content-Disposition.
+        media_type (str): The content type.
+    """
+    chunks: AsyncIterator[bytes]
+    filename: str
+    media_type: str
+
+
+def make_etag(content_hash: str, changed_at: datetime) -> str:
+    """
+    Builds a strong entity tag from a content hash and a modification time.
+
+    Args:
+        content_hash (str): A digest or other fingerprint of the content.
+        changed_at (datetime): When the content last changed.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    version = hashlib.sha256(f"{content_hash}:{changed_at.isoformat()}".encode()).hexdigest()[:32]
+    return f'"{version}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Checks the request's If-None-Match header against an entity tag.
+
+    Args:
+        request (Request): The incoming request.
+        etag (str): The quoted entity tag of the current representation.
+
+    Returns:
+        bool: True if the client already has this representation.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Для GET сравнение слабое: W/"x" совпадает с "x"
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    A FileResponse that lets the ASGI server send the file with `sendfile`.
+
+    When the server advertises the zero-copy send extension, the open file is
+    handed over with an offset and a byte count; with the path-send extension
+    the whole file is sent by path. Otherwise the file is streamed in chunks
+    as usual. Range requests and HEAD are handled by FileResponse.
+    """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._extensions = scope.get("extensions") or {}
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if send_header_only or not (ZEROCOPY_EXTENSION in self._extensions or PATHSEND_EXTENSION in self._extensions):
+            return await super()._handle_simple(send, send_header_only)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if PATHSEND_EXTENSION in self._extensions:
+            await send({"type": PATHSEND_EXTENSION, "path": str(self.path)})
+        else:
+            with open(self.path, "rb") as file:
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "more_body": False})
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if send_header_only or ZEROCOPY_EXTENSION not in self._extensions:
+            return await super()._handle_single_range(send, start, end, file_size, send_header_only)
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        with open(self.path, "rb") as file:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": file,
+                "offset": start,
+                "count": end - start,
+                "more_body": False,
+            })
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _parse_range(request: Request, etag: str, size: int) -> tuple[int, int] | None:
+    """
+    Reads a single byte range from the Range header.
+
+    Returns:
+        tuple[int, int] | None: The [start, end) of the requested range, or
+            None to send the whole file (no range, a stale If-Range or
+            several ranges, which are not supported).
+
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    """
+    range_header = request.headers.get("range", "")
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None
+    first, _, last = range_header.removeprefix("bytes=").strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        else:
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return None
+    if start >= end:
+        raise ValueError("The requested range cannot be satisfied.")
+    return start, end
+
+
+async def file_download_response(request: Request, download: FileDownload, storage: Storage) -> Response:
+    """
+    Builds a streaming, range-capable download response for a stored file.
+
+    The file is never read into memory. A matching If-None-Match yields
+    304 Not Modified; a Range header yields 206 Partial Content, and
+    If-Range is honored against the same entity tag. Files of a local
+    storage are sent by path, so the server can use `sendfile`; other
+    backends are streamed chunk by chunk.
+
+    Args:
+        request (Request): The incoming request.
+        download (FileDownload): The file to send.
+        storage (Storage): The storage holding the file.
+
+    Returns:
+        Response: A 304 response or the file response.
+
+    Raises:
+        StorageObjectNotFound: If the file is missing from storage.
+    """
+    headers = {"ETag": download.etag, "Cache-Control": "private, no-cache"}
+    if is_not_modified(request, download.etag):
+        return Response(status_code=304, headers=headers)
+
+    # Отсутствующий объект - 404 для любого бэкенда, а не ошибка посреди ответа
+    size = await storage.size(download.storage_key)
+    if size is None:
+        raise StorageObjectNotFound(f"The object {download.storage_key} does not exist.")
+
+    path = storage.local_path(download.storage_key)
+    if path is not None:
+        return ZeroCopyFileResponse(path, filename=download.filename, headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Disposition"] = _content_disposition(download.filename)
+    media_type = mimetypes.guess_type(download.filename)[0] or "application/octet-stream"
+    try:
+        byte_range = _parse_range(request, download.etag, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(storage.get(download.storage_key), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start)
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(
+        storage.get(download.storage_key, start, end), status_code=206, media_type=media_type, headers=headers
+    )
+
+
+def streamed_download_response(download: StreamedDownload) -> Response:
+    """
+    Builds a download response that sends content as it is generated.
+
+    The length is unknown in advance, so the body is sent chunked and
+    ranges are not supported.
+
+    Args:
+        download (StreamedDownload): The content to send.
+
+    Returns:
+        Response: The streaming response.
+    """
+    return StreamingResponse(
+        download.chunks,
+        media_type=download.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{download.filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -0,0 +1,494 @@
+import asyncio
+import hashlib
+import io
+import logging
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Callable
+
+import aiofiles.tempfile
+
+from backend.config.files import file_settings
+from backend.libs.executor import BoundedExecutor
+from backend.room.dto import ArchiveFormat
+from backend.room.exceptions import FileLimitExceeded, FileSizeExceeded, InvalidArchive
+from backend.storage.base import CHUNK_SIZE, Storage
+from backend.storage.keys import new_file_key
+
+# Сигнатура zip-архива; все остальное читается как tar (в том числе сжатый gzip/bz2/xz)
+ZIP_MAGIC = b"PK"
+# Запас на заголовки и выравнивание tar сверх размера самих файлов
+ARCHIVE_OVERHEAD_PER_FILE = 64 * 1024
+# Максимальная длина имени файла (FileMetadataModel.original_name)
+MAX_NAME_LENGTH = 255
+# Размер блока при потоковом экспорте: столько данных сжимается за один шаг event loop
+EXPORT_CHUNK_SIZE = 64 * 1024
+ARCHIVE_MEDIA_TYPES = {
+    ArchiveFormat.ZIP: "application/zip",
+    ArchiveFormat.TAR_GZ: "application/gzip",
+}
+
+logger = logging.getLogger(__name__)
+
+# Распаковка архивов выполняется в отдельном ограниченном пуле
+import_executor = BoundedExecutor(
+    max_workers=file_settings.IMPORT_WORKERS,
+    max_queue=file_settings.IMPORT_MAX_PENDING,
+    name="import",
+)
+
+
+@dataclass
+class ImportedFile:
+    """
+    A file extracted from an imported archive.
+
+    Attributes:
+        name (str): The path of the file inside the archive.
+        storage_key (str): Where the file was stored.
+        size (int): The size of the file in bytes.
+        hash (str): The hex SHA-256 digest of the content.
+    """
+    name: str
+    storage_key: str
+    size: int
+    hash: str
+
+
+def normalize_entry_name(name: str) -> str | None:
+    """
+    Turns the path of an archive entry into a file name.
+
+    Args:
+        name (str): The path as stored in the archive.
+
+    Returns:
+        str | None: The normalized relative path, or None for entries that
+            are not user files (e.g. macOS resource forks).
+
+    Raises:
+        InvalidArchive: If the path leaves the archive root or is too long.
+    """
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or parts[0] == "__MACOSX":
+        return None
+    if ".." in parts:
+        raise InvalidArchive(f"The archive entry {name!r} points outside the archive.")
+    normalized = "/".join(parts)
+    if len(normalized) > MAX_NAME_LENGTH:
+        raise InvalidArchive(f"The archive entry name {normalized[:64]!r}... is too long.")
+    return normalized
+
+
+def _size_exceeded(name: str, max_size: int) -> FileSizeExceeded:
+    return FileSizeExceeded(f"File {name} exceeds the limit of {max_size // (1024 * 1024)} MB.")
+
+
+def _read_entry(src: BinaryIO, name: str, max_size: int) -> bytes:
+    """Reads an archive entry, enforcing the size limit on the bytes actually read."""
+    data = src.read(max_size + 1)
+    if len(data) > max_size:
+        raise _size_exceeded(name, max_size)
+    return data
+
+
+class _ImportWriter:
+    """
+    Stores the files of an archive while the archive is still being extracted.
+
+    Worker threads hand over every extracted file; it is uploaded to storage
+    on the event loop while the threads go on with the next entries. At most
+    IMPORT_WORKERS files are being uploaded at once; a thread handing over
+    another file waits for a free slot.
+    """
+    def __init__(self, storage: Storage, loop: asyncio.AbstractEventLoop):
+        self.storage = storage
+        self._loop = loop
+        self._slots = asyncio.Semaphore(file_settings.IMPORT_WORKERS)
+        self._tasks: list[asyncio.Task] = []
+        self._files: dict[int, ImportedFile] = {}
+
+    def submit(self, index: int, name: str, data: bytes):
+        """Hands over the `index`-th file of the archive. Called from a worker thread."""
+        file = ImportedFile(name, new_file_key(), len(data), hashlib.sha256(data).hexdigest())
+        asyncio.run_coroutine_threadsafe(self._submit(index, file, data), self._loop).result()
+
+    async def _submit(self, index: int, file: ImportedFile, data: bytes):
+        await self._slots.acquire()
+        self._files[index] = file
+        self._tasks.append(asyncio.create_task(self._put(file.storage_key, data)))
+
+    async def _put(self, key: str, data: bytes):
+        try:
+            await self.storage.put(key, data)
+        finally:
+            self._slots.release()
+
+    async def finish(self) -> list[ImportedFile]:
+        """Waits for all uploads and returns the stored files in archive order."""
+        await asyncio.gather(*self._tasks)
+        return [self._files[index] for index in sorted(self._files)]
+
+    async def discard(self):
+        """Waits for all uploads and deletes everything that was stored."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.storage.delete_many([file.storage_key for file in self._files.values()])
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    A blocking file object over an async byte stream, for use in a worker thread.
+
+    Each read that runs out of buffered bytes fetches the next chunk on the
+    event loop, so the archive is parsed while the request is still arriving.
+    """
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, limit: int):
+        self._chunks = chunks
+        self._loop = loop
+        self._limit = limit
+        self._buffer = b""
+        self._received = 0
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._eof:
+            try:
+                chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            except StopAsyncIteration:
+                self._eof = True
+                break
+            self._received += len(chunk)
+            if self._received > self._limit:
+                raise FileSizeExceeded("The archive is larger than the room can hold.")
+            self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    async def _next_chunk(self) -> bytes:
+        return await self._chunks.__anext__()
+
+
+def _extract_tar(reader: _StreamReader, writer: _ImportWriter, max_files: int, max_size: int):
+    """
+    Extracts a tar stream entry by entry without seeking. Runs in a worker thread.
+    """
+    count = 0
+    try:
+        with tarfile.open(fileobj=io.BufferedReader(reader, CHUNK_SIZE), mode="r|*") as tar:
+            for member in tar:
+                # Каталоги, ссылки и специальные файлы не импортируются
+                if not member.isfile():
+                    continue
+                name = normalize_entry_name(member.name)
+                if name is None:
+                    continue
+                if count >= max_files:
+                    raise FileLimitExceeded(f"The archive has more files than the room can hold ({max_files}).")
+                if member.size > max_size:
+                    raise _size_exceeded(name, max_size)
+                writer.submit(count, name, _read_entry(tar.extractfile(member), name, max_size))
+                count += 1
+    except (tarfile.TarError, EOFError, zlib.error) as e:
+        raise InvalidArchive(f"The archive is not a valid zip or tar file: {e}") from e
+
+
+def _list_zip_entries(archive_path: str, max_files: int, max_size: int) -> list[tuple[zipfile.ZipInfo, str]]:
+    """
+    Reads the central directory of a zip archive and checks the declared sizes. Runs in a worker thread.
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            infos = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise InvalidArchive(f"The archive is not a valid zip or tar file: {e}") from e
+
+    entries = []
+    for info in infos:
+        if info.is_dir():
+            continue
+        name = normalize_entry_name(info.filename)
+        if name is None:
+            continue
+        if info.flag_bits & 0x1:
+            raise InvalidArchive(f"The archive entry {name!r} is encrypted.")
+        if info.file_size > max_size:
+            raise _size_exceeded(name, max_size)
+        entries.append((info, name))
+    if len(entries) > max_files:
+        raise FileLimitExceeded(f"The archive has more files than the room can hold ({max_files}).")
+    return entries
+
+
+def _extract_zip_entry(archive_path: str, index: int, info: zipfile.ZipInfo, name: str,
+                       writer: _ImportWriter, max_size: int):
+    """
+    Extracts one zip entry; each call opens the archive itself, so entries are extracted in parallel.
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as archive, archive.open(info) as src:
+            data = _read_entry(src, name, max_size)
+    except (zipfile.BadZipFile, NotImplementedError, EOFError, zlib.error) as e:
+        raise InvalidArchive(f"The archive entry {name!r} cannot be extracted: {e}") from e
+    writer.submit(index, name, data)
+
+
+async def _chain(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _import_tar(chunks: AsyncIterator[bytes], writer: _ImportWriter, max_files: int, max_size: int):
+    reader = _StreamReader(chunks, asyncio.get_running_loop(), max_files * (max_size + ARCHIVE_OVERHEAD_PER_FILE))
+    await import_executor.run(_extract_tar, reader, writer, max_files, max_size)
+
+
+async def _import_zip(chunks: AsyncIterator[bytes], writer: _ImportWriter, max_files: int, max_size: int):
+    # Оглавление zip находится в конце архива, поэтому архив сначала сохраняется в локальный временный файл
+    limit = max_files * (max_size + ARCHIVE_OVERHEAD_PER_FILE)
+    received = 0
+    async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=".import") as spool:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > limit:
+                raise FileSizeExceeded("The archive is larger than the room can hold.")
+            await spool.write(chunk)
+        await spool.flush()
+
+        entries = await import_executor.run(_list_zip_entries, spool.name, max_files, max_size)
+        # Один архив занимает не больше IMPORT_WORKERS потоков, не вытесняя остальные импорты
+        semaphore = asyncio.Semaphore(file_settings.IMPORT_WORKERS)
+
+        async def extract(index: int, info: zipfile.ZipInfo, name: str):
+            async with semaphore:
+                await import_executor.run(_extract_zip_entry, spool.name, index, info, name, writer, max_size)
+
+        results = await asyncio.gather(
+            *(extract(index, info, name) for index, (info, name) in enumerate(entries)), return_exceptions=True
+        )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def extract_archive(chunks: AsyncIterator[bytes], storage: Storage, max_files: int,
+                          max_size: int) -> list[ImportedFile]:
+    """
+    Extracts the files of a zip or tar archive received as a byte stream into storage.
+
+    A tar archive (optionally compressed) is parsed while it is received. A
+    zip archive is first spooled to a local temporary file, because its
+    directory is at the end, and its entries are then extracted in parallel.
+    Every extracted file is uploaded to storage while the next entries are
+    being extracted. Sizes are checked against the bytes actually
+    extracted, not the sizes declared by the archive. On any error the
+    files stored so far are deleted.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The archive as it is received.
+        storage (Storage): The storage to put the files into.
+        max_files (int): How many files the archive may contain.
+        max_size (int): The maximum size of a single file in bytes.
+
+    Returns:
+        list[ImportedFile]: The extracted files, in archive order.
+
+    Raises:
+        InvalidArchive: If the archive is empty, corrupt or has unsafe entries.
+        FileLimitExceeded: If the archive contains more than `max_files` files.
+        FileSizeExceeded: If a file is larger than `max_size`.
+        ExecutorOverloaded: If the import executor is full.
+    """
+    chunks = aiter(chunks)
+    first = b""
+    while not first:
+        try:
+            first = await anext(chunks)
+        except StopAsyncIteration:
+            raise InvalidArchive("The archive is empty.") from None
+
+    writer = _ImportWriter(storage, asyncio.get_running_loop())
+    try:
+        if first.startswith(ZIP_MAGIC):
+            await _import_zip(_chain(first, chunks), writer, max_files, max_size)
+        else:
+            await _import_tar(_chain(first, chunks), writer, max_files, max_size)
+        return await writer.finish()
+    except BaseException:
+        await writer.discard()
+        raise
+
+
+@dataclass
+class ExportedFile:
+    """
+    A file to be written into an exported archive.
+
+    Attributes:
+        name (str): The name of the file inside the archive.
+        modified_at (datetime): The modification time recorded in the archive.
+        content (bytes | None): The live content of a collaborative document.
+        storage_key (str | None): The stored content, for files without collaborative state.
+        size (int | None): The size of the stored content, if known.
+    """
+    name: str
+    modified_at: datetime
+    content: bytes | None = None
+    storage_key: str | None = None
+    size: int | None = None
+
+
+class _ChunkSink(io.RawIOBase):
+    """An unseekable file object that keeps written bytes until they are drained."""
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ZipStreamWriter:
+    """
+    Writes a zip archive piece by piece; every method returns the bytes produced so far.
+
+    The output is never seeked, so sizes and checksums follow each entry
+    in a data descriptor instead of being patched into its header.
+    """
+    def __init__(self, compresslevel: int):
+        self._sink = _ChunkSink()
+        self._compresslevel = compresslevel or None
+        compression = zipfile.ZIP_DEFLATED if compresslevel else zipfile.ZIP_STORED
+        self._zip = zipfile.ZipFile(self._sink, "w", compression, compresslevel=self._compresslevel)
+        self._entry: BinaryIO | None = None
+
+    def start_file(self, name: str, size: int, modified_at: datetime) -> bytes:
+        info = zipfile.ZipInfo(name, date_time=modified_at.timetuple()[:6])
+        info.compress_type = self._zip.compression
+        info._compresslevel = self._compresslevel
+        info.file_size = size
+        self._entry = self._zip.open(info, "w")
+        return self._sink.drain()
+
+    def write(self, chunk: bytes) -> bytes:
+        self._entry.write(chunk)
+        return self._sink.drain()
+
+    def end_file(self) -> bytes:
+        self._entry.close()
+        self._entry = None
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
+
+
+class _TarGzStreamWriter:
+    """
+    Writes a gzip-compressed tar archive piece by piece; every method returns the bytes produced so far.
+    """
+    def __init__(self, compresslevel: int):
+        # wbits=31: поток zlib в формате gzip
+        self._compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+        self._remaining = 0
+        self._padding = 0
+
+    def start_file(self, name: str, size: int, modified_at: datetime) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(modified_at.timestamp())
+        info.mode = 0o644
+        self._remaining = size
+        self._padding = -size % tarfile.BLOCKSIZE
+        return self._compressor.compress(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+
+    def write(self, chunk: bytes) -> bytes:
+        chunk = chunk[:self._remaining]
+        self._remaining -= len(chunk)
+        return self._compressor.compress(chunk)
+
+    def end_file(self) -> bytes:
+        # Размер уже записан в заголовок: недостающие байты дополняются нулями
+        return self._compressor.compress(tarfile.NUL * (self._remaining + self._padding))
+
+    def close(self) -> bytes:
+        return self._compressor.compress(tarfile.NUL * (2 * tarfile.BLOCKSIZE)) + self._compressor.flush()
+
+
+async def _archive_pieces(files: AsyncIterator[ExportedFile], writer, storage: Storage,
+                          call: Callable[..., Any]) -> AsyncIterator[bytes]:
+    async for file in files:
+        if file.content is not None:
+            yield await call(writer.start_file, file.name, len(file.content), file.modified_at)
+            for offset in range(0, len(file.content), EXPORT_CHUNK_SIZE):
+                yield await call(writer.write, file.content[offset:offset + EXPORT_CHUNK_SIZE])
+            yield await call(writer.end_file)
+            continue
+
+        size = file.size if file.size is not None else await storage.size(file.storage_key)
+        if size is None:
+            logger.warning(f"Skipping missing object {file.storage_key} in archive")
+            continue
+        yield await call(writer.start_file, file.name, size, file.modified_at)
+        # Читается ровно заявленный размер, даже если объект успели перезаписать
+        async for chunk in storage.get(file.storage_key, 0, size, chunk_size=EXPORT_CHUNK_SIZE):
+            yield await call(writer.write, chunk)
+        yield await call(writer.end_file)
+    yield await call(writer.close)
+
+
+async def stream_archive(files: AsyncIterator[ExportedFile], storage: Storage, archive_format: ArchiveFormat,
+                         compresslevel: int, executor: BoundedExecutor | None = None) -> AsyncIterator[bytes]:
+    """
+    Produces a zip or tar.gz archive of files while it is being sent or stored.
+
+    Files are read in EXPORT_CHUNK_SIZE blocks and every compressed block
+    is yielded as soon as it is ready, so memory use does not depend on the
+    size of the archive and nothing is written to a temporary file.
+
+    Args:
+        files (AsyncIterator[ExportedFile]): The files to archive, produced lazily.
+        storage (Storage): The storage holding the files' content.
+        archive_format (ArchiveFormat): The format of the archive.
+        compresslevel (int): The zlib compression level, 0 to store zip entries uncompressed.
+        executor (BoundedExecutor | None): Where to compress; None compresses on the event loop,
+            which never rejects a download halfway through.
+
+    Yields:
+        bytes: The next piece of the archive.
+    """
+    if archive_format == ArchiveFormat.ZIP:
+        writer = _ZipStreamWriter(compresslevel)
+    else:
+        writer = _TarGzStreamWriter(compresslevel)
+
+    async def call(func: Callable[..., Any], *args: Any) -> Any:
+        if executor is None:
+            return func(*args)
+        return await executor.run(func, *args)
+
+    async for piece in _archive_pieces(files, writer, storage, call):
+        if piece:
+            yield piece
@@ -1,3 +1,4 @@
+from enum import StrEnum
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List
@@ -12,10 +13,28 @@ class RoomDTO(BaseModel):
     id: int
     human_readable_id: str
     owner_id: int
-    files: List[FileMetadataDTO]
-    snapshots: List[SnapshotDTO]
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class RoomDetailDTO(RoomDTO):
+    """
+    Data Transfer Object for a room with its files and a page of its snapshots.
+
+    Snapshots are listed newest first; `next_snapshot_cursor` is passed as
+    `snapshots_before` to fetch the next page, and is None on the last page.
+    """
+    files: List[FileMetadataDTO]
+    snapshots: List[SnapshotDTO]
+    next_snapshot_cursor: int | None = None
+
+
+class ArchiveFormat(StrEnum):
+    """
+    The archive formats a room can be exported as.
+    """
+    ZIP = "zip"
+    TAR_GZ = "tar.gz"
@@ -3,6 +3,10 @@ from backend.libs.exceptions import NotFound, AlreadyExists
 class RoomNotFound(NotFound):
     pass
 
+class FileNotFound(NotFound):
+    """Raised when a file does not exist in the room."""
+    pass
+
 class RoomLimitExceeded(AlreadyExists):
     """Raised when a user tries to create more rooms than allowed."""
     pass
@@ -13,4 +17,8 @@ class FileLimitExceeded(Exception):
 
 class FileSizeExceeded(Exception):
     """Raised when an uploaded file is too large."""
+    pass
+
+class InvalidArchive(Exception):
+    """Raised when an imported archive is corrupt or contains unsafe entries."""
     pass
\ No newline at end of file
@@ -14,6 +14,10 @@ class RoomModel(Base):
         owner (Mapped["UserModel"]): Relationship to the owner user.
         participants (Mapped[List["RoomParticipantModel"]]): List of all participants in the room.
         files (Mapped[List["FileMetadataModel"]]): List of all files in the room.
+        snapshots (Mapped[List["SnapshotModel"]]): List of all snapshots of the room.
+
+    The files and snapshots are never loaded implicitly; repositories query
+    them explicitly with only the columns a request needs.
     """
     __tablename__ = "rooms"
 
@@ -22,6 +26,10 @@ class RoomModel(Base):
 
     owner: Mapped["UserModel"] = relationship(back_populates="owned_rooms")
     participants: Mapped[List["RoomParticipantModel"]] = relationship(back_populates="room", cascade="all, delete-orphan")
-    files: Mapped[List["FileMetadataModel"]] = relationship(back_populates="room", cascade="all, delete-orphan")
-    snapshots: Mapped[List["SnapshotModel"]] = relationship(back_populates="room", cascade="all, delete-orphan")
+    files: Mapped[List["FileMetadataModel"]] = relationship(
+        back_populates="room", cascade="all, delete-orphan", lazy="raise"
+    )
+    snapshots: Mapped[List["SnapshotModel"]] = relationship(
+        back_populates="room", cascade="all, delete-orphan", lazy="raise"
+    )
 
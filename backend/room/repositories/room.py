@@ -1,9 +1,9 @@
 from typing import List
 
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import insert, select, func
 
 from backend.config.database.session import ISession
+from backend.file.models.file_metadata import FileMetadataModel
 from backend.room.models.room import RoomModel
 from backend.room.models.room_participant import RoomParticipantModel
 
@@ -48,19 +48,114 @@ class RoomRepository:
 
     async def get_by_human_id(self, human_readable_id: str) -> RoomModel | None:
         """
-        Retrieves a room by its human-readable ID, preloading files and snapshots.
+        Retrieves a room by its human-readable ID, without its files and snapshots.
         """
+        stmt = select(RoomModel).where(RoomModel.human_readable_id == human_readable_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_owner_and_file_count(self, human_readable_id: str) -> tuple[int, int, int] | None:
+        """
+        Retrieves what the file limit checks need about a room with a single query.
+
+        Files are counted with COUNT instead of being loaded.
+
+        Args:
+            human_readable_id (str): The user-friendly ID of the room.
+
+        Returns:
+            tuple[int, int, int] | None: The room's ID, its owner's ID and its
+                number of files, or None if the room does not exist.
+        """
+        file_count = (
+            select(func.count(FileMetadataModel.id))
+            .where(FileMetadataModel.room_id == RoomModel.id)
+            .scalar_subquery()
+        )
         stmt = (
-            select(RoomModel)
+            select(RoomModel.id, RoomModel.owner_id, file_count)
             .where(RoomModel.human_readable_id == human_readable_id)
-            .options(
-                selectinload(RoomModel.files),
-                selectinload(RoomModel.snapshots)
-            )
+        )
+        result = await self.session.execute(stmt)
+        row = result.one_or_none()
+        return tuple(row) if row else None
+
+    async def get_files(self, room_id: int) -> List[FileMetadataModel]:
+        """
+        Retrieves all files of a room, oldest first.
+
+        Args:
+            room_id (int): The ID of the room.
+
+        Returns:
+            List[FileMetadataModel]: The files of the room.
+        """
+        stmt = select(FileMetadataModel).where(FileMetadataModel.room_id == room_id).order_by(FileMetadataModel.id)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_file_ids(self, human_readable_id: str) -> set[int] | None:
+        """
+        Retrieves the IDs of all files in a room with a single query.
+
+        Args:
+            human_readable_id (str): The user-friendly ID of the room.
+
+        Returns:
+            set[int] | None: The file IDs, or None if the room does not exist.
+        """
+        stmt = (
+            select(RoomModel.id, FileMetadataModel.id)
+            .outerjoin(FileMetadataModel, FileMetadataModel.room_id == RoomModel.id)
+            .where(RoomModel.human_readable_id == human_readable_id)
+        )
+        result = await self.session.execute(stmt)
+        rows = result.all()
+        if not rows:
+            return None
+        return {file_id for _, file_id in rows if file_id is not None}
+
+    async def get_file(self, human_readable_id: str, file_id: int) -> FileMetadataModel | None:
+        """
+        Retrieves a file of a room without loading the room itself.
+
+        Args:
+            human_readable_id (str): The user-friendly ID of the room.
+            file_id (int): The ID of the file.
+
+        Returns:
+            FileMetadataModel | None: The file, or None if it does not belong to the room.
+        """
+        stmt = (
+            select(FileMetadataModel)
+            .join(RoomModel, FileMetadataModel.room_id == RoomModel.id)
+            .where(RoomModel.human_readable_id == human_readable_id, FileMetadataModel.id == file_id)
         )
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def add_files(self, room_id: int, files: list[dict]) -> List[FileMetadataModel]:
+        """
+        Adds many files to a room with a single multi-row INSERT.
+
+        Args:
+            room_id (int): The ID of the room.
+            files (list[dict]): The original_name, storage_key, size_bytes and
+                content_hash of each file.
+
+        Returns:
+            List[FileMetadataModel]: The created files, in the given order.
+        """
+        stmt = (
+            insert(FileMetadataModel)
+            .values([{**file, "room_id": room_id} for file in files])
+            .returning(FileMetadataModel)
+        )
+        result = await self.session.scalars(stmt)
+        instances = list(result.all())
+        await self.session.commit()
+        return instances
+
     async def get_rooms_for_user(self, user_id: int) -> List[RoomModel]:
         """
         Retrieves all rooms a user has participated in.
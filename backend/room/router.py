@@ -1,10 +1,13 @@
-from fastapi import APIRouter, status, UploadFile, File
+from fastapi import APIRouter, Query, Request, status, UploadFile, File
 
 from backend.room.dependencies.service import IRoomService
-from backend.room.dto import RoomDTO
+from backend.room.service import MAX_SNAPSHOT_PAGE_SIZE, SNAPSHOT_PAGE_SIZE
+from backend.room.dto import ArchiveFormat, RoomDetailDTO, RoomDTO
 from backend.file.dto import FileMetadataDTO
+from backend.libs.responses import file_download_response, streamed_download_response
 from backend.security.dependencies import ICurrentUser
-from backend.snapshot.dto import SnapshotDTO
+from backend.snapshot.dto import SnapshotJobDTO
+from backend.storage.client import get_storage
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
 
@@ -16,10 +19,38 @@ async def create_room(current_user: ICurrentUser, service: IRoomService):
 async def upload_file(room_id: str, current_user: ICurrentUser, service: IRoomService, file: UploadFile = File(...)):
     return await service.upload_file_to_room(room_id, file, current_user)
 
-@router.get("/{room_id}", response_model=RoomDTO)
-async def get_room_details(room_id: str, service: IRoomService):
-    return await service.get_room_details(room_id)
+@router.post("/{room_id}/import", response_model=list[FileMetadataDTO], status_code=status.HTTP_201_CREATED)
+async def import_archive(room_id: str, request: Request, current_user: ICurrentUser, service: IRoomService):
+    # Архив читается потоком и распаковывается по мере поступления
+    return await service.import_archive(room_id, request.stream(), current_user)
 
-@router.post("/{room_id}/snapshots", response_model=SnapshotDTO, status_code=status.HTTP_201_CREATED)
+@router.get("/{room_id}", response_model=RoomDetailDTO)
+async def get_room_details(room_id: str, service: IRoomService,
+                           snapshots_limit: int = Query(SNAPSHOT_PAGE_SIZE, ge=1, le=MAX_SNAPSHOT_PAGE_SIZE),
+                           snapshots_before: int | None = Query(None, ge=1)):
+    return await service.get_room_details(room_id, snapshots_limit, snapshots_before)
+
+@router.post("/{room_id}/snapshots", response_model=SnapshotJobDTO, status_code=status.HTTP_202_ACCEPTED)
 async def create_snapshot(room_id: str, service: IRoomService, current_user: ICurrentUser):
-    return await service.create_snapshot(room_id, current_user)
\ No newline at end of file
+    return await service.create_snapshot(room_id)
+
+@router.get("/{room_id}/snapshots/jobs/{job_id}", response_model=SnapshotJobDTO)
+async def get_snapshot_job(room_id: str, job_id: str, service: IRoomService, current_user: ICurrentUser):
+    return await service.get_snapshot_job(room_id, job_id)
+
+@router.get("/{room_id}/files/{file_id}/content")
+async def download_file(room_id: str, file_id: int, request: Request, service: IRoomService, current_user: ICurrentUser):
+    download = await service.get_file_download(room_id, file_id)
+    return await file_download_response(request, download, get_storage())
+
+@router.get("/{room_id}/snapshots/{snapshot_id}/archive")
+async def download_snapshot(room_id: str, snapshot_id: int, request: Request, service: IRoomService,
+                            current_user: ICurrentUser):
+    download = await service.get_snapshot_download(room_id, snapshot_id)
+    return await file_download_response(request, download, get_storage())
+
+@router.get("/{room_id}/export")
+async def export_room(room_id: str, service: IRoomService, current_user: ICurrentUser,
+                      format: ArchiveFormat = ArchiveFormat.ZIP):
+    download = await service.export_room(room_id, format)
+    return streamed_download_response(download)
\ No newline at end of file
@@ -1,24 +1,44 @@
+import hashlib
 import uuid
-import zipfile
-import aiofiles
-from pathlib import Path
+from typing import AsyncIterator
 from fastapi import UploadFile
 
+from backend.collaboration.persistence import get_document_text
+from backend.collaboration.service import CollaborationService
+from backend.config.snapshot import snapshot_settings
+from backend.libs.responses import FileDownload, StreamedDownload, make_etag
+from backend.room.archive import ARCHIVE_MEDIA_TYPES, ExportedFile, extract_archive, stream_archive
 from backend.room.dependencies.repository import IRoomRepository
-from backend.room.dto import RoomDTO
+from backend.room.dto import ArchiveFormat, RoomDetailDTO, RoomDTO
 from backend.file.dto import FileMetadataDTO
 from backend.user.dto import UserDTO
-from backend.room.exceptions import RoomLimitExceeded, RoomNotFound, FileLimitExceeded, FileSizeExceeded
+from backend.room.exceptions import (
+    RoomLimitExceeded, RoomNotFound, FileLimitExceeded, FileSizeExceeded, FileNotFound
+)
 from backend.file.models.file_metadata import FileMetadataModel
 from backend.snapshot.dependencies.repository import ISnapshotRepository
-from backend.snapshot.dto import SnapshotDTO
+from backend.snapshot.dto import SnapshotDTO, SnapshotJobDTO
+from backend.snapshot.exceptions import SnapshotJobNotFound, SnapshotNotFound
+from backend.snapshot.jobs import manifest_digest, snapshot_job_manager
+from backend.storage.client import get_storage
+from backend.storage.keys import new_file_key
 
 # Константы для ограничений
 MAX_ROOMS_PER_USER = 3
 MAX_FILES_PER_ROOM = 20
 MAX_FILE_SIZE_MB = 5
-STORAGE_PATH = Path("./storage/files")
-SNAPSHOT_STORAGE_PATH = Path("./storage/snapshots")
+# Размер страницы снимков в деталях комнаты: по умолчанию и максимальный
+SNAPSHOT_PAGE_SIZE = 20
+MAX_SNAPSHOT_PAGE_SIZE = 100
+
+async def _limit_size(chunks: AsyncIterator[bytes], max_size: int) -> AsyncIterator[bytes]:
+    """Passes a stream through, raising FileSizeExceeded as soon as it grows past `max_size` bytes."""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise FileSizeExceeded(f"File size exceeds the limit of {MAX_FILE_SIZE_MB} MB.")
+        yield chunk
 
 class RoomService:
     """
@@ -27,9 +47,8 @@ class RoomService:
     def __init__(self, room_repo: IRoomRepository, snapshot_repo: ISnapshotRepository):
         self.room_repo = room_repo
         self.snapshot_repo = snapshot_repo
-
-        STORAGE_PATH.mkdir(parents=True, exist_ok=True)
-        SNAPSHOT_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
+        self.collaboration_service = CollaborationService()
+        self.storage = get_storage()
 
     async def create_room(self, current_user: UserDTO) -> RoomDTO:
         """
@@ -60,7 +79,8 @@ class RoomService:
         Uploads a file to a specified room.
 
         Validates room existence, user permissions, file count, and file size.
-        Saves the file to local storage.
+        Streams the file into the storage backend. Large files should use the
+        resumable chunked upload API instead.
 
         Args:
             room_id (str): The human-readable ID of the target room.
@@ -75,34 +95,41 @@ class RoomService:
             FileLimitExceeded: If the room already contains the maximum number of files.
             FileSizeExceeded: If the file size is larger than the allowed limit.
         """
-        room = await self.room_repo.get_by_human_id(room_id)
+        room = await self.room_repo.get_owner_and_file_count(room_id)
         if not room:
             raise RoomNotFound("The specified room does not exist.")
+        room_pk, owner_id, file_count = room
 
-        if room.owner_id != current_user.id:
+        if owner_id != current_user.id:
             raise PermissionError("You do not have permission to modify this room.")
 
-        if len(room.files) >= MAX_FILES_PER_ROOM:
+        if file_count >= MAX_FILES_PER_ROOM:
             raise FileLimitExceeded(f"Room has reached the limit of {MAX_FILES_PER_ROOM} files.")
 
-        file_size = file.size
-        if file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+        max_size = MAX_FILE_SIZE_MB * 1024 * 1024
+        if file.size is not None and file.size > max_size:
             raise FileSizeExceeded(f"File size exceeds the limit of {MAX_FILE_SIZE_MB} MB.")
 
-        file_uuid = str(uuid.uuid4())
-        disk_path = STORAGE_PATH / file_uuid
+        storage_key = new_file_key()
+
+        # Передаем файл в хранилище потоком, попутно вычисляя хеш содержимого.
+        # Заявленному размеру не доверяем: лимит проверяется по фактически прочитанным байтам
+        hasher = hashlib.sha256()
+
+        async def content():
+            while chunk := await file.read(1024 * 1024):  # Read in 1MB chunks
+                hasher.update(chunk)
+                yield chunk
 
-        # Асинхронно сохраняем файл на диск
-        async with aiofiles.open(disk_path, 'wb') as out_file:
-            while content := await file.read(1024 * 1024):  # Read in 1MB chunks
-                await out_file.write(content)
+        file_size = await self.storage.put(storage_key, _limit_size(content(), max_size))
 
         # Создаем метаданные в БД
         file_metadata = FileMetadataModel(
             original_name=file.filename,
-            disk_path=str(disk_path),
+            storage_key=storage_key,
             size_bytes=file_size,
-            room_id=room.id
+            content_hash=hasher.hexdigest(),
+            room_id=room_pk
         )
         self.room_repo.session.add(file_metadata)
         await self.room_repo.session.commit()
@@ -110,15 +137,76 @@ class RoomService:
 
         return FileMetadataDTO.model_validate(file_metadata)
 
-    async def get_room_details(self, room_id: str) -> RoomDTO:
+    async def import_archive(self, room_id: str, chunks: AsyncIterator[bytes],
+                             current_user: UserDTO) -> list[FileMetadataDTO]:
+        """
+        Imports every file of a zip or tar archive into a room.
+
+        The archive is extracted while it is received (see `extract_archive`)
+        and all files are recorded with a single INSERT, so either the whole
+        archive is imported or nothing is.
+
+        Args:
+            room_id (str): The human-readable ID of the target room.
+            chunks (AsyncIterator[bytes]): The archive as it is received.
+            current_user (UserDTO): The authenticated user importing the files.
+
+        Returns:
+            list[FileMetadataDTO]: Metadata of the imported files, in archive order.
+
+        Raises:
+            RoomNotFound: If the room with the given ID does not exist.
+            FileLimitExceeded: If the room cannot hold all files of the archive.
+            FileSizeExceeded: If a file is larger than the allowed limit.
+            InvalidArchive: If the archive is empty, corrupt or has unsafe entries.
+        """
+        room = await self.room_repo.get_owner_and_file_count(room_id)
+        if not room:
+            raise RoomNotFound("The specified room does not exist.")
+        room_pk, owner_id, file_count = room
+
+        if owner_id != current_user.id:
+            raise PermissionError("You do not have permission to modify this room.")
+
+        free_slots = MAX_FILES_PER_ROOM - file_count
+        if free_slots <= 0:
+            raise FileLimitExceeded(f"Room has reached the limit of {MAX_FILES_PER_ROOM} files.")
+
+        imported = await extract_archive(chunks, self.storage, free_slots, MAX_FILE_SIZE_MB * 1024 * 1024)
+        if not imported:
+            return []
+
+        try:
+            files = await self.room_repo.add_files(room_pk, [
+                {
+                    "original_name": file.name,
+                    "storage_key": file.storage_key,
+                    "size_bytes": file.size,
+                    "content_hash": file.hash,
+                }
+                for file in imported
+            ])
+        except BaseException:
+            # Без метаданных распакованные файлы никому не принадлежат
+            await self.storage.delete_many([file.storage_key for file in imported])
+            raise
+        return [FileMetadataDTO.model_validate(file) for file in files]
+
+    async def get_room_details(self, room_id: str, snapshots_limit: int = SNAPSHOT_PAGE_SIZE,
+                               snapshots_before: int | None = None) -> RoomDetailDTO:
         """
         Retrieves detailed information about a room.
 
+        Snapshots are returned a page at a time, newest first.
+
         Args:
             room_id (str): The human-readable ID of the room.
+            snapshots_limit (int): The maximum number of snapshots to return.
+            snapshots_before (int | None): The cursor of the page, i.e. return
+                only snapshots older than this snapshot ID.
 
         Returns:
-            RoomDetailsDTO: A DTO with room details, including files and snapshots.
+            RoomDetailDTO: A DTO with room details, including files and a page of snapshots.
 
         Raises:
             RoomNotFound: If the room does not exist.
@@ -126,32 +214,167 @@ class RoomService:
         room = await self.room_repo.get_by_human_id(room_id)
         if not room:
             raise RoomNotFound("The specified room does not exist.")
-        return RoomDTO.model_validate(room)
 
-    async def create_snapshot(self, room_id: str) -> SnapshotDTO:
+        files = await self.room_repo.get_files(room.id)
+        # Лишний снимок показывает, есть ли следующая страница
+        snapshots = await self.snapshot_repo.list_for_room(room.id, snapshots_limit + 1, snapshots_before)
+        next_cursor = None
+        if len(snapshots) > snapshots_limit:
+            snapshots = snapshots[:snapshots_limit]
+            next_cursor = snapshots[-1].id
+
+        return RoomDetailDTO(
+            **RoomDTO.model_validate(room).model_dump(),
+            files=[FileMetadataDTO.model_validate(file_meta) for file_meta in files],
+            snapshots=[SnapshotDTO.model_validate(snapshot) for snapshot in snapshots],
+            next_snapshot_cursor=next_cursor,
+        )
+
+    async def create_snapshot(self, room_id: str) -> SnapshotJobDTO:
         """
-        Creates a zip archive of all files currently in the room.
+        Starts creating a snapshot of all files currently in the room.
+
+        The snapshot is built in the background from the files' live
+        collaborative content; the returned job reports its progress.
 
         Args:
             room_id (str): The human-readable ID of the room to snapshot.
 
         Returns:
-            SnapshotDTO: A DTO representing the newly created snapshot.
+            SnapshotJobDTO: The pending snapshot job.
 
         Raises:
             RoomNotFound: If the room does not exist.
+            ExecutorOverloaded: If too many snapshots are already being created.
         """
         room = await self.room_repo.get_by_human_id(room_id)
         if not room:
             raise RoomNotFound("Cannot create snapshot for a non-existent room.")
 
-        snapshot_uuid = str(uuid.uuid4())
-        archive_path = SNAPSHOT_STORAGE_PATH / f"{snapshot_uuid}.zip"
+        files = await self.room_repo.get_files(room.id)
+        return await snapshot_job_manager.submit(
+            room.id,
+            room_id,
+            [file_meta.id for file_meta in files],
+            [(file_meta.original_name, file_meta.storage_key, file_meta.content_hash, file_meta.size_bytes)
+             for file_meta in files],
+        )
+
+    async def get_snapshot_job(self, room_id: str, job_id: str) -> SnapshotJobDTO:
+        """
+        Retrieves the state of a snapshot job.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            job_id (str): The ID returned when the snapshot was requested.
+
+        Returns:
+            SnapshotJobDTO: The job's status and, once done, the snapshot ID.
+
+        Raises:
+            SnapshotJobNotFound: If the job does not exist, has expired or belongs to another room.
+        """
+        job = await snapshot_job_manager.get(room_id, job_id)
+        if job is None:
+            raise SnapshotJobNotFound("The specified snapshot job does not exist.")
+        return job
+
+    async def get_file_download(self, room_id: str, file_id: int) -> FileDownload:
+        """
+        Locates the content of a file for download.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            file_id (int): The ID of the file.
+
+        Returns:
+            FileDownload: The stored file and its entity tag, derived from
+                the content hash and the last update time.
+
+        Raises:
+            FileNotFound: If the file does not exist in the room.
+        """
+        file_meta = await self.room_repo.get_file(room_id, file_id)
+        if not file_meta:
+            raise FileNotFound("The specified file does not exist in this room.")
+        return FileDownload(
+            storage_key=file_meta.storage_key,
+            filename=file_meta.original_name,
+            etag=make_etag(file_meta.content_hash or str(file_meta.size_bytes), file_meta.updated_at),
+        )
 
-        with zipfile.ZipFile(archive_path, 'w') as zipf:
-            for file_meta in room.files:
-                # Добавляем файл в архив под его оригинальным именем
-                zipf.write(file_meta.disk_path, arcname=file_meta.original_name)
+    async def get_snapshot_download(self, room_id: str, snapshot_id: int) -> FileDownload:
+        """
+        Locates the archive of a snapshot for download.
+
+        The archive is built from the snapshot's blobs on the first download
+        and kept for later downloads until it has been idle for
+        SNAPSHOT_ARCHIVE_TTL_SECONDS.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            snapshot_id (int): The ID of the snapshot.
+
+        Returns:
+            FileDownload: The stored archive and its entity tag, derived from
+                the manifest and the snapshot's creation time.
+
+        Raises:
+            SnapshotNotFound: If the snapshot does not exist in the room.
+            ExecutorOverloaded: If the archive has to be built and the executor is full.
+        """
+        snapshot = await self.snapshot_repo.get_for_room(room_id, snapshot_id)
+        if not snapshot:
+            raise SnapshotNotFound("The specified snapshot does not exist in this room.")
 
-        new_snapshot = await self.snapshot_repo.create(room.id, str(archive_path))
-        return SnapshotDTO.model_validate(new_snapshot)
\ No newline at end of file
+        archive_key = await snapshot_job_manager.ensure_archive(self.snapshot_repo, snapshot)
+
+        return FileDownload(
+            storage_key=archive_key,
+            filename=f"{room_id}-snapshot-{snapshot.id}.zip",
+            # Снимок неизменяем: его версия определяется манифестом и временем создания
+            etag=make_etag(manifest_digest(snapshot.manifest), snapshot.created_at),
+        )
+
+    async def export_room(self, room_id: str, archive_format: ArchiveFormat) -> StreamedDownload:
+        """
+        Exports all files of a room as an archive generated on the fly.
+
+        Unlike a snapshot, nothing is stored: the archive is compressed while
+        it is sent, from the live collaborative content of each file or from
+        storage, so the first bytes are sent immediately.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            archive_format (ArchiveFormat): The format of the archive.
+
+        Returns:
+            StreamedDownload: The archive's content stream.
+
+        Raises:
+            RoomNotFound: If the room does not exist.
+        """
+        room = await self.room_repo.get_by_human_id(room_id)
+        if not room:
+            raise RoomNotFound("The specified room does not exist.")
+
+        files = [(file_meta.id, file_meta.original_name, file_meta.storage_key, file_meta.updated_at)
+                 for file_meta in await self.room_repo.get_files(room.id)]
+
+        async def exported_files():
+            # Состояние документа загружается только когда до него доходит очередь
+            for file_id, original_name, storage_key, updated_at in files:
+                state = await self.collaboration_service.load_document_state(room_id, str(file_id))
+                if state:
+                    content = get_document_text(state).encode("utf-8")
+                    yield ExportedFile(original_name, updated_at, content=content)
+                else:
+                    yield ExportedFile(original_name, updated_at, storage_key=storage_key)
+
+        return StreamedDownload(
+            chunks=stream_archive(
+                exported_files(), self.storage, archive_format, snapshot_settings.SNAPSHOT_COMPRESSION_LEVEL
+            ),
+            filename=f"{room_id}.{archive_format.value}",
+            media_type=ARCHIVE_MEDIA_TYPES[archive_format],
+        )
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from backend.user.router import router as user_router
 from backend.auth.router import router as auth_router
 from backend.room.router import router as room_router
+from backend.file.router import router as file_router
 from backend.collaboration.router import router as collaboration_router
 
 
@@ -11,6 +12,7 @@ router = APIRouter(prefix="/api")
 router.include_router(auth_router)
 router.include_router(user_router)
 router.include_router(room_router)
+router.include_router(file_router)
 
 websocket_router = APIRouter()
 
@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from backend.security.service import TokenService
+from backend.user.cache import user_cache
 from backend.user.dependencies.repository import IUserRepository
 from backend.user.dto import UserDTO
 from backend.user.exceptions import UserNotFound
@@ -10,12 +11,27 @@ from backend.user.exceptions import UserNotFound
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 IToken = Annotated[str, Depends(oauth2_scheme)]
 
+async def get_user_by_id(user_id: int, user_repo: IUserRepository) -> UserDTO:
+    """
+    Fetches an authenticated user through the user cache.
+
+    Only a miss in both cache tiers reaches the database. The user is
+    always returned as cached, without the password hash.
+
+    Raises:
+        UserNotFound: If the user does not exist.
+    """
+    user = await user_cache.get(user_id)
+    if user is None:
+        user = await user_cache.set(await user_repo.get(user_id))
+    return user
+
 async def get_current_user(token: IToken, user_repo: IUserRepository) -> UserDTO:
     """
     Dependency to get the current user from a JWT token.
 
     Verifies the token, extracts the user ID, and fetches the user
-    from the database.
+    through the user cache, falling back to the database.
 
     Raises:
         HTTPException(401): If the token is invalid or the user is not found.
@@ -31,8 +47,7 @@ async def get_current_user(token: IToken, user_repo: IUserRepository) -> UserDTO
 
     user_id = int(payload.sub)
     try:
-        user = await user_repo.get(user_id)
-        return user
+        return await get_user_by_id(user_id, user_repo)
     except UserNotFound:
         raise credentials_exception
 
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -5,23 +6,38 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from backend.config.security import auth_config
+from backend.libs.cache import TTLCache
+from backend.libs.executor import BoundedExecutor
 from backend.security.dto import TokenPayloadDTO
 
 # Используем bcrypt как основную и самую надежную схему хэширования
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt блокирует поток на десятки миллисекунд, поэтому выполняется в отдельном ограниченном пуле
+password_executor = BoundedExecutor(
+    max_workers=auth_config.PASSWORD_HASH_WORKERS,
+    max_queue=auth_config.PASSWORD_HASH_QUEUE_SIZE,
+    name="password-hashing",
+)
+
+# Уже проверенные токены: повторная проверка подписи не нужна до истечения exp
+_verified_tokens = TTLCache(maxsize=auth_config.TOKEN_CACHE_SIZE, ttl=0)
+
 
 class PasswordService:
     """
     Provides services for password hashing and verification.
+
+    bcrypt runs in `password_executor` so it never blocks the event loop;
+    both methods raise ExecutorOverloaded when the pool's queue is full.
     """
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        return await password_executor.run(pwd_context.verify, plain_password, hashed_password)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        return await password_executor.run(pwd_context.hash, password)
 
 
 class TokenService:
@@ -48,10 +64,19 @@ class TokenService:
 
     @staticmethod
     def verify_token(token: str) -> Optional[TokenPayloadDTO]:
+        """
+        Decodes and validates a JWT, memoizing valid payloads until the token expires.
+        """
+        cached = _verified_tokens.get(token)
+        if cached is not None:
+            return cached
         try:
             payload = jwt.decode(
                 token, auth_config.SECRET_KEY, algorithms=[auth_config.ALGORITHM]
             )
-            return TokenPayloadDTO(**payload)
         except JWTError:
-            return None
\ No newline at end of file
+            return None
+        dto = TokenPayloadDTO(**payload)
+        if "exp" in payload:
+            _verified_tokens.set(token, dto, ttl=payload["exp"] - time.time())
+        return dto
\ No newline at end of file
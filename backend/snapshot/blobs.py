@@ -0,0 +1,53 @@
+import hashlib
+
+from backend.storage.base import Storage
+from backend.storage.keys import blob_key
+
+
+async def hash_object(storage: Storage, key: str) -> tuple[str, int]:
+    """
+    Hashes a stored object without reading it into memory at once.
+
+    Args:
+        storage (Storage): The storage holding the object.
+        key (str): The key of the object.
+
+    Returns:
+        tuple[str, int]: The hex SHA-256 digest and the size of the object.
+
+    Raises:
+        StorageObjectNotFound: If the object does not exist.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    async for chunk in storage.get(key):
+        hasher.update(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+async def write_blob(storage: Storage, digest: str, content: bytes | None = None,
+                     source_key: str | None = None) -> bool:
+    """
+    Stores a blob unless it is already present.
+
+    Storage writes are atomic, so a blob key never holds partial content.
+    A blob copied from a stored file is copied inside the storage backend.
+
+    Args:
+        storage (Storage): The storage holding the blobs.
+        digest (str): The hex SHA-256 digest of the content.
+        content (bytes | None): The content to store.
+        source_key (str | None): A stored object to copy the content from when `content` is None.
+
+    Returns:
+        bool: True if the blob was written, False if it already existed.
+    """
+    key = blob_key(digest)
+    if await storage.size(key) is not None:
+        return False
+    if content is not None:
+        await storage.put(key, content)
+    else:
+        await storage.copy(source_key, key)
+    return True
@@ -1,3 +1,4 @@
+from enum import StrEnum
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -9,4 +10,24 @@ class SnapshotDTO(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class SnapshotJobStatus(StrEnum):
+    """
+    The lifecycle states of a snapshot job.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class SnapshotJobDTO(BaseModel):
+    """
+    Data Transfer Object for the state of a background snapshot job.
+    """
+    job_id: str
+    status: SnapshotJobStatus
+    snapshot_id: int | None = None
+    error: str | None = None
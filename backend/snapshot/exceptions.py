@@ -0,0 +1,9 @@
+from backend.libs.exceptions import NotFound
+
+class SnapshotNotFound(NotFound):
+    """Raised when a snapshot does not exist in the room."""
+    pass
+
+class SnapshotJobNotFound(NotFound):
+    """Raised when a snapshot job does not exist or has expired."""
+    pass
@@ -0,0 +1,318 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from redis.asyncio import Redis
+
+from backend.collaboration.persistence import get_document_text
+from backend.collaboration.service import CollaborationService
+from backend.config.database.engine import db_helper
+from backend.config.snapshot import snapshot_settings
+from backend.libs.exceptions import ExecutorOverloaded
+from backend.libs.executor import BoundedExecutor
+from backend.redis_client.client import get_redis_client
+from backend.room.archive import ExportedFile, stream_archive
+from backend.room.dto import ArchiveFormat
+from backend.snapshot.blobs import hash_object, write_blob
+from backend.snapshot.dto import SnapshotJobDTO, SnapshotJobStatus
+from backend.snapshot.models.snapshot import SnapshotModel
+from backend.snapshot.repositories.snapshot import SnapshotRepository
+from backend.storage.base import Storage
+from backend.storage.client import get_storage
+from backend.storage.keys import blob_key, snapshot_archive_key
+
+# Статус задачи снимка (hash): status, room_id, snapshot_id, error
+SNAPSHOT_JOB_KEY = "snapshot_job:{job_id}"
+# Собранные из блобов архивы снимков (sorted set): snapshot_id -> время последнего скачивания
+SNAPSHOT_ARCHIVES_KEY = "snapshot_archives"
+
+# (original_name, storage_key, content_hash, size_bytes) файла комнаты
+SnapshotFile = tuple[str, str, str | None, int]
+
+logger = logging.getLogger(__name__)
+
+# Разбор документов и сжатие архивов снимков выполняются в отдельном ограниченном пуле
+snapshot_executor = BoundedExecutor(
+    max_workers=snapshot_settings.SNAPSHOT_WORKERS,
+    max_queue=snapshot_settings.SNAPSHOT_MAX_PENDING_JOBS,
+    name="snapshot",
+)
+
+
+@dataclass
+class BlobEntry:
+    """
+    A file of a snapshot together with the blob that holds its content.
+
+    Attributes:
+        file_id (int): The ID of the file.
+        name (str): The original name of the file.
+        hash (str): The hex SHA-256 digest of the content.
+        size (int): The size of the content in bytes.
+        content (bytes | None): The live content of a collaborative document.
+        source_key (str | None): The stored file, for files without collaborative state.
+    """
+    file_id: int
+    name: str
+    hash: str
+    size: int
+    content: bytes | None = None
+    source_key: str | None = None
+
+    def to_manifest(self) -> dict:
+        """Returns the manifest entry of the file."""
+        return {"file_id": self.file_id, "name": self.name, "hash": self.hash, "size": self.size}
+
+
+async def prepare_blobs(storage: Storage, file_ids: list[int], files: list[SnapshotFile],
+                        states: list[bytes | None]) -> list[BlobEntry]:
+    """
+    Hashes the current content of a room's files.
+
+    Files with a collaborative state are hashed from their live text, which
+    is extracted in `snapshot_executor`. The others reuse the hash recorded
+    for their stored content, so an unchanged room is snapshotted without
+    reading its files; only files without a recorded hash are streamed
+    from storage and hashed.
+
+    Args:
+        storage (Storage): The storage holding the files.
+        file_ids (list[int]): The IDs of the room's files.
+        files (list[SnapshotFile]): The (original_name, storage_key, content_hash, size_bytes)
+            of each file.
+        states (list[bytes | None]): The merged Y state of each file, if any.
+
+    Returns:
+        list[BlobEntry]: One entry per file.
+    """
+    entries = []
+    for file_id, (original_name, storage_key, content_hash, size), state in zip(file_ids, files, states):
+        if state:
+            content = (await snapshot_executor.run(get_document_text, state)).encode("utf-8")
+            digest = hashlib.sha256(content).hexdigest()
+            entries.append(BlobEntry(file_id, original_name, digest, len(content), content=content))
+        elif content_hash:
+            entries.append(BlobEntry(file_id, original_name, content_hash, size, source_key=storage_key))
+        else:
+            digest, size = await hash_object(storage, storage_key)
+            entries.append(BlobEntry(file_id, original_name, digest, size, source_key=storage_key))
+    return entries
+
+
+async def write_blobs(storage: Storage, entries: list[BlobEntry]) -> int:
+    """
+    Stores the blobs that are not in the blob store yet, concurrently.
+
+    Args:
+        storage (Storage): The storage holding the blobs.
+        entries (list[BlobEntry]): The entries of a snapshot.
+
+    Returns:
+        int: The number of new blobs.
+    """
+    written = await asyncio.gather(*(
+        write_blob(storage, entry.hash, entry.content, entry.source_key) for entry in entries
+    ))
+    return sum(written)
+
+
+def manifest_digest(manifest: list[dict]) -> str:
+    """
+    Returns a fingerprint of a snapshot's content.
+
+    Args:
+        manifest (list[dict]): The manifest of the snapshot.
+
+    Returns:
+        str: The hex SHA-256 digest of the manifest.
+    """
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+
+async def build_archive(storage: Storage, archive_key: str, manifest: list[dict], created_at: datetime,
+                        compresslevel: int):
+    """
+    Builds the zip archive of a snapshot from its blobs.
+
+    The archive is streamed from the blobs into storage and compressed in
+    `snapshot_executor`. Every entry carries the snapshot's creation time,
+    so rebuilding an archive yields the same bytes.
+
+    Args:
+        storage (Storage): The storage holding the blobs and the archive.
+        archive_key (str): Where to store the archive.
+        manifest (list[dict]): The manifest of the snapshot.
+        created_at (datetime): The creation time of the snapshot.
+        compresslevel (int): The zlib compression level, 0 to store files uncompressed.
+    """
+    async def blobs():
+        for entry in manifest:
+            # Добавляем файл в архив под его оригинальным именем
+            yield ExportedFile(entry["name"], created_at, storage_key=blob_key(entry["hash"]), size=entry["size"])
+
+    await storage.put(
+        archive_key,
+        stream_archive(blobs(), storage, ArchiveFormat.ZIP, compresslevel, executor=snapshot_executor),
+    )
+
+
+class SnapshotJobManager:
+    """
+    Runs snapshot creation as background jobs.
+
+    Submitting a job only records it in Redis as pending and returns its ID.
+    The job's status is kept in Redis for SNAPSHOT_JOB_TTL_SECONDS so that
+    any worker can report it.
+
+    A snapshot is a manifest of content-addressed blobs: every file version
+    is stored once under its SHA-256 hash, so a snapshot only writes the
+    files that changed since any earlier snapshot. Unchanged files are
+    copied into the blob store inside the storage backend. The zip archive
+    of a snapshot is only built when it is first downloaded.
+    """
+    def __init__(self):
+        """Initializes the manager with no running jobs."""
+        self.redis: Redis = get_redis_client()
+        self.collaboration_service = CollaborationService()
+        self.storage = get_storage()
+        self._tasks: set[asyncio.Task] = set()
+        self._archive_locks: dict[int, asyncio.Lock] = {}
+
+    async def submit(self, room_pk: int, room_id: str, file_ids: list[int],
+                     files: list[SnapshotFile]) -> SnapshotJobDTO:
+        """
+        Starts building a snapshot of a room in the background.
+
+        Args:
+            room_pk (int): The primary key of the room.
+            room_id (str): The human-readable ID of the room.
+            file_ids (list[int]): The IDs of the room's files.
+            files (list[SnapshotFile]): The (original_name, storage_key, content_hash, size_bytes)
+                of each file.
+
+        Returns:
+            SnapshotJobDTO: The pending job.
+
+        Raises:
+            ExecutorOverloaded: If this worker already has SNAPSHOT_MAX_PENDING_JOBS jobs.
+        """
+        if len(self._tasks) >= snapshot_settings.SNAPSHOT_MAX_PENDING_JOBS:
+            raise ExecutorOverloaded("Too many snapshots are being created, try again later.")
+
+        job_id = uuid.uuid4().hex
+        await self._set_status(job_id, SnapshotJobStatus.PENDING, room_id=room_id)
+        task = asyncio.create_task(self._run(job_id, room_pk, room_id, file_ids, files))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return SnapshotJobDTO(job_id=job_id, status=SnapshotJobStatus.PENDING)
+
+    async def get(self, room_id: str, job_id: str) -> SnapshotJobDTO | None:
+        """
+        Returns the state of a job of the given room.
+
+        Args:
+            room_id (str): The human-readable ID of the room.
+            job_id (str): The ID of the job.
+
+        Returns:
+            SnapshotJobDTO | None: The job, or None if it does not exist, has
+                expired or belongs to another room.
+        """
+        job = await self.redis.hgetall(SNAPSHOT_JOB_KEY.format(job_id=job_id))
+        if not job or job[b"room_id"].decode() != room_id:
+            return None
+        snapshot_id = job.get(b"snapshot_id")
+        error = job.get(b"error")
+        return SnapshotJobDTO(
+            job_id=job_id,
+            status=SnapshotJobStatus(job[b"status"].decode()),
+            snapshot_id=int(snapshot_id) if snapshot_id else None,
+            error=error.decode() if error else None,
+        )
+
+    async def ensure_archive(self, snapshot_repo: SnapshotRepository, snapshot: SnapshotModel) -> str:
+        """
+        Returns the storage key of a snapshot's archive, building the archive if it is missing.
+
+        Concurrent requests for the same snapshot wait for a single build and
+        reuse its result. Builds are deterministic and stored atomically, so a
+        build racing on another worker only repeats the work. Every download
+        of an archive built from blobs is recorded in SNAPSHOT_ARCHIVES_KEY,
+        so that archives nobody downloads any more can be evicted.
+
+        Args:
+            snapshot_repo (SnapshotRepository): The repository to record the archive with.
+            snapshot (SnapshotModel): The snapshot.
+
+        Returns:
+            str: The storage key of the archive.
+
+        Raises:
+            ExecutorOverloaded: If the archive has to be built and the executor is full.
+        """
+        if not snapshot.manifest and snapshot.archive_key is not None:
+            # Снимок без манифеста создан до появления блобов: его архив - единственная копия
+            return snapshot.archive_key
+        await self.redis.zadd(SNAPSHOT_ARCHIVES_KEY, {str(snapshot.id): time.time()})
+        if snapshot.archive_key is not None and await self.storage.size(snapshot.archive_key) is not None:
+            return snapshot.archive_key
+
+        archive_key = snapshot_archive_key(snapshot.id)
+        lock = self._archive_locks.setdefault(snapshot.id, asyncio.Lock())
+        try:
+            async with lock:
+                # Архив мог собрать другой запрос, пока мы ждали блокировку
+                if await self.storage.size(archive_key) is None:
+                    await build_archive(
+                        self.storage,
+                        archive_key,
+                        snapshot.manifest,
+                        snapshot.created_at,
+                        snapshot_settings.SNAPSHOT_COMPRESSION_LEVEL,
+                    )
+        finally:
+            if not lock.locked():
+                self._archive_locks.pop(snapshot.id, None)
+        if snapshot.archive_key != archive_key:
+            await snapshot_repo.set_archive_key(snapshot.id, archive_key)
+        return archive_key
+
+    async def stop(self):
+        """Waits for the jobs that are still running."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job_id: str, room_pk: int, room_id: str, file_ids: list[int],
+                   files: list[SnapshotFile]):
+        try:
+            await self._set_status(job_id, SnapshotJobStatus.RUNNING)
+            states = await self.collaboration_service.load_document_states(
+                [(room_id, str(file_id)) for file_id in file_ids]
+            )
+            entries = await prepare_blobs(self.storage, file_ids, files, states)
+            manifest = [entry.to_manifest() for entry in entries]
+            async with db_helper.session_factory() as session:
+                snapshot_repo = SnapshotRepository(session)
+                await snapshot_repo.reference_blobs(manifest)
+                # Блобы записываются до фиксации, пока их строки заблокированы от сборщика мусора
+                await write_blobs(self.storage, entries)
+                snapshot = await snapshot_repo.create(room_pk, manifest)
+            await self._set_status(job_id, SnapshotJobStatus.DONE, snapshot_id=snapshot.id)
+        except Exception as e:
+            logger.error(f"Snapshot job {job_id} for room {room_id} failed: {e}")
+            await self._set_status(job_id, SnapshotJobStatus.FAILED, error=str(e))
+
+    async def _set_status(self, job_id: str, status: SnapshotJobStatus, **fields):
+        key = SNAPSHOT_JOB_KEY.format(job_id=job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"status": status.value, **fields})
+            pipe.expire(key, snapshot_settings.SNAPSHOT_JOB_TTL_SECONDS)
+            await pipe.execute()
+
+# Один экземпляр на процесс: задачи выполняются в процессе, принявшем запрос
+snapshot_job_manager = SnapshotJobManager()
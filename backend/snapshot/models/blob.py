@@ -0,0 +1,21 @@
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.libs.base_model import Base
+
+class BlobModel(Base):
+    """
+    SQLAlchemy model for a content-addressed blob referenced by snapshots.
+
+    Every distinct file content is stored once, under its SHA-256 hash.
+
+    Attributes:
+        hash (Mapped[str]): The hex SHA-256 digest of the content.
+        size_bytes (Mapped[int]): The size of the content in bytes.
+        ref_count (Mapped[int]): How many snapshot manifest entries reference the blob.
+    """
+    __tablename__ = "blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
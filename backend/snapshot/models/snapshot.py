@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import JSON, String, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.libs.base_model import Base
@@ -8,16 +8,21 @@ class SnapshotModel(Base):
     SQLAlchemy model for a room snapshot.
 
     A snapshot represents a point-in-time backup of all files in a room,
-    stored as a single archive file.
+    stored as a manifest of content-addressed blobs.
 
     Attributes:
-        archive_path (Mapped[str]): The path to the snapshot's .zip archive file.
+        manifest (Mapped[list[dict]]): One {"file_id", "name", "hash", "size"} entry per file.
+        archive_key (Mapped[str | None]): The storage key of the snapshot's .zip
+            archive, once it has been built from the manifest.
         room_id (Mapped[int]): The ID of the room this snapshot belongs to.
         room (Mapped["RoomModel"]): Relationship to the parent room.
     """
     __tablename__ = "snapshots"
+    # Страницы снимков комнаты читаются по ключу (room_id, id) без сортировки
+    __table_args__ = (Index("ix_snapshots_room_id_id", "room_id", "id"),)
 
-    archive_path: Mapped[str] = mapped_column(String(512), nullable=False, unique=True)
+    manifest: Mapped[list[dict]] = mapped_column(JSON, nullable=False, default=list)
+    archive_key: Mapped[str | None] = mapped_column(String(512), nullable=True, unique=True)
     room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"))
 
     room: Mapped["RoomModel"] = relationship(back_populates="snapshots")
\ No newline at end of file
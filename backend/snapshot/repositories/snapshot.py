@@ -1,4 +1,11 @@
+from collections import Counter
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
 from backend.config.database.session import ISession
+from backend.room.models.room import RoomModel
+from backend.snapshot.models.blob import BlobModel
 from backend.snapshot.models.snapshot import SnapshotModel
 
 
@@ -7,19 +14,102 @@ class SnapshotRepository:
     def __init__(self, session: ISession):
         self.session = session
 
-    async def create(self, room_id: int, archive_path: str) -> SnapshotModel:
+    async def create(self, room_id: int, manifest: list[dict]) -> SnapshotModel:
         """
         Creates a new snapshot record in the database.
 
         Args:
             room_id (int): The ID of the room being snapshotted.
-            archive_path (str): The path to the saved archive file.
+            manifest (list[dict]): The blobs that make up the snapshot, one entry per file.
 
         Returns:
             SnapshotModel: The created SQLAlchemy model instance.
         """
-        instance = SnapshotModel(room_id=room_id, archive_path=archive_path)
+        instance = SnapshotModel(room_id=room_id, manifest=manifest)
         self.session.add(instance)
         await self.session.commit()
         await self.session.refresh(instance)
-        return instance
\ No newline at end of file
+        return instance
+
+    async def list_for_room(self, room_id: int, limit: int, before_id: int | None = None) -> list[Row]:
+        """
+        Retrieves a page of a room's snapshots, newest first.
+
+        Pages are keyset-paginated on the snapshot ID, so every page costs the
+        same regardless of how deep it is. Only the listed columns are read;
+        manifests are never loaded.
+
+        Args:
+            room_id (int): The ID of the room.
+            limit (int): The maximum number of snapshots to return.
+            before_id (int | None): Return only snapshots older than this one.
+
+        Returns:
+            list[Row]: Rows with the `id` and `created_at` of each snapshot.
+        """
+        stmt = (
+            select(SnapshotModel.id, SnapshotModel.created_at)
+            .where(SnapshotModel.room_id == room_id)
+            .order_by(SnapshotModel.id.desc())
+            .limit(limit)
+        )
+        if before_id is not None:
+            stmt = stmt.where(SnapshotModel.id < before_id)
+        result = await self.session.execute(stmt)
+        return list(result.all())
+
+    async def get_for_room(self, human_readable_id: str, snapshot_id: int) -> SnapshotModel | None:
+        """
+        Retrieves a snapshot of a room.
+
+        Args:
+            human_readable_id (str): The user-friendly ID of the room.
+            snapshot_id (int): The ID of the snapshot.
+
+        Returns:
+            SnapshotModel | None: The snapshot, or None if it does not belong to the room.
+        """
+        stmt = (
+            select(SnapshotModel)
+            .join(RoomModel, SnapshotModel.room_id == RoomModel.id)
+            .where(RoomModel.human_readable_id == human_readable_id, SnapshotModel.id == snapshot_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def set_archive_key(self, snapshot_id: int, archive_key: str):
+        """
+        Records where the archive of a snapshot has been stored.
+
+        Args:
+            snapshot_id (int): The ID of the snapshot.
+            archive_key (str): The storage key of the .zip archive.
+        """
+        stmt = update(SnapshotModel).where(SnapshotModel.id == snapshot_id).values(archive_key=archive_key)
+        await self.session.execute(stmt)
+        await self.session.commit()
+
+    async def reference_blobs(self, manifest: list[dict]):
+        """
+        Registers the blobs of a manifest, incrementing the reference count of known ones.
+
+        All blobs are upserted with a single statement. The transaction is
+        left open: the referenced rows stay locked until it is committed, so
+        the garbage collector cannot remove a blob that is being reused.
+
+        Args:
+            manifest (list[dict]): The manifest entries of a new snapshot.
+        """
+        if not manifest:
+            return
+        counts = Counter(entry["hash"] for entry in manifest)
+        sizes = {entry["hash"]: entry["size"] for entry in manifest}
+        stmt = insert(BlobModel).values([
+            {"hash": digest, "size_bytes": sizes[digest], "ref_count": count}
+            for digest, count in sorted(counts.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BlobModel.hash],
+            set_={"ref_count": BlobModel.ref_count + stmt.excluded.ref_count, "updated_at": func.now()},
+        )
+        await self.session.execute(stmt)
@@ -0,0 +1,99 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+# Размер блока при чтении объектов
+CHUNK_SIZE = 1024 * 1024
+
+
+class Storage(ABC):
+    """
+    An asynchronous key-value store for file contents.
+
+    Keys are relative, `/`-separated names whose first segment is a
+    namespace (see `backend.storage.keys`). Writing an object replaces it
+    atomically: readers see either the old or the new content, never a
+    partial write.
+    """
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes | AsyncIterator[bytes]) -> int:
+        """
+        Stores an object, replacing any object with the same key.
+
+        Args:
+            key (str): The key of the object.
+            data (bytes | AsyncIterator[bytes]): The content, or a stream of it
+                that is consumed as it is stored.
+
+        Returns:
+            int: The size of the stored object in bytes.
+        """
+
+    @abstractmethod
+    def get(self, key: str, start: int = 0, end: int | None = None,
+            chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Streams the content of an object, or a byte range of it.
+
+        Args:
+            key (str): The key of the object.
+            start (int): The offset of the first byte to read.
+            end (int | None): The offset after the last byte to read; None reads to the end.
+            chunk_size (int): The maximum size of a yielded chunk.
+
+        Yields:
+            bytes: The next chunk of the content.
+
+        Raises:
+            StorageObjectNotFound: If the object does not exist.
+        """
+
+    @abstractmethod
+    async def size(self, key: str) -> int | None:
+        """
+        Returns the size of an object in bytes, or None if it does not exist.
+        """
+
+    @abstractmethod
+    async def copy(self, source_key: str, key: str):
+        """
+        Copies an object within the storage without passing it through the application.
+
+        Raises:
+            StorageObjectNotFound: If the source object does not exist.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """
+        Deletes an object; deleting a missing object is not an error.
+        """
+
+    @abstractmethod
+    async def delete_many(self, keys: list[str]):
+        """
+        Deletes many objects with as few requests as the backend allows.
+
+        Args:
+            keys (list[str]): The keys to delete; missing objects are ignored.
+        """
+
+    async def read(self, key: str) -> bytes:
+        """
+        Reads a whole object into memory; meant for small objects only.
+
+        Raises:
+            StorageObjectNotFound: If the object does not exist.
+        """
+        return b"".join([chunk async for chunk in self.get(key)])
+
+    def local_path(self, key: str) -> str | None:
+        """
+        Returns the file that holds an object, if the backend keeps objects on the local disk.
+
+        Lets downloads be sent with `sendfile` instead of being streamed through Python.
+        """
+        return None
+
+    async def close(self):
+        """Releases the backend's connections."""
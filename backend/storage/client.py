@@ -0,0 +1,32 @@
+from backend.config.storage import storage_settings
+from backend.storage.base import Storage
+from backend.storage.local import LocalStorage
+from backend.storage.s3 import S3Storage
+
+
+def _create_storage() -> Storage:
+    if storage_settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=storage_settings.S3_BUCKET,
+            endpoint_url=storage_settings.S3_ENDPOINT_URL,
+            region=storage_settings.S3_REGION,
+            access_key_id=storage_settings.S3_ACCESS_KEY_ID,
+            secret_access_key=storage_settings.S3_SECRET_ACCESS_KEY,
+            part_size=storage_settings.S3_MULTIPART_PART_SIZE_MB * 1024 * 1024,
+        )
+    return LocalStorage(storage_settings.STORAGE_LOCAL_ROOT, storage_settings.STORAGE_LOCAL_WORKERS)
+
+storage = _create_storage()
+
+def get_storage() -> Storage:
+    """
+    Provides the storage backend selected by STORAGE_BACKEND.
+
+    Every service stores file contents, blobs and archives through this
+    instance, so application nodes do not need a shared disk when the
+    S3 backend is used.
+
+    Returns:
+        Storage: The process-wide storage backend.
+    """
+    return storage
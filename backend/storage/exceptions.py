@@ -0,0 +1,5 @@
+from backend.libs.exceptions import NotFound
+
+class StorageObjectNotFound(NotFound):
+    """Raised when an object does not exist in the storage backend."""
+    pass
@@ -0,0 +1,27 @@
+import uuid
+
+# Пространства ключей хранилища:
+#   files/<uuid>                  - содержимое файлов комнат (и <key>.ydoc - состояние Y-документа)
+#   blobs/<sha256>                - неизменяемые блобы снимков
+#   snapshots/snapshot-<id>.zip   - собранные архивы снимков
+#   uploads/<upload_id>/<offset>  - принятые фрагменты незавершенных загрузок
+
+
+def new_file_key() -> str:
+    """Returns a fresh key for the content of a room file."""
+    return f"files/{uuid.uuid4()}"
+
+
+def blob_key(digest: str) -> str:
+    """Returns the key of the blob with the given hex SHA-256 digest."""
+    return f"blobs/{digest}"
+
+
+def snapshot_archive_key(snapshot_id: int) -> str:
+    """Returns the key of a snapshot's zip archive."""
+    return f"snapshots/snapshot-{snapshot_id}.zip"
+
+
+def upload_part_key(upload_id: str, offset: int) -> str:
+    """Returns the key of the chunk of an upload that starts at `offset`."""
+    return f"uploads/{upload_id}/{offset:012d}"
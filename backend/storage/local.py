@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator
+
+import aiofiles
+import aiofiles.os
+
+from backend.storage.base import CHUNK_SIZE, Storage
+from backend.storage.exceptions import StorageObjectNotFound
+
+
+def _remove_file(path: str):
+    """Removes a file from disk, ignoring files that are already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _copy_file(source_path: str, path: str):
+    """Copies a file through a temporary file so readers never see a partial copy."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_file(tmp_path)
+        raise
+
+
+class LocalStorage(Storage):
+    """
+    Stores objects as files under a root directory.
+
+    The first segment of a key selects a directory of the root; below it,
+    objects are spread over 65536 directories by the SHA-256 of the key
+    (`files/ab/cd/<name>`), so no directory grows to millions of entries.
+    """
+    def __init__(self, root: str, workers: int):
+        """
+        Initializes the storage.
+
+        Args:
+            root (str): The directory that holds all objects.
+            workers (int): The number of threads for copies and bulk deletes.
+        """
+        self.root = Path(root)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage")
+
+    def path(self, key: str) -> Path:
+        """
+        Returns the file that holds an object.
+
+        Raises:
+            ValueError: If the key is not a relative key inside a namespace.
+        """
+        namespace, _, name = key.partition("/")
+        if not namespace or not name or ".." in key.split("/"):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.root / namespace / digest[:2] / digest[2:4] / name
+
+    def local_path(self, key: str) -> str | None:
+        return str(self.path(key))
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def put(self, key: str, data: bytes | AsyncIterator[bytes]) -> int:
+        path = self.path(key)
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out_file:
+                if isinstance(data, bytes):
+                    await out_file.write(data)
+                    size = len(data)
+                else:
+                    async for chunk in data:
+                        await out_file.write(chunk)
+                        size += len(chunk)
+            await aiofiles.os.replace(tmp_path, path)
+        except BaseException:
+            # Не оставляем на диске недописанный файл
+            await self._run(_remove_file, tmp_path)
+            raise
+        return size
+
+    async def get(self, key: str, start: int = 0, end: int | None = None,
+                  chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            in_file = await aiofiles.open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise StorageObjectNotFound(f"The object {key} does not exist.") from None
+        try:
+            if start:
+                await in_file.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                chunk = await in_file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await in_file.close()
+
+    async def size(self, key: str) -> int | None:
+        try:
+            return (await aiofiles.os.stat(self.path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def copy(self, source_key: str, key: str):
+        path = self.path(key)
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        try:
+            await self._run(_copy_file, str(self.path(source_key)), str(path))
+        except FileNotFoundError:
+            raise StorageObjectNotFound(f"The object {source_key} does not exist.") from None
+
+    async def delete(self, key: str):
+        await self._run(_remove_file, str(self.path(key)))
+
+    async def delete_many(self, keys: list[str]):
+        # Файлы удаляются параллельно в пуле потоков
+        await asyncio.gather(*(self._run(_remove_file, str(self.path(key))) for key in keys))
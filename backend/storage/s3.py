@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
+
+from backend.storage.base import CHUNK_SIZE, Storage
+from backend.storage.exceptions import StorageObjectNotFound
+
+# Максимальное число ключей в одном запросе DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _is_not_found(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Storage(Storage):
+    """
+    Stores objects in an S3-compatible object store (AWS S3, MinIO, ...).
+
+    Uses `aiobotocore`, imported only when this backend is selected.
+    Streams are stored with a multipart upload of `part_size` parts, so an
+    object is never held in memory as a whole; content smaller than one
+    part is sent with a single PUT. One client, and so one connection pool,
+    is shared by the process.
+    """
+    def __init__(self, bucket: str, endpoint_url: str | None, region: str,
+                 access_key_id: str | None, secret_access_key: str | None, part_size: int):
+        """
+        Initializes the storage; the connection is opened on first use.
+
+        Args:
+            bucket (str): The bucket that holds all objects.
+            endpoint_url (str | None): The URL of an S3-compatible server, or None for AWS S3.
+            region (str): The region of the bucket.
+            access_key_id (str | None): The access key, or None to use the default credential chain.
+            secret_access_key (str | None): The secret key.
+            part_size (int): The size of a multipart upload part in bytes.
+
+        Raises:
+            RuntimeError: If aiobotocore is not installed.
+        """
+        try:
+            from aiobotocore.session import get_session
+        except ImportError as e:
+            raise RuntimeError("The s3 storage backend requires the aiobotocore package.") from e
+        self.bucket = bucket
+        self.part_size = part_size
+        self._session = get_session()
+        self._client_options = {
+            "endpoint_url": endpoint_url,
+            "region_name": region,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+        }
+        self._client = None
+        self._exit_stack = AsyncExitStack()
+        self._client_lock = asyncio.Lock()
+
+    async def _get_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await self._exit_stack.enter_async_context(
+                        self._session.create_client("s3", **self._client_options)
+                    )
+        return self._client
+
+    async def put(self, key: str, data: bytes | AsyncIterator[bytes]) -> int:
+        client = await self._get_client()
+        if isinstance(data, bytes):
+            await client.put_object(Bucket=self.bucket, Key=key, Body=data)
+            return len(data)
+
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            async for chunk in data:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        response = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+                        upload_id = response["UploadId"]
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1,
+                                                         bytes(buffer[:self.part_size])))
+                    del buffer[:self.part_size]
+
+            if upload_id is None:
+                # Объект меньше одной части: хватает обычного PUT
+                await client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer))
+                return size
+            if buffer:
+                parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            if upload_id is not None:
+                # Иначе загруженные части продолжают занимать место в бакете
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return size
+
+    async def _upload_part(self, client, key: str, upload_id: str, number: int, body: bytes) -> dict:
+        response = await client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    async def get(self, key: str, start: int = 0, end: int | None = None,
+                  chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        if end is not None and end <= start:
+            return
+        client = await self._get_client()
+        options = {}
+        if start or end is not None:
+            options["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            response = await client.get_object(Bucket=self.bucket, Key=key, **options)
+        except client.exceptions.ClientError as e:
+            if _is_not_found(e):
+                raise StorageObjectNotFound(f"The object {key} does not exist.") from None
+            raise
+        async with response["Body"] as stream:
+            async for chunk in stream.iter_chunks(chunk_size):
+                yield chunk
+
+    async def size(self, key: str) -> int | None:
+        client = await self._get_client()
+        try:
+            response = await client.head_object(Bucket=self.bucket, Key=key)
+        except client.exceptions.ClientError as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return response["ContentLength"]
+
+    async def copy(self, source_key: str, key: str):
+        client = await self._get_client()
+        try:
+            await client.copy_object(
+                Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": source_key}
+            )
+        except client.exceptions.ClientError as e:
+            if _is_not_found(e):
+                raise StorageObjectNotFound(f"The object {source_key} does not exist.") from None
+            raise
+
+    async def delete(self, key: str):
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+
+    async def delete_many(self, keys: list[str]):
+        client = await self._get_client()
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = await client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            for error in response.get("Errors", []):
+                logger.warning(f"Failed to delete {error.get('Key')} from storage: {error.get('Message')}")
+
+    async def close(self):
+        await self._exit_stack.aclose()
+        self._client = None
@@ -0,0 +1,6 @@
+
+class LeaseLost(Exception):
+    """
+    Raised when a job's leadership lease has expired or was taken over by another instance.
+    """
+    pass
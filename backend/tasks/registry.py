@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from backend.config.tasks import task_settings
+from backend.redis_client.client import get_redis_client
+from backend.tasks.exceptions import LeaseLost
+
+logger = logging.getLogger(__name__)
+
+# Ключ блокировки лидера задачи и монотонный счетчик fencing-токенов
+JOB_LOCK_KEY = "job:{name}:lock"
+JOB_FENCE_KEY = "job:{name}:fence"
+
+# Продлевает/снимает блокировку, только если она все еще принадлежит нам
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class JobLease:
+    """
+    Leadership of a periodic job held by this process.
+
+    Attributes:
+        name (str): The name of the job.
+        token (str): The random value stored in the lock, unique to this holder.
+        fencing_token (int): A number that grows with every new leader of the job.
+        lost (bool): True once the lease could not be renewed.
+    """
+    def __init__(self, redis: Redis, name: str, token: str, fencing_token: int):
+        self.redis = redis
+        self.name = name
+        self.token = token
+        self.fencing_token = fencing_token
+        self.lost = False
+
+    async def ensure_valid(self):
+        """
+        Verifies that this process is still the job's leader.
+
+        Jobs call this before destructive steps: a newer leader has a larger
+        fencing token, so a paused former leader stops instead of racing it.
+
+        Raises:
+            LeaseLost: If the lease expired or another instance became the leader.
+        """
+        if self.lost:
+            raise LeaseLost(f"Lease for job '{self.name}' was lost.")
+        current = await self.redis.get(JOB_FENCE_KEY.format(name=self.name))
+        if current is None or int(current) != self.fencing_token:
+            self.lost = True
+            raise LeaseLost(f"Job '{self.name}' has a newer leader.")
+
+
+@dataclass
+class PeriodicJob:
+    """
+    A job that runs every `interval_seconds` on exactly one instance.
+
+    Attributes:
+        name (str): A unique name, used for the Redis lock.
+        interval_seconds (float): The pause between two runs.
+        func (Callable[[JobLease], Awaitable[None]]): The job body; receives the current lease.
+    """
+    name: str
+    interval_seconds: float
+    func: Callable[[JobLease], Awaitable[None]]
+
+
+class JobScheduler:
+    """
+    Runs registered periodic jobs with Redis-based leader election.
+
+    Every process competes for each job's lock; the winner renews its lease
+    in the background and runs the job at its interval, while the others
+    keep retrying in case the leader dies. A leader that fails to renew
+    stops its job immediately.
+    """
+    def __init__(self, lease_seconds: int = task_settings.JOB_LEASE_SECONDS):
+        """
+        Initializes the scheduler.
+
+        Args:
+            lease_seconds (int): How long a lease is valid without renewal.
+        """
+        self.redis: Redis = get_redis_client()
+        self.lease_seconds = lease_seconds
+        self.jobs: dict[str, PeriodicJob] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._renew = self.redis.register_script(_RENEW_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+
+    def register(self, job: PeriodicJob):
+        """
+        Adds a job to the registry. Must be called before `start`.
+
+        Args:
+            job (PeriodicJob): The job to register.
+        """
+        if job.name in self.jobs:
+            raise ValueError(f"Job '{job.name}' is already registered.")
+        self.jobs[job.name] = job
+
+    async def start(self):
+        """Starts competing for the leadership of every registered job."""
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._run(job)))
+
+    async def stop(self):
+        """Stops all jobs and releases the leases held by this process."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _acquire(self, name: str) -> JobLease | None:
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(
+            JOB_LOCK_KEY.format(name=name), token, nx=True, px=self.lease_seconds * 1000
+        )
+        if not acquired:
+            return None
+        fencing_token = await self.redis.incr(JOB_FENCE_KEY.format(name=name))
+        return JobLease(self.redis, name, token, fencing_token)
+
+    async def _run(self, job: PeriodicJob):
+        retry_seconds = self.lease_seconds / 2
+        while True:
+            try:
+                lease = await self._acquire(job.name)
+            except Exception as e:
+                logger.error(f"Failed to acquire the lease for job '{job.name}': {e}")
+                lease = None
+
+            if lease is None:
+                await asyncio.sleep(retry_seconds)
+                continue
+
+            logger.info(f"Became the leader for job '{job.name}' (fencing token {lease.fencing_token}).")
+            lead_task = asyncio.create_task(self._lead(job, lease))
+            renew_task = asyncio.create_task(self._keep_alive(lease))
+            try:
+                await asyncio.wait({lead_task, renew_task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                lead_task.cancel()
+                renew_task.cancel()
+                await asyncio.gather(lead_task, renew_task, return_exceptions=True)
+                await self._release_lease(lease)
+            logger.warning(f"Lost the lease for job '{job.name}'.")
+
+    async def _lead(self, job: PeriodicJob, lease: JobLease):
+        while True:
+            try:
+                await job.func(lease)
+            except LeaseLost:
+                return
+            except Exception as e:
+                logger.error(f"An error occurred in job '{job.name}': {e}")
+            await asyncio.sleep(job.interval_seconds)
+
+    async def _keep_alive(self, lease: JobLease):
+        key = JOB_LOCK_KEY.format(name=lease.name)
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self._renew(keys=[key], args=[lease.token, self.lease_seconds * 1000])
+            except Exception as e:
+                logger.error(f"Failed to renew the lease for job '{lease.name}': {e}")
+                renewed = 0
+            if not renewed:
+                lease.lost = True
+                return
+
+    async def _release_lease(self, lease: JobLease):
+        try:
+            await self._release(keys=[JOB_LOCK_KEY.format(name=lease.name)], args=[lease.token])
+        except Exception as e:
+            logger.error(f"Failed to release the lease for job '{lease.name}': {e}")
+
+# Один планировщик на процесс; задачи регистрируются в backend.tasks.scheduler
+job_scheduler = JobScheduler()
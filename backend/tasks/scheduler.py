@@ -1,30 +1,109 @@
 import asyncio
 import logging
 
+from backend.collaboration.activity import activity_tracker
+from backend.collaboration.documents import document_manager
+from backend.collaboration.persistence import document_persister
+from backend.collaboration.service import CollaborationService
+from backend.config.collaboration import collaboration_settings
 from backend.config.database.engine import db_helper
 from backend.config.tasks import task_settings
+from backend.tasks.registry import JobLease, PeriodicJob, job_scheduler
 from backend.tasks.service import CleanupService
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-async def scheduled_cleanup_task():
+async def cleanup_job(lease: JobLease):
     """
-    A long-running task that periodically cleans up expired rooms.
+    Periodic job that cleans up expired rooms, abandoned uploads and idle snapshot archives.
 
-    This function runs in an infinite loop, calling the CleanupService
-    at a configured interval. It is designed to be started once on
-    application startup.
+    Runs on a single instance across all processes and nodes; the lease is
+    checked before every deletion chunk.
+
+    Args:
+        lease (JobLease): The leadership lease of this job.
+    """
+    async with db_helper.session_factory() as session:
+        cleanup_service = CleanupService(session)
+        logging.info("Running scheduled cleanup of expired rooms.")
+        deleted = await cleanup_service.find_and_delete_expired_rooms(lease)
+        await lease.ensure_valid()
+        stale_uploads = await cleanup_service.delete_stale_uploads()
+        await lease.ensure_valid()
+        archives = await cleanup_service.evict_snapshot_archives()
+        logging.info(
+            f"Cleanup finished, {deleted} rooms, {stale_uploads} abandoned uploads "
+            f"and {archives} idle snapshot archives deleted."
+        )
+
+
+async def compaction_job(lease: JobLease):
+    """
+    Periodic job that compacts Y document update logs.
+
+    Documents whose oldest uncompacted update is older than
+    YDOC_COMPACT_MAX_AGE_SECONDS are merged into a single encoded state.
+    Size-triggered compaction happens inline when updates are appended.
+
+    Args:
+        lease (JobLease): The leadership lease of this job.
+    """
+    compacted = await CollaborationService().compact_stale_documents()
+    if compacted:
+        logging.info(f"Compacted {compacted} document update logs.")
+
+
+job_scheduler.register(PeriodicJob("cleanup", task_settings.CLEANUP_INTERVAL_SECONDS, cleanup_job))
+job_scheduler.register(
+    PeriodicJob("compaction", collaboration_settings.YDOC_COMPACT_INTERVAL_SECONDS, compaction_job)
+)
+
+
+async def scheduled_activity_flush_task():
+    """
+    A long-running task that periodically flushes room activity to Redis.
+
+    All rooms touched since the previous flush are written with a single
+    command, at most once every ACTIVITY_FLUSH_INTERVAL_SECONDS. Activity is
+    kept in each process's memory, so this task runs in every worker.
     """
-    logging.info("Cleanup scheduler started.")
     while True:
+        await asyncio.sleep(collaboration_settings.ACTIVITY_FLUSH_INTERVAL_SECONDS)
         try:
-            async with db_helper.get_db_session() as session:
-                cleanup_service = CleanupService(session)
-                logging.info("Running scheduled cleanup of expired rooms.")
-                await cleanup_service.find_and_delete_expired_rooms()
-                logging.info("Cleanup finished.")
+            await activity_tracker.flush()
         except Exception as e:
-            logging.error(f"An error occurred during cleanup: {e}")
+            logging.error(f"An error occurred while flushing room activity: {e}")
+
 
-        await asyncio.sleep(task_settings.CLEANUP_INTERVAL_SECONDS)
\ No newline at end of file
+async def scheduled_document_eviction_task():
+    """
+    A long-running task that hibernates idle in-memory documents.
+
+    Documents are held per process, so this task runs in every worker.
+    """
+    while True:
+        await asyncio.sleep(collaboration_settings.YDOC_EVICTION_INTERVAL_SECONDS)
+        try:
+            evicted = document_manager.evict_idle()
+            if evicted:
+                logging.info(f"Evicted {evicted} idle documents from memory.")
+        except Exception as e:
+            logging.error(f"An error occurred while evicting idle documents: {e}")
+
+
+async def scheduled_document_persist_task():
+    """
+    A long-running task that periodically writes edited documents to disk.
+
+    Documents are marked dirty in the memory of the process that received
+    the edits, so this task runs in every worker.
+    """
+    while True:
+        await asyncio.sleep(collaboration_settings.YDOC_PERSIST_INTERVAL_SECONDS)
+        try:
+            persisted = await document_persister.flush()
+            if persisted:
+                logging.info(f"Persisted {persisted} documents to disk.")
+        except Exception as e:
+            logging.error(f"An error occurred while persisting documents: {e}")
\ No newline at end of file
@@ -1,19 +1,40 @@
-import os
-from pathlib import Path
+import time
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Integer, any_, bindparam, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 
+from backend.collaboration.activity import ROOM_ACTIVITY_KEY
+from backend.collaboration.persistence import YDOC_STATE_SUFFIX
+from backend.collaboration.service import YDOC_KEY, YDOC_PENDING_KEY, YDOC_UPDATES_KEY
 from backend.config.database.session import ISession
+from backend.config.files import file_settings
+from backend.config.snapshot import snapshot_settings
 from backend.config.tasks import task_settings
+from backend.file.service import UPLOAD_KEY, UPLOAD_PARTS_KEY, UPLOADS_ACTIVE_KEY
+from backend.file.models.file_metadata import FileMetadataModel
 from backend.room.models.room import RoomModel
+from backend.room.models.room_participant import RoomParticipantModel
+from backend.snapshot.jobs import SNAPSHOT_ARCHIVES_KEY
+from backend.snapshot.models.blob import BlobModel
+from backend.snapshot.models.snapshot import SnapshotModel
 from backend.redis_client.client import get_redis_client
+from backend.storage.client import get_storage
+from backend.storage.keys import blob_key
+from backend.tasks.registry import JobLease
 
 
 class CleanupService:
     """
     Provides services for cleaning up expired and inactive rooms.
+
+    Rooms are expired in chunks of CLEANUP_BATCH_SIZE: each chunk is removed
+    with set-based DELETE statements in its own transaction, and its stored
+    objects are deleted with a single bulk call to the storage backend.
+
+    Deleting a snapshot releases its references to blobs; blobs that are no
+    longer referenced by any snapshot are garbage-collected at the end.
     """
 
     def __init__(self, session: ISession):
@@ -25,99 +46,229 @@ class CleanupService:
         """
         self.session = session
         self.redis = get_redis_client()
+        self.storage = get_storage()
 
-    async def find_and_delete_expired_rooms(self):
+    async def find_and_delete_expired_rooms(self, lease: JobLease | None = None) -> int:
         """
         Finds all expired rooms and orchestrates their deletion.
 
         A room is considered expired if it was created more than
         ROOM_LIFETIME_DAYS ago, or if it has been inactive for more than
         ROOM_INACTIVITY_HOURS.
+
+        Args:
+            lease (JobLease | None): The scheduler lease; it is re-validated before
+                every chunk so a former leader never deletes concurrently with a new one.
+
+        Returns:
+            int: The number of deleted rooms.
+
+        Raises:
+            LeaseLost: If the lease is lost while rooms are being deleted.
         """
         expired_rooms = await self._get_expired_rooms()
-        for room in expired_rooms:
-            self._delete_room_files(room)
-            await self._delete_room_from_db(room)
+        batch_size = task_settings.CLEANUP_BATCH_SIZE
+        for start in range(0, len(expired_rooms), batch_size):
+            if lease is not None:
+                await lease.ensure_valid()
+            chunk = dict(expired_rooms[start:start + batch_size])
+            storage_keys, file_ids = await self._delete_rooms_from_db(list(chunk))
+            await self.storage.delete_many(storage_keys)
+            await self._delete_room_state(chunk, file_ids)
+        if expired_rooms:
+            if lease is not None:
+                await lease.ensure_valid()
+            await self.collect_unreferenced_blobs()
+        return len(expired_rooms)
 
-    async def _get_expired_rooms(self) -> list[RoomModel]:
+    async def delete_stale_uploads(self) -> int:
         """
-        Retrieves a list of expired room models from the database.
+        Deletes the received chunks of abandoned chunked uploads.
 
-        This method queries for rooms based on their creation date and
-        last activity timestamp stored in Redis.
+        An upload's state expires from Redis UPLOAD_TTL_SECONDS after its last
+        chunk; uploads that old are found with a single ZRANGEBYSCORE on the
+        index of active uploads, and their chunks are removed from storage.
 
         Returns:
-            list[RoomModel]: A list of SQLAlchemy RoomModel instances to be deleted.
+            int: The number of deleted uploads.
         """
-        now = datetime.now(timezone.utc)
-        lifetime_threshold = now - timedelta(days=task_settings.ROOM_LIFETIME_DAYS)
-        inactivity_threshold = now - timedelta(hours=task_settings.ROOM_INACTIVITY_HOURS)
+        threshold = time.time() - file_settings.UPLOAD_TTL_SECONDS
+        upload_ids = [
+            upload_id.decode()
+            for upload_id in await self.redis.zrangebyscore(UPLOADS_ACTIVE_KEY, "-inf", threshold)
+        ]
+        if not upload_ids:
+            return 0
 
-        # 1. Получаем все комнаты, устаревшие по сроку жизни
-        stmt_lifetime = (
-            select(RoomModel)
-            .options(
-                selectinload(RoomModel.files),
-                selectinload(RoomModel.snapshots)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for upload_id in upload_ids:
+                pipe.zrange(UPLOAD_PARTS_KEY.format(upload_id=upload_id), 0, -1)
+            part_keys = [key.decode() for keys in await pipe.execute() for key in keys]
+        await self.storage.delete_many(part_keys)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for upload_id in upload_ids:
+                pipe.delete(UPLOAD_KEY.format(upload_id=upload_id), UPLOAD_PARTS_KEY.format(upload_id=upload_id))
+            pipe.zrem(UPLOADS_ACTIVE_KEY, *upload_ids)
+            await pipe.execute()
+        return len(upload_ids)
+
+    async def evict_snapshot_archives(self) -> int:
+        """
+        Deletes the snapshot archives that have not been downloaded for a while.
+
+        Archives of snapshots with a manifest are only a cache of their blobs:
+        those last downloaded more than SNAPSHOT_ARCHIVE_TTL_SECONDS ago are
+        found with a single ZRANGEBYSCORE, removed from storage and rebuilt
+        on the next download. Archives of snapshots without a manifest are the
+        only copy of their content and are never evicted.
+
+        Returns:
+            int: The number of deleted archives.
+        """
+        threshold = time.time() - snapshot_settings.SNAPSHOT_ARCHIVE_TTL_SECONDS
+        snapshot_ids = [
+            int(snapshot_id)
+            for snapshot_id in await self.redis.zrangebyscore(SNAPSHOT_ARCHIVES_KEY, "-inf", threshold)
+        ]
+        if not snapshot_ids:
+            return 0
+
+        result = await self.session.execute(
+            select(SnapshotModel.id, SnapshotModel.archive_key).where(
+                SnapshotModel.id.in_(snapshot_ids),
+                SnapshotModel.archive_key.is_not(None),
+                func.json_array_length(SnapshotModel.manifest) > 0,
             )
-            .where(RoomModel.created_at < lifetime_threshold)
         )
-        result = await self.session.execute(stmt_lifetime)
-        expired_by_lifetime = list(result.scalars().all())
-        expired_ids = {room.id for room in expired_by_lifetime}
-
-        # 2. Проверяем неактивные комнаты
-        inactive_room_keys = await self.redis.keys("activity:*")
-        inactive_rooms_to_check = []
-
-        for key in inactive_room_keys:
-            last_active_str = await self.redis.get(key)
-            last_active = datetime.fromisoformat(last_active_str.decode())
-            if last_active.replace(tzinfo=timezone.utc) < inactivity_threshold:
-                room_id = int(key.decode().split(":")[1])
-                if room_id not in expired_ids:
-                    inactive_rooms_to_check.append(room_id)
-
-        if inactive_rooms_to_check:
-            stmt_inactive = (
-                select(RoomModel)
-                .options(
-                    selectinload(RoomModel.files),
-                    selectinload(RoomModel.snapshots)
-                )
-                .where(RoomModel.id.in_(inactive_rooms_to_check))
+        archives = result.all()
+        if archives:
+            await self.session.execute(
+                update(SnapshotModel)
+                .where(SnapshotModel.id.in_([row.id for row in archives]))
+                .values(archive_key=None)
             )
-            result = await self.session.execute(stmt_inactive)
-            expired_by_inactivity = list(result.scalars().all())
-            return expired_by_lifetime + expired_by_inactivity
+            await self.session.commit()
+            await self.storage.delete_many([row.archive_key for row in archives])
+        await self.redis.zrem(SNAPSHOT_ARCHIVES_KEY, *snapshot_ids)
+        return len(archives)
 
-        return expired_by_lifetime
+    async def collect_unreferenced_blobs(self) -> int:
+        """
+        Deletes the blobs that no snapshot references anymore.
+
+        The blob objects are removed before the DELETE is committed: a snapshot
+        reusing one of these blobs waits on the locked row and then writes
+        the blob again.
 
-    def _delete_room_files(self, room: RoomModel):
+        Returns:
+            int: The number of deleted blobs.
         """
-        Deletes all associated files and snapshots of a room from the disk.
+        result = await self.session.execute(
+            delete(BlobModel).where(BlobModel.ref_count <= 0).returning(BlobModel.hash)
+        )
+        digests = result.scalars().all()
+        await self.storage.delete_many([blob_key(digest) for digest in digests])
+        await self.session.commit()
+        return len(digests)
 
-        Args:
-            room (RoomModel): The room whose files are to be deleted.
+    async def _get_expired_rooms(self) -> list[tuple[int, str]]:
         """
-        for file_meta in room.files:
-            if Path(file_meta.disk_path).exists():
-                os.remove(file_meta.disk_path)
+        Retrieves the IDs of all expired rooms with a single query.
 
-        for snapshot in room.snapshots:
-            if Path(snapshot.archive_path).exists():
-                os.remove(snapshot.archive_path)
+        Inactivity is read from the Redis activity sorted set with a single
+        ZRANGEBYSCORE regardless of how many rooms exist. Index entries of
+        rooms that no longer exist are dropped along the way.
 
-    async def _delete_room_from_db(self, room: RoomModel):
+        Returns:
+            list[tuple[int, str]]: (id, human_readable_id) pairs of rooms to be deleted.
+        """
+        now = datetime.now(timezone.utc)
+        lifetime_threshold = now - timedelta(days=task_settings.ROOM_LIFETIME_DAYS)
+        inactivity_threshold = now - timedelta(hours=task_settings.ROOM_INACTIVITY_HOURS)
+
+        inactive_room_ids = [
+            room_id.decode()
+            for room_id in await self.redis.zrangebyscore(
+                ROOM_ACTIVITY_KEY, "-inf", inactivity_threshold.timestamp()
+            )
+        ]
+
+        condition = RoomModel.created_at < lifetime_threshold
+        if inactive_room_ids:
+            condition = or_(condition, RoomModel.human_readable_id.in_(inactive_room_ids))
+        stmt = select(RoomModel.id, RoomModel.human_readable_id).where(condition)
+        result = await self.session.execute(stmt)
+        expired_rooms = [(row.id, row.human_readable_id) for row in result]
+
+        stale_index_entries = set(inactive_room_ids) - {human_id for _, human_id in expired_rooms}
+        if stale_index_entries:
+            await self.redis.zrem(ROOM_ACTIVITY_KEY, *stale_index_entries)
+
+        return expired_rooms
+
+    async def _delete_rooms_from_db(self, room_ids: list[int]) -> tuple[list[str], list[tuple[int, int]]]:
         """
-        Deletes a room and all its related data from the database.
+        Deletes a chunk of rooms and all their related rows in one transaction.
 
-        Leverages `cascade="all, delete-orphan"` in model relationships to
-        automatically remove related participants, files, and snapshots.
+        Dependent rows are removed with set-based `DELETE ... WHERE room_id = ANY(...)`
+        statements instead of loading every room through the ORM.
 
         Args:
-            room (RoomModel): The room model instance to delete.
+            room_ids (list[int]): The primary keys of the rooms to delete.
+
+        Returns:
+            tuple[list[str], list[tuple[int, int]]]: The storage keys of the deleted files and
+                snapshot archives, and (room_id, file_id) pairs of the deleted files.
         """
-        await self.session.delete(room)
+        ids = any_(literal(room_ids, ARRAY(Integer)))
+
+        files_result = await self.session.execute(
+            delete(FileMetadataModel)
+            .where(FileMetadataModel.room_id == ids)
+            .returning(FileMetadataModel.room_id, FileMetadataModel.id, FileMetadataModel.storage_key)
+        )
+        deleted_files = files_result.all()
+        snapshots_result = await self.session.execute(
+            delete(SnapshotModel)
+            .where(SnapshotModel.room_id == ids)
+            .returning(SnapshotModel.archive_key, SnapshotModel.manifest)
+        )
+        deleted_snapshots = snapshots_result.all()
+        blob_refs = Counter(entry["hash"] for row in deleted_snapshots for entry in row.manifest)
+        if blob_refs:
+            blobs = BlobModel.__table__
+            await self.session.execute(
+                update(blobs)
+                .where(blobs.c.hash == bindparam("blob_hash"))
+                .values(ref_count=blobs.c.ref_count - bindparam("refs")),
+                [{"blob_hash": digest, "refs": refs} for digest, refs in sorted(blob_refs.items())],
+            )
+        await self.session.execute(delete(RoomParticipantModel).where(RoomParticipantModel.room_id == ids))
+        await self.session.execute(delete(RoomModel).where(RoomModel.id == ids))
         await self.session.commit()
-        await self.redis.delete(f"activity:{room.id}")
\ No newline at end of file
+
+        keys = [row.storage_key for row in deleted_files]
+        keys += [row.archive_key for row in deleted_snapshots if row.archive_key]
+        # Вместе с файлом удаляем сохраненное состояние его Y-документа
+        keys += [row.storage_key + YDOC_STATE_SUFFIX for row in deleted_files]
+        return keys, [(row.room_id, row.id) for row in deleted_files]
+
+    async def _delete_room_state(self, rooms: dict[int, str], file_ids: list[tuple[int, int]]):
+        """
+        Removes the activity entries and collaborative documents of deleted rooms from Redis.
+
+        Args:
+            rooms (dict[int, str]): Human-readable IDs of the deleted rooms by primary key.
+            file_ids (list[tuple[int, int]]): (room_id, file_id) pairs of the deleted files.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(ROOM_ACTIVITY_KEY, *rooms.values())
+            for room_pk, file_id in file_ids:
+                room_id = rooms[room_pk]
+                pipe.delete(
+                    YDOC_KEY.format(room_id=room_id, file_id=file_id),
+                    YDOC_UPDATES_KEY.format(room_id=room_id, file_id=file_id),
+                )
+                pipe.zrem(YDOC_PENDING_KEY, f"{room_id}:{file_id}")
+            await pipe.execute()
@@ -0,0 +1,97 @@
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from backend.config.security import auth_config
+from backend.libs.cache import TTLCache
+from backend.redis_client.client import get_redis_client
+from backend.user.dto import UserDTO
+
+# Закэшированный пользователь (без хэша пароля) в виде JSON
+USER_CACHE_KEY = "user:{user_id}"
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated users: an in-process TTL LRU backed by Redis.
+
+    The local tier has a short TTL so that invalidations made by another
+    worker (which only clear Redis and that worker's local tier) are picked
+    up quickly. Password hashes are never cached.
+    """
+    def __init__(self):
+        """Initializes both cache tiers."""
+        self.redis: Redis = get_redis_client()
+        self.local = TTLCache(
+            maxsize=auth_config.USER_CACHE_SIZE,
+            ttl=auth_config.USER_CACHE_LOCAL_TTL_SECONDS,
+        )
+
+    async def get(self, user_id: int) -> UserDTO | None:
+        """
+        Returns a cached user, refilling the local tier from Redis on a local miss.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            UserDTO | None: The cached user, or None on a miss in both tiers.
+        """
+        user = self.local.get(user_id)
+        if user is not None:
+            return user
+
+        try:
+            raw = await self.redis.get(USER_CACHE_KEY.format(user_id=user_id))
+        except RedisError:
+            # Кэш недоступен - пользователь будет загружен из БД
+            return None
+        if raw is None:
+            return None
+        user = UserDTO.model_validate_json(raw)
+        self.local.set(user_id, user)
+        return user
+
+    async def set(self, user: UserDTO) -> UserDTO:
+        """
+        Stores a user in both tiers.
+
+        Args:
+            user (UserDTO): The user loaded from the database.
+
+        Returns:
+            UserDTO: The cached copy of the user, without the password hash.
+        """
+        user = user.model_copy(update={"password": None})
+        self.local.set(user.id, user)
+        try:
+            await self.redis.set(
+                USER_CACHE_KEY.format(user_id=user.id),
+                user.model_dump_json(),
+                ex=auth_config.USER_CACHE_REDIS_TTL_SECONDS,
+            )
+        except RedisError:
+            pass
+        return user
+
+    async def invalidate(self, user_id: int):
+        """
+        Drops a user from both tiers after the user has been changed.
+
+        A Redis failure is logged instead of raised: the change is already
+        committed, and the stale entry expires with USER_CACHE_REDIS_TTL_SECONDS.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        self.local.pop(user_id)
+        try:
+            await self.redis.delete(USER_CACHE_KEY.format(user_id=user_id))
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate cached user {user_id}: {e}")
+
+# Один кэш на процесс
+user_cache = UserCache()
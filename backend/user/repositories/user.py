@@ -5,6 +5,7 @@ from sqlalchemy.exc import IntegrityError
 
 from backend.user.exceptions import UserAlreadyExist, UserNotFound
 from backend.config.database.session import ISession
+from backend.user.cache import user_cache
 from backend.user.models.user import UserModel
 from backend.user.dto import UpdateUserDTO, UserDTO, FindUserDTO
 
@@ -64,6 +65,7 @@ class UserRepository:
         instance = result.scalar_one_or_none()
         if instance is None:
             raise UserNotFound
+        await user_cache.invalidate(pk)
         return self._get_dto(instance)
 
     @staticmethod
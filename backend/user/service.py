@@ -16,7 +16,7 @@ class UserService:
         """
         Creates a new user, correctly hashing the password before saving.
         """
-        hashed_password = PasswordService.get_password_hash(dto.password)
+        hashed_password = await PasswordService.get_password_hash(dto.password)
         dto.password = hashed_password
 
         created_user = await self.repository.create(dto)
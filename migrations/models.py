@@ -2,4 +2,5 @@ from backend.user.models.user import *
 from backend.room.models.room import *
 from backend.room.models.room_participant import *
 from backend.file.models.file_metadata import *
-from backend.snapshot.models.snapshot import *
\ No newline at end of file
+from backend.snapshot.models.snapshot import *
+from backend.snapshot.models.blob import *
@@ -0,0 +1,45 @@
+"""content-addressed snapshot blobs
+
+Revision ID: 3f1c9b7d2e4a
+Revises: a7dee3b170ac
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9b7d2e4a'
+down_revision: Union[str, Sequence[str], None] = 'a7dee3b170ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id'),
+    )
+    op.create_index(op.f('ix_blobs_hash'), 'blobs', ['hash'], unique=True)
+    op.add_column('snapshots', sa.Column('manifest', sa.JSON(), server_default='[]', nullable=False))
+    op.alter_column('snapshots', 'archive_path', existing_type=sa.String(length=512), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM snapshots WHERE archive_path IS NULL")
+    op.alter_column('snapshots', 'archive_path', existing_type=sa.String(length=512), nullable=False)
+    op.drop_column('snapshots', 'manifest')
+    op.drop_index(op.f('ix_blobs_hash'), table_name='blobs')
+    op.drop_table('blobs')
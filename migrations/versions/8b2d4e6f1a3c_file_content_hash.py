@@ -0,0 +1,28 @@
+"""file content hash
+
+Revision ID: 8b2d4e6f1a3c
+Revises: 3f1c9b7d2e4a
+Create Date: 2026-10-18 02:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a3c'
+down_revision: Union[str, Sequence[str], None] = '3f1c9b7d2e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_metadata', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_metadata', 'content_hash')
@@ -0,0 +1,140 @@
+"""storage keys
+
+Revision ID: d4a9c2e7b5f1
+Revises: 8b2d4e6f1a3c
+Create Date: 2026-10-18 02:20:00.000000
+
+With STORAGE_BACKEND=local the legacy files are linked into the sharded
+layout under STORAGE_LOCAL_ROOT. The old ./storage/files, ./storage/blobs
+and ./storage/snapshots directories are left untouched, so a failed upgrade
+keeps a working installation; remove them once the upgrade has committed.
+
+STORAGE_BACKEND=s3 is refused while files exist, since they are not copied
+to the bucket. Run the upgrade with STORAGE_BACKEND=local first, then upload
+every file STORAGE_LOCAL_ROOT/<namespace>/<xx>/<yy>/<name> to the bucket
+under the key <namespace>/<name>.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c2e7b5f1'
+down_revision: Union[str, Sequence[str], None] = '8b2d4e6f1a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Каталоги, в которых файлы хранились до появления бэкендов хранилища
+LEGACY_FILES_PATH = Path("./storage/files")
+LEGACY_BLOBS_PATH = Path("./storage/blobs")
+LEGACY_SNAPSHOTS_PATH = Path("./storage/snapshots")
+
+
+def _storage_backend() -> str:
+    return os.environ.get("STORAGE_BACKEND", "local")
+
+
+def _storage_path(key: str) -> Path:
+    """Returns the file of an object in the sharded local layout: <namespace>/<xx>/<yy>/<name>."""
+    namespace, _, name = key.partition("/")
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    root = Path(os.environ.get("STORAGE_LOCAL_ROOT", "./storage"))
+    return root / namespace / digest[:2] / digest[2:4] / name
+
+
+def _link(source: Path, target: Path):
+    """
+    Makes a file available at a new path, keeping the original.
+
+    Missing files and existing targets are skipped. A hard link costs no
+    space; across file systems the file is copied through a temporary file,
+    so an interrupted run never leaves a partial target behind.
+    """
+    if not source.is_file() or target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+
+
+def _ensure_local_files(archive_column: str):
+    """
+    Refuses to migrate the files of an S3 storage, which this migration cannot reach.
+
+    Raises:
+        RuntimeError: If STORAGE_BACKEND is s3 and any row refers to a stored file.
+    """
+    if _storage_backend() != "s3":
+        return
+    has_files = op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM file_metadata) OR EXISTS (SELECT 1 FROM blobs)"
+        f" OR EXISTS (SELECT 1 FROM snapshots WHERE {archive_column} IS NOT NULL)"
+    )).scalar()
+    if has_files:
+        raise RuntimeError(
+            "Stored files are not copied between the local disk and S3. Run this migration with "
+            "STORAGE_BACKEND=local and copy the files separately: the local file "
+            "STORAGE_LOCAL_ROOT/<namespace>/<xx>/<yy>/<name> is the object <namespace>/<name> of the bucket."
+        )
+
+
+def _legacy_files() -> list[tuple[Path, str]]:
+    """Lists the legacy files of the local backend with the storage keys they are linked to."""
+    files = []
+    file_keys = op.get_bind().execute(sa.text("SELECT storage_key FROM file_metadata")).scalars()
+    for key in file_keys:
+        name = key.removeprefix("files/")
+        files.append((LEGACY_FILES_PATH / name, key))
+        files.append((LEGACY_FILES_PATH / f"{name}.ydoc", f"{key}.ydoc"))
+    for digest in op.get_bind().execute(sa.text("SELECT hash FROM blobs")).scalars():
+        files.append((LEGACY_BLOBS_PATH / digest[:2] / digest, f"blobs/{digest}"))
+    archive_keys = op.get_bind().execute(
+        sa.text("SELECT archive_key FROM snapshots WHERE archive_key IS NOT NULL")
+    ).scalars()
+    for key in archive_keys:
+        files.append((LEGACY_SNAPSHOTS_PATH / key.removeprefix("snapshots/"), key))
+    return files
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _ensure_local_files("archive_path")
+    op.alter_column('file_metadata', 'disk_path', new_column_name='storage_key')
+    op.alter_column('snapshots', 'archive_path', new_column_name='archive_key')
+    op.execute("UPDATE file_metadata SET storage_key = 'files/' || regexp_replace(storage_key, '^.*/', '')")
+
+    # Архивы снимков с манифестом пересобираются из блобов при следующем скачивании.
+    # Снимки, созданные до появления блобов, имеют пустой манифест: их архив -
+    # единственная копия содержимого, поэтому он переносится вместе с ключом
+    op.execute("UPDATE snapshots SET archive_key = NULL WHERE json_array_length(manifest) > 0")
+    op.execute("UPDATE snapshots SET archive_key = 'snapshots/' || regexp_replace(archive_key, '^.*/', '')")
+
+    if _storage_backend() == "local":
+        for source, key in _legacy_files():
+            _link(source, _storage_path(key))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _ensure_local_files("archive_key")
+    if _storage_backend() == "local":
+        for source, key in _legacy_files():
+            _link(_storage_path(key), source)
+
+    op.execute(
+        f"UPDATE snapshots SET archive_key = '{LEGACY_SNAPSHOTS_PATH}/' || regexp_replace(archive_key, '^snapshots/', '')"
+    )
+    op.execute(f"UPDATE file_metadata SET storage_key = '{LEGACY_FILES_PATH}/' || regexp_replace(storage_key, '^files/', '')")
+    op.alter_column('snapshots', 'archive_key', new_column_name='archive_path')
+    op.alter_column('file_metadata', 'storage_key', new_column_name='disk_path')
@@ -0,0 +1,30 @@
+"""room child indexes
+
+Revision ID: e6b3f8a1c9d2
+Revises: d4a9c2e7b5f1
+Create Date: 2026-10-18 02:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b3f8a1c9d2'
+down_revision: Union[str, Sequence[str], None] = 'd4a9c2e7b5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_file_metadata_room_id'), 'file_metadata', ['room_id'], unique=False)
+    op.create_index('ix_snapshots_room_id_id', 'snapshots', ['room_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_snapshots_room_id_id', table_name='snapshots')
+    op.drop_index(op.f('ix_file_metadata_room_id'), table_name='file_metadata')
@@ -0,0 +1,38 @@
+import asyncio
+
+from pycrdt import Doc, Text
+
+from backend.collaboration import documents
+from backend.collaboration.documents import DocumentManager, ResidentDocument
+
+
+class StoredState:
+    def __init__(self, state):
+        self.state = state
+
+    async def load_document_state(self, room_id, file_id):
+        return self.state
+
+
+def test_rejoined_document_merges_updates_missed_while_unsubscribed(monkeypatch):
+    monkeypatch.setattr(documents.document_persister, "flush_soon", lambda: None)
+    key = ("room", "1")
+    resident = Doc()
+    resident["text"] = Text("hello")
+    manager = DocumentManager()
+    manager.documents[key] = ResidentDocument(doc=resident, size=0)
+
+    async def rejoin():
+        await manager.acquire(*key)
+        manager.release(*key)
+        # Правка другого процесса, пока этот процесс отписан от канала документа
+        remote = Doc()
+        remote.apply_update(resident.get_update())
+        remote.get("text", type=Text).insert(5, " world")
+        manager.service = StoredState(remote.get_update())
+        return await manager.acquire(*key)
+
+    doc = asyncio.run(rejoin())
+
+    assert str(doc.get("text", type=Text)) == "hello world"
+    assert not manager.documents[key].stale
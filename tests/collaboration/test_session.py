@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from pycrdt import Doc
+
+from backend.collaboration import session
+from backend.collaboration.documents import ResidentDocument, document_manager
+
+# Сообщение SYNC/UPDATE, содержимое которого не декодируется как обновление Yjs
+MALFORMED_UPDATE_FRAME = b"\x00\x02\x05garbage"
+
+
+class RecordingBatcher:
+    def __init__(self):
+        self.updates = []
+
+    async def add(self, key, update, connection):
+        self.updates.append(update)
+
+
+@pytest.fixture
+def resident_document():
+    key = ("room", "1")
+    document_manager.documents[key] = ResidentDocument(doc=Doc(), size=0)
+    yield key
+    document_manager.documents.pop(key, None)
+
+
+def test_apply_update_rejects_malformed_update(resident_document):
+    with pytest.raises(ValueError):
+        asyncio.run(document_manager.apply_update(*resident_document, b"garba"))
+
+
+def test_malformed_update_frame_is_dropped(resident_document, monkeypatch):
+    batcher = RecordingBatcher()
+    monkeypatch.setattr(session, "update_batcher", batcher)
+
+    asyncio.run(session.handle_document_message(object(), *resident_document, MALFORMED_UPDATE_FRAME))
+
+    assert batcher.updates == []
+    assert document_manager.documents[resident_document].size == 0
+
+
+def test_malformed_remote_update_is_ignored(resident_document):
+    document_manager.merge_remote_update(*resident_document, b"garba")
+
+    assert document_manager.documents[resident_document].size == 0
@@ -0,0 +1,12 @@
+import os
+
+# Настройки читаются при импорте модулей backend; внешние сервисы в тестах не используются
+for name, value in {
+    "SECRET_KEY": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)